@@ -0,0 +1,12 @@
+"""Location of Sekkei's on-disk caches (mirrors ~/.cache/sekkei used by the TS side)."""
+
+import os
+from pathlib import Path
+
+
+def cache_dir(*parts: str) -> Path:
+    """Return (and create) a cache subdirectory; SEKKEI_CACHE_DIR overrides the root."""
+    root = os.environ.get("SEKKEI_CACHE_DIR") or Path.home() / ".cache" / "sekkei"
+    path = Path(root, *parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -4,6 +4,241 @@ import json
 import os
 import sys
 
+import metrics
+
+
+def run_action(action: str, input_data: dict) -> dict:
+    """Dispatch one action. Handler modules are imported lazily per action."""
+    if action == "export-excel":
+        from export.excel_exporter import export
+        result = export(
+            input_data["content"],
+            input_data["doc_type"],
+            input_data["output_path"],
+            input_data.get("project_name", ""),
+            incremental=input_data.get("incremental", False),
+            parallel=input_data.get("parallel", False),
+            max_workers=input_data.get("max_workers"),
+            compression=input_data.get("compression", "default"),
+        )
+
+    elif action == "export-pdf":
+        from export.pdf_exporter import export
+        result = export(
+            input_data["content"],
+            input_data["doc_type"],
+            input_data["output_path"],
+            input_data.get("project_name", ""),
+            template_dir=input_data.get("template_dir"),
+            compact=input_data.get("compact", False),
+            compare=input_data.get("compare", False),
+        )
+
+    elif action == "diff":
+        from nlp.diff_analyzer import analyze
+        result = analyze(
+            input_data["upstream_old"],
+            input_data["upstream_new"],
+            input_data["downstream"],
+            revision_mode=input_data.get("revision_mode", False),
+            parts=input_data.get("parts"),
+            marked_document_path=input_data.get("marked_document_path"),
+            semantic=input_data.get("semantic", False),
+        )
+
+    elif action == "diff-batch":
+        from nlp.batch_diff import analyze_batch
+        result = analyze_batch(
+            input_data["pairs"],
+            input_data["downstream"],
+            revision_mode=input_data.get("revision_mode", False),
+            max_workers=input_data.get("max_workers"),
+        )
+
+    elif action == "diff-excel":
+        from import_pkg.excel_diff import diff_excel
+        result = diff_excel(
+            input_data["old_path"],
+            input_data["new_path"],
+            id_column=input_data.get("id_column"),
+            sheet_name=input_data.get("sheet_name"),
+        )
+
+    elif action == "export-docx":
+        from export.docx_exporter import export as export_docx
+        result = export_docx(
+            input_data["content"],
+            input_data.get("doc_type", ""),
+            input_data["output_path"],
+            input_data.get("project_name", ""),
+            streaming=input_data.get("streaming", False),
+            compression=input_data.get("compression", "default"),
+        )
+
+    elif action == "export-matrix":
+        from export.matrix_exporter import DEFAULT_TILE_COLS, DEFAULT_TILE_ROWS, export_matrix
+        result = export_matrix(
+            input_data["content"],
+            input_data["matrix_type"],
+            input_data["output_path"],
+            input_data.get("project_name", ""),
+            tiled=input_data.get("tiled"),
+            tile_rows=input_data.get("tile_rows", DEFAULT_TILE_ROWS),
+            tile_cols=input_data.get("tile_cols", DEFAULT_TILE_COLS),
+            compression=input_data.get("compression", "default"),
+        )
+
+    elif action == "import-excel":
+        from import_pkg.excel_importer import import_excel
+        result = import_excel(
+            input_data["file_path"],
+            doc_type_hint=input_data.get("doc_type_hint"),
+            sheet_name=input_data.get("sheet_name"),
+        )
+
+    elif action == "import-directory":
+        from import_pkg.batch_import import import_directory
+        result = import_directory(
+            input_data["dir_path"],
+            doc_type_hint=input_data.get("doc_type_hint"),
+            sheet_name=input_data.get("sheet_name"),
+            recursive=input_data.get("recursive", True),
+            max_workers=input_data.get("max_workers"),
+            cache_path=input_data.get("cache_dir"),
+            use_cache=input_data.get("use_cache", True),
+        )
+
+    elif action == "validate-refs":
+        from nlp.cross_ref import validate_references
+        result = validate_references(
+            documents=input_data.get("documents"),
+            dir_path=input_data.get("dir_path"),
+            incremental=input_data.get("incremental", False),
+        )
+
+    elif action == "version-store":
+        from nlp.version_store import version_store
+        result = version_store(
+            input_data["op"],
+            input_data["store_dir"],
+            input_data["doc_id"],
+            **{k: v for k, v in input_data.items() if k not in ("op", "store_dir", "doc_id")},
+        )
+
+    elif action == "stats":
+        result = metrics.stats(reset=input_data.get("reset", False))
+        if input_data.get("prometheus_path"):
+            metrics.write_prometheus(input_data["prometheus_path"])
+
+    else:
+        result = {"error": f"Unknown action: {action}"}
+
+    return result
+
+
+def run_instrumented(action: str, input_data: dict) -> dict:
+    """run_action with per-action call, latency, size and cache metrics recorded."""
+    return metrics.instrument(action, input_data, run_action)
+
+
+def _write_stream(action: str, input_data: dict) -> dict:
+    for record in stream_action(action, input_data):
+        sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+    return {}
+
+
+def stream_action(action: str, input_data: dict):
+    """Yield NDJSON records for actions that support output_format=ndjson."""
+    if action == "diff":
+        from nlp.diff_analyzer import stream_analysis
+        return stream_analysis(
+            input_data["upstream_old"],
+            input_data["upstream_new"],
+            input_data["downstream"],
+            revision_mode=input_data.get("revision_mode", False),
+            parts=input_data.get("parts"),
+            marked_document_path=input_data.get("marked_document_path"),
+            semantic=input_data.get("semantic", False),
+        )
+    raise ValueError(f"Action does not support ndjson output: {action}")
+
+
+def serve() -> None:
+    """Long-running worker: NDJSON requests on stdin, NDJSON responses on stdout.
+
+    Request:  {"id": "1", "action": "diff", "input": {...}, "priority": "interactive", "timeout_ms": 10000}
+    Cancel:   {"cancel": "1"}
+    Response: {"id": "1", "result": {...}} or {"id": "1", "error": "...", "code": "..."}
+
+    Requests for a lane whose queue is full are answered at once with code
+    "busy", so cancels and interactive requests are always read promptly.
+
+    Jobs run in governed worker processes (memory/CPU rlimits, recycling by job
+    count and RSS, see jobs.governor) configured by SEKKEI_WORKER_* env vars;
+    SEKKEI_WORKER_ISOLATION=0 runs them in threads of this process instead.
+    """
+    import asyncio
+    from jobs.governor import ResourceLimits
+    from jobs.scheduler import JobScheduler
+
+    limits = None if os.environ.get("SEKKEI_WORKER_ISOLATION") == "0" else ResourceLimits.from_env()
+
+    def emit(job_id, payload):
+        sys.stdout.write(json.dumps({"id": job_id, **payload}, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    async def read_requests():
+        scheduler = JobScheduler(run_instrumented, emit, limits=limits)
+        await scheduler.start()
+        event_loop = asyncio.get_running_loop()
+        while True:
+            line = await event_loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                emit(None, {"error": f"Invalid JSON: {e}", "code": "invalid"})
+                continue
+            if "cancel" in request:
+                scheduler.cancel(str(request["cancel"]))
+                continue
+            timeout_ms = request.get("timeout_ms")
+            scheduler.submit(
+                str(request.get("id")),
+                request.get("action", ""),
+                request.get("input", {}),
+                priority=request.get("priority"),
+                timeout=timeout_ms / 1000 if timeout_ms else None,
+            )
+        await scheduler.close()
+
+    asyncio.run(read_requests())
+
+
+def watch(input_data: dict) -> None:
+    """Long-running watcher: re-runs affected exports/impact analyses on doc edits.
+
+    Config is the action input (see jobs.watcher); events go to stdout as
+    NDJSON until SIGINT/SIGTERM.
+    """
+    import signal
+    import threading
+    from jobs.watcher import watch as run_watch
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    def emit(event):
+        sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    run_watch(input_data, run_instrumented, emit, stop)
+
 
 def main():
     if len(sys.argv) < 2:
@@ -12,6 +247,26 @@ def main():
 
     action = sys.argv[1]
 
+    if action == "serve":
+        serve()
+        return
+
+    # One-shot runs honour the same memory/CPU rlimits when configured; watch
+    # runs until stopped, so a per-job CPU budget does not apply to it. The
+    # governor is only imported when a limit is set, to keep startup lean.
+    limits = None
+    cpu_limit_errors: tuple = ()
+    if "SEKKEI_WORKER_MEMORY_MB" in os.environ or "SEKKEI_WORKER_CPU_SECONDS" in os.environ:
+        from jobs.governor import (
+            CpuLimitExceeded, ResourceLimits, apply_cpu_limit, apply_memory_limit, install_cpu_limit_handler,
+        )
+        limits = ResourceLimits.from_env()
+        cpu_limit_errors = (CpuLimitExceeded,)
+        apply_memory_limit(limits.memory_mb)
+        if action != "watch":
+            install_cpu_limit_handler()
+            apply_cpu_limit(limits.cpu_seconds)
+
     # Read input from env var or stdin
     raw = os.environ.get("SEKKEI_INPUT")
     if raw:
@@ -20,64 +275,21 @@ def main():
         input_data = json.loads(sys.stdin.read())
 
     try:
-        if action == "export-excel":
-            from export.excel_exporter import export
-            result = export(
-                input_data["content"],
-                input_data["doc_type"],
-                input_data["output_path"],
-                input_data.get("project_name", ""),
-            )
-
-        elif action == "export-pdf":
-            from export.pdf_exporter import export
-            result = export(
-                input_data["content"],
-                input_data["doc_type"],
-                input_data["output_path"],
-                input_data.get("project_name", ""),
-            )
-
-        elif action == "diff":
-            from nlp.diff_analyzer import analyze
-            result = analyze(
-                input_data["upstream_old"],
-                input_data["upstream_new"],
-                input_data["downstream"],
-                revision_mode=input_data.get("revision_mode", False),
-            )
-
-        elif action == "export-docx":
-            from export.docx_exporter import export as export_docx
-            result = export_docx(
-                input_data["content"],
-                input_data.get("doc_type", ""),
-                input_data["output_path"],
-                input_data.get("project_name", ""),
-            )
-
-        elif action == "export-matrix":
-            from export.matrix_exporter import export_matrix
-            result = export_matrix(
-                input_data["content"],
-                input_data["matrix_type"],
-                input_data["output_path"],
-                input_data.get("project_name", ""),
-            )
-
-        elif action == "import-excel":
-            from import_pkg.excel_importer import import_excel
-            result = import_excel(
-                input_data["file_path"],
-                doc_type_hint=input_data.get("doc_type_hint"),
-                sheet_name=input_data.get("sheet_name"),
-            )
-
+        if action == "watch":
+            watch(input_data)
+        elif input_data.get("output_format") == "ndjson":
+            metrics.instrument(action, input_data, _write_stream)
         else:
-            result = {"error": f"Unknown action: {action}"}
-
-        print(json.dumps(result, ensure_ascii=False))
+            result = run_instrumented(action, input_data)
+            print(json.dumps(result, ensure_ascii=False))
 
+    except MemoryError:
+        limit = f" ({limits.memory_mb} MB)" if limits and limits.memory_mb else ""
+        print(json.dumps({"error": f"Job exceeded the memory limit{limit}", "code": "memory_limit"}), file=sys.stderr)
+        sys.exit(1)
+    except cpu_limit_errors as e:
+        print(json.dumps({"error": f"{e} ({limits.cpu_seconds} s)", "code": "cpu_limit"}), file=sys.stderr)
+        sys.exit(1)
     except Exception as e:
         print(json.dumps({"error": str(e)}), file=sys.stderr)
         sys.exit(1)
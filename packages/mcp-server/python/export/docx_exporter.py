@@ -10,6 +10,11 @@ from docx.oxml import OxmlElement
 
 import yaml
 
+from jobs.cancellation import checkpoint
+from table_store.columnar import ColumnarTable, StringPool
+
+from .packaging import DEFAULT_COMPRESSION, save_document
+
 FRONTMATTER_RE = re.compile(r"^---\n([\s\S]*?)\n---\n([\s\S]*)$")
 TABLE_ROW_RE = re.compile(r"^\|(.+)\|$")
 TABLE_SEP_RE = re.compile(r"^\|[\s\-:|]+\|$")
@@ -30,6 +35,16 @@ def _set_japanese_font(doc: Document) -> None:
             continue
 
 
+def _cover_lines(meta: dict, project_name: str) -> list[str]:
+    """Centered info lines under the cover title."""
+    return [
+        f"プロジェクト名: {project_name}",
+        f"文書種別: {meta.get('doc_type', '')}",
+        f"版数: {meta.get('version', '1.0')}",
+        f"言語: {meta.get('language', 'ja')}",
+    ]
+
+
 def _create_cover(doc: Document, meta: dict, project_name: str) -> None:
     """Add cover page with project info."""
     doc.add_paragraph()  # spacing
@@ -38,13 +53,7 @@ def _create_cover(doc: Document, meta: dict, project_name: str) -> None:
     title.alignment = 1  # center
 
     doc.add_paragraph()
-    info = [
-        f"プロジェクト名: {project_name}",
-        f"文書種別: {meta.get('doc_type', '')}",
-        f"版数: {meta.get('version', '1.0')}",
-        f"言語: {meta.get('language', 'ja')}",
-    ]
-    for line in info:
+    for line in _cover_lines(meta, project_name):
         p = doc.add_paragraph(line)
         p.alignment = 1  # center
 
@@ -72,8 +81,9 @@ def _create_toc(doc: Document) -> None:
     doc.add_page_break()
 
 
-def _add_table(doc: Document, header: list[str], rows: list[list[str]]) -> None:
+def _add_table(doc: Document, data: ColumnarTable) -> None:
     """Add a formatted table to the document."""
+    header = data.header
     table = doc.add_table(rows=1, cols=len(header))
     table.style = "Table Grid"
 
@@ -87,7 +97,8 @@ def _add_table(doc: Document, header: list[str], rows: list[list[str]]) -> None:
                 run.font.size = Pt(9)
 
     # Data rows
-    for row_data in rows:
+    for row_data in data.rows:
+        checkpoint()
         row = table.add_row()
         for i, val in enumerate(row_data):
             if i < len(row.cells):
@@ -101,17 +112,17 @@ def _add_table(doc: Document, header: list[str], rows: list[list[str]]) -> None:
 
 def _build_body(doc: Document, content: str) -> None:
     """Parse markdown headings, paragraphs, and tables into Word elements."""
-    table_header = None
-    table_rows = []
+    pool = StringPool()
+    table = None
 
     def flush_table():
-        nonlocal table_header, table_rows
-        if table_header:
-            _add_table(doc, table_header, table_rows)
-            table_header = None
-            table_rows = []
+        nonlocal table
+        if table is not None:
+            _add_table(doc, table)
+            table = None
 
     for line in content.split("\n"):
+        checkpoint()
         stripped = line.strip()
 
         # Skip HTML comments and code fences
@@ -135,10 +146,10 @@ def _build_body(doc: Document, content: str) -> None:
         row_match = TABLE_ROW_RE.match(stripped)
         if row_match:
             cells = [c.strip() for c in row_match.group(1).split("|")]
-            if table_header is None:
-                table_header = cells
+            if table is None:
+                table = ColumnarTable(cells, pool)
             else:
-                table_rows.append(cells)
+                table.append_row(cells)
             continue
 
         # Non-table line ends any open table
@@ -151,8 +162,24 @@ def _build_body(doc: Document, content: str) -> None:
     flush_table()
 
 
-def export(content: str, doc_type: str, output_path: str, project_name: str = "") -> dict:
-    """Main export entry point: Markdown -> Word (.docx)."""
+def export(
+    content: str,
+    doc_type: str,
+    output_path: str,
+    project_name: str = "",
+    streaming: bool = False,
+    compression: str = DEFAULT_COMPRESSION,
+) -> dict:
+    """Main export entry point: Markdown -> Word (.docx).
+
+    streaming=True writes document.xml incrementally (see docx_stream) for
+    documents too large to hold as a python-docx tree. The package is written
+    deterministically at the given compression level (see packaging).
+    """
+    if streaming:
+        from .docx_stream import export_streaming
+        return export_streaming(content, doc_type, output_path, project_name, compression)
+
     meta = {}
     body = content
 
@@ -170,7 +197,13 @@ def export(content: str, doc_type: str, output_path: str, project_name: str = ""
     _build_body(doc, body)
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    doc.save(output_path)
+    save_seconds = save_document(doc, output_path, compression)
 
     file_size = Path(output_path).stat().st_size
-    return {"success": True, "file_path": output_path, "file_size": file_size}
+    return {
+        "success": True,
+        "file_path": output_path,
+        "file_size": file_size,
+        "compression": compression,
+        "save_seconds": save_seconds,
+    }
@@ -1,11 +1,17 @@
 """Markdown -> Excel (.xlsx) exporter with IPA 4-sheet structure."""
 
+import hashlib
+import io
 import json
+import os
 import re
 import sys
+import tempfile
+import time
+import zipfile
 from pathlib import Path
+from typing import Optional
 
-import mistune
 import yaml
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
@@ -19,6 +25,11 @@ from .shared_styles import (
     HEADER_ALIGN, DATA_ALIGN, CENTER_ALIGN,
     jp_column_width,
 )
+from jobs.cancellation import checkpoint
+from table_store.columnar import ColumnarTable, StringPool
+
+from .packaging import DEFAULT_COMPRESSION, save_workbook, write_package
+from .xlsx_package import ARC_STYLES, read_custom_props, set_custom_props, sheet_parts
 
 # Revision marker prefixes and their styles (朱書き mode)
 REVISION_MARKERS = ["【新規】", "【変更】", "【削除】"]
@@ -33,6 +44,30 @@ REVISION_FONTS = {
     "【削除】": OpenpyxlFont(name="MS Gothic", size=10, color="808080", strikethrough=True),
 }
 
+# Every cell style combination the exporter uses, registered up front in this order
+# so styles.xml and each sheet's s="N" ids do not depend on document content.
+STYLE_PRESETS = [
+    {"font": HEADER_FONT, "fill": HEADER_BG, "border": THIN_BORDER, "alignment": HEADER_ALIGN},
+    {"font": DATA_FONT, "border": THIN_BORDER, "alignment": DATA_ALIGN},
+    {"font": DATA_FONT, "fill": ALT_ROW_BG, "border": THIN_BORDER, "alignment": DATA_ALIGN},
+    *[
+        {"font": REVISION_FONTS[m], "fill": REVISION_FILLS[m], "border": THIN_BORDER, "alignment": DATA_ALIGN}
+        for m in REVISION_MARKERS
+    ],
+    {"font": TITLE_FONT, "alignment": CENTER_ALIGN},
+    {"font": TITLE_FONT},
+    {"font": SUBTITLE_FONT},
+    {"font": DATA_FONT},
+]
+
+# Custom property names for incremental export fingerprints
+FINGERPRINT_VERSION_PROP = "sekkei.fingerprint_version"
+FINGERPRINT_VERSION = "2"
+FINGERPRINT_PREFIX = "sekkei.table:"
+
+# Below this many content sheets to render, parallel mode stays in-process
+PARALLEL_MIN_TABLES = 8
+
 # Frontmatter regex
 FRONTMATTER_RE = re.compile(r"^---\n([\s\S]*?)\n---\n([\s\S]*)$")
 # Table row regex
@@ -41,7 +76,10 @@ TABLE_SEP_RE = re.compile(r"^\|[\s\-:|]+\|$")
 
 
 def parse_markdown(content: str) -> dict:
-    """Parse MD content into frontmatter, headings, and tables."""
+    """Parse MD content into frontmatter, headings, and tables.
+
+    Tables are ColumnarTable instances sharing one StringPool per document.
+    """
     meta = {}
     body = content
 
@@ -53,6 +91,7 @@ def parse_markdown(content: str) -> dict:
     headings = []
     tables = []
     current_table = None
+    pool = StringPool()
 
     for line in body.split("\n"):
         # Headings
@@ -73,9 +112,9 @@ def parse_markdown(content: str) -> dict:
         if row_match:
             cells = [c.strip() for c in row_match.group(1).split("|")]
             if current_table is None:
-                current_table = {"header": cells, "rows": []}
+                current_table = ColumnarTable(cells, pool)
             else:
-                current_table["rows"].append(cells)
+                current_table.append_row(cells)
         else:
             if current_table:
                 tables.append(current_table)
@@ -87,6 +126,31 @@ def parse_markdown(content: str) -> dict:
     return {"meta": meta, "headings": headings, "tables": tables, "body": body}
 
 
+def table_fingerprint(table: ColumnarTable) -> str:
+    """Stable content hash of a parsed table (header + rows)."""
+    digest = hashlib.sha256(json.dumps(table.header, ensure_ascii=False).encode("utf-8"))
+    for row in table.rows:
+        digest.update(b"\n")
+        digest.update(json.dumps(list(row), ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def content_sheet_name(index: int) -> str:
+    """Sheet title for the index-th content table (本文, 本文2, ...)."""
+    return f"本文{index + 1}" if index > 0 else "本文"
+
+
+def prime_styles(wb: Workbook) -> None:
+    """Register STYLE_PRESETS on the workbook in a fixed order."""
+    ws = wb.create_sheet("_styles")
+    for row, style in enumerate(STYLE_PRESETS, 1):
+        cell = ws.cell(row=row, column=1)
+        for attr, value in style.items():
+            setattr(cell, attr, value)
+        _ = cell.style_id  # adds the combination to the workbook's cellXfs
+    wb.remove(ws)
+
+
 def create_cover_sheet(wb: Workbook, meta: dict) -> None:
     """Sheet 1: 表紙 (cover page)."""
     ws = wb.active
@@ -142,12 +206,13 @@ def create_toc_sheet(wb: Workbook, headings: list) -> None:
         ws.cell(row=i, column=1).font = DATA_FONT
 
 
-def create_content_sheet(wb: Workbook, table: dict, sheet_name: str) -> None:
+def create_content_sheet(wb: Workbook, table: ColumnarTable, sheet_name: str) -> None:
     """Create a content sheet from a parsed table."""
     ws = wb.create_sheet(sheet_name[:31])  # Excel 31-char limit
+    strings = table.pool.strings
 
     # Header row
-    for col, h in enumerate(table["header"], 1):
+    for col, h in enumerate(table.header, 1):
         cell = ws.cell(row=1, column=col, value=h)
         cell.font = HEADER_FONT
         cell.fill = HEADER_BG
@@ -155,16 +220,22 @@ def create_content_sheet(wb: Workbook, table: dict, sheet_name: str) -> None:
         cell.alignment = HEADER_ALIGN
         ws.column_dimensions[get_column_letter(col)].width = jp_column_width(h)
 
+    # Detect revision markers once per distinct first-cell value
+    first_col = table.column_ids(0)
+    markers_by_id = {}
+    for value_id in set(first_col):
+        first = strings[value_id].strip()
+        markers_by_id[value_id] = next((m for m in REVISION_MARKERS if first.startswith(m)), "")
+
     # Data rows
-    for row_idx, row in enumerate(table["rows"], 2):
-        # Detect revision marker from first cell
-        row_marker = ""
-        for marker in REVISION_MARKERS:
-            if row and row[0].strip().startswith(marker):
-                row_marker = marker
-                break
-
-        for col_idx, val in enumerate(row, 1):
+    for r in range(table.row_count):
+        checkpoint()
+        row_idx = r + 2
+        width = table.widths[r]
+        row_marker = markers_by_id[first_col[r]] if width else ""
+
+        for col_idx in range(1, width + 1):
+            val = strings[table.columns[col_idx - 1][r]]
             # Strip marker prefix from display value
             display_val = val
             if row_marker and col_idx == 1:
@@ -185,16 +256,15 @@ def create_content_sheet(wb: Workbook, table: dict, sheet_name: str) -> None:
     # Freeze header
     ws.freeze_panes = "A2"
 
-    # Auto-adjust widths from data
-    for col_idx in range(1, len(table["header"]) + 1):
-        max_width = jp_column_width(table["header"][col_idx - 1])
-        for row in table["rows"]:
-            if col_idx - 1 < len(row):
-                max_width = max(max_width, jp_column_width(row[col_idx - 1]))
+    # Auto-adjust widths from data (one width calculation per distinct value)
+    for col_idx, h in enumerate(table.header, 1):
+        max_width = max(
+            [jp_column_width(h)] + [jp_column_width(v) for v in table.distinct_values(col_idx - 1)]
+        )
         ws.column_dimensions[get_column_letter(col_idx)].width = min(max_width, 50)
 
     # Add data validation for known enum columns
-    header_lower = [h.strip() for h in table["header"]]
+    header_lower = [h.strip() for h in table.header]
     for col_idx, h in enumerate(header_lower, 1):
         if "処理分類" in h:
             dv = DataValidation(type="list", formula1='"入力,照会,帳票,バッチ"')
@@ -210,20 +280,183 @@ def create_content_sheet(wb: Workbook, table: dict, sheet_name: str) -> None:
     ws.page_setup.orientation = "landscape"
 
 
-def export(content: str, doc_type: str, output_path: str, project_name: str = "") -> dict:
-    """Main export entry point: MD -> Excel."""
+def _load_previous_fingerprints(path: str) -> dict[str, str]:
+    """Map table fingerprint -> worksheet part name from a previous export, if any."""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            props = read_custom_props(archive)
+            if props.get(FINGERPRINT_VERSION_PROP) != FINGERPRINT_VERSION:
+                return {}
+            parts = sheet_parts(archive)
+    except (OSError, zipfile.BadZipFile, KeyError):
+        return {}
+
+    previous = {}
+    for name, fingerprint in props.items():
+        if name.startswith(FINGERPRINT_PREFIX):
+            part = parts.get(name[len(FINGERPRINT_PREFIX):])
+            if part:
+                previous[fingerprint] = part
+    return previous
+
+
+def _read_previous_sheets(path: str, reuse: dict[str, str]) -> tuple[bytes, dict[str, bytes]]:
+    """(styles.xml, {new sheet title: worksheet XML}) for sheets reused from a previous file."""
+    with zipfile.ZipFile(path) as old:
+        return old.read(ARC_STYLES), {title: old.read(part) for title, part in reuse.items()}
+
+
+def _render_sheets(document: tuple[str, int], batch: list[tuple[str, int]]) -> tuple[bytes, dict[str, bytes]]:
+    """Pool worker: build content sheets in a scratch workbook and return their XML.
+
+    Tables are mapped from the shared parsed document (table_store.shared_docs)
+    by index rather than pickled. The scratch workbook is primed with
+    STYLE_PRESETS like the main one, so the s="N" style ids in the returned
+    XML are valid in the assembled package.
+    """
+    from table_store.shared_docs import attach
+
+    parsed = attach(document)
+    wb = Workbook()
+    prime_styles(wb)
+    for name, index in batch:
+        create_content_sheet(wb, parsed.table(index), name)
+
+    buf = io.BytesIO()
+    save_workbook(wb, buf, "store")  # scratch package, only its XML is used
+    with zipfile.ZipFile(buf) as archive:
+        parts = sheet_parts(archive)
+        return archive.read(ARC_STYLES), {name: archive.read(parts[name]) for name, _ in batch}
+
+
+def _render_parallel(
+    body: str, tables: list[ColumnarTable], pending: dict[str, ColumnarTable], max_workers: int
+) -> list[tuple[bytes, dict[str, bytes]]]:
+    """Render pending content sheets across worker processes, balancing by row count."""
+    from concurrent.futures import ProcessPoolExecutor
+    from table_store.shared_docs import SharedDocumentCache
+
+    index_of = {id(table): i for i, table in enumerate(tables)}
+    # Longest-first greedy packing: each worker gets one batch of similar total size
+    bins: list[list] = [[] for _ in range(max_workers)]
+    loads = [0] * max_workers
+    for name in sorted(pending, key=lambda n: -pending[n].row_count):
+        i = loads.index(min(loads))
+        bins[i].append((name, index_of[id(pending[name])]))
+        loads[i] += pending[name].row_count + 1
+
+    with SharedDocumentCache() as shared:
+        document = shared.add(body, tables)
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_render_sheets, document, batch) for batch in bins if batch]
+            results = []
+            for future in futures:
+                checkpoint()
+                results.append(future.result())
+    return results
+
+
+def _save_spliced(
+    wb: Workbook,
+    output_path: str,
+    styles: bytes,
+    sheets: dict[str, bytes],
+    compression: str = DEFAULT_COMPRESSION,
+) -> bool:
+    """Save wb, then splice pre-rendered worksheet XML into its placeholder sheets.
+
+    sheets maps sheet title -> worksheet XML rendered against the styles.xml given
+    in styles. Returns False (leaving output_path untouched) if wb's style table
+    differs, since the spliced XML would then point at the wrong cellXfs entries.
+    """
+    out_dir = Path(output_path).parent
+    fd, fresh_path = tempfile.mkstemp(suffix=".xlsx", dir=out_dir)
+    os.close(fd)
+    fd, spliced_path = tempfile.mkstemp(suffix=".xlsx", dir=out_dir)
+    os.close(fd)
+    try:
+        save_workbook(wb, fresh_path, "store")
+        with zipfile.ZipFile(fresh_path) as fresh:
+            if fresh.read(ARC_STYLES) != styles:
+                return False
+            new_parts = sheet_parts(fresh)
+            replacements = {new_parts[title]: xml for title, xml in sheets.items()}
+            write_package(fresh, spliced_path, compression, replacements)
+        os.replace(spliced_path, output_path)
+        return True
+    finally:
+        for tmp in (fresh_path, spliced_path):
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def export(
+    content: str,
+    doc_type: str,
+    output_path: str,
+    project_name: str = "",
+    incremental: bool = False,
+    parallel: bool = False,
+    max_workers: Optional[int] = None,
+    compression: str = DEFAULT_COMPRESSION,
+) -> dict:
+    """Main export entry point: MD -> Excel.
+
+    With incremental=True, content sheets whose table fingerprint matches one stored
+    in the existing file at output_path are copied over as-is; only changed tables
+    (plus cover, history and 目次) are regenerated.
+
+    With parallel=True, content sheets are rendered in worker processes (default:
+    CPU count, when at least PARALLEL_MIN_TABLES need rendering) and spliced into
+    the package assembled here with the shared styles, cover, history and 目次.
+
+    The package is written deterministically at the given compression level
+    (see packaging.COMPRESSION_LEVELS); save_seconds in the result is the
+    serialization time alone.
+    """
     parsed = parse_markdown(content)
     meta = {**parsed["meta"], "doc_type": doc_type, "project_name": project_name}
+    previous = _load_previous_fingerprints(output_path) if incremental else {}
 
     wb = Workbook()
+    prime_styles(wb)
     create_cover_sheet(wb, meta)
     create_history_sheet(wb)
     create_toc_sheet(wb, parsed["headings"])
 
-    # Create content sheets from tables
+    # Pick which content sheets are reused, rendered in workers, or built inline
+    fingerprints = {FINGERPRINT_VERSION_PROP: FINGERPRINT_VERSION}
+    reuse = {}
+    pending: dict[str, ColumnarTable] = {}
     for i, table in enumerate(parsed["tables"]):
-        name = f"本文{i + 1}" if i > 0 else "本文"
-        create_content_sheet(wb, table, name)
+        name = content_sheet_name(i)[:31]  # Excel 31-char limit
+        fingerprint = table_fingerprint(table)
+        fingerprints[FINGERPRINT_PREFIX + name] = fingerprint
+        if fingerprint in previous:
+            reuse[name] = previous[fingerprint]
+        else:
+            pending[name] = table
+    set_custom_props(wb, fingerprints)
+
+    workers = max_workers
+    if parallel and workers is None:
+        workers = (os.cpu_count() or 1) if len(pending) >= PARALLEL_MIN_TABLES else 1
+    workers = max(1, min(workers or 1, len(pending))) if parallel else 1
+
+    rendered: list[tuple[bytes, dict[str, bytes]]] = []
+    if reuse:
+        rendered.append(_read_previous_sheets(output_path, reuse))
+    if workers > 1:
+        rendered.extend(_render_parallel(parsed["body"], parsed["tables"], pending, workers))
+
+    # Content sheets in document order; pre-rendered ones are placeholders until splicing
+    spliced = {title: xml for _, sheets in rendered for title, xml in sheets.items()}
+    for i in range(len(parsed["tables"])):
+        name = content_sheet_name(i)[:31]
+        if name in spliced:
+            wb.create_sheet(name)
+        else:
+            create_content_sheet(wb, pending[name], name)
 
     # If no tables found, create empty content sheet
     if not parsed["tables"]:
@@ -231,10 +464,42 @@ def export(content: str, doc_type: str, output_path: str, project_name: str = ""
         ws.cell(row=1, column=1, value="コンテンツなし").font = DATA_FONT
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    wb.save(output_path)
+    save_start = time.perf_counter()
+    if not spliced:
+        save_workbook(wb, output_path, compression)
+    else:
+        styles = {s for s, _ in rendered}
+        if len(styles) != 1 or not _save_spliced(wb, output_path, styles.pop(), spliced, compression):
+            # Sheets reused from a file with another style table: rebuild without
+            # reuse, still in parallel. If worker output alone did not splice,
+            # retrying it would fail the same way, so render inline.
+            result = export(
+                content, doc_type, output_path, project_name,
+                incremental=False, parallel=parallel and bool(reuse),
+                max_workers=max_workers, compression=compression,
+            )
+            if incremental:
+                result["reused_sheets"] = 0
+                result["regenerated_sheets"] = len(parsed["tables"])
+            if parallel:
+                result.setdefault("workers", 1)
+            return result
+    save_seconds = round(time.perf_counter() - save_start, 3)
 
     file_size = Path(output_path).stat().st_size
-    return {"success": True, "file_path": output_path, "file_size": file_size}
+    result = {
+        "success": True,
+        "file_path": output_path,
+        "file_size": file_size,
+        "compression": compression,
+        "save_seconds": save_seconds,
+    }
+    if incremental:
+        result["reused_sheets"] = len(reuse)
+        result["regenerated_sheets"] = len(parsed["tables"]) - len(reuse)
+    if parallel:
+        result["workers"] = workers
+    return result
 
 
 if __name__ == "__main__":
@@ -1,11 +1,17 @@
 """CRUD matrix and traceability matrix -> Excel (.xlsx) exporter."""
 
 import re
+from copy import copy
 from pathlib import Path
+from typing import Optional
 
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 
+from jobs.cancellation import checkpoint
+from table_store.columnar import ColumnarTable
+
+from .packaging import DEFAULT_COMPRESSION, save_workbook
 from .shared_styles import (
     HEADER_FONT, DATA_FONT, TITLE_FONT, SUBTITLE_FONT,
     HEADER_BG, ALT_ROW_BG, ACCENT_BG, THIN_BORDER,
@@ -17,6 +23,14 @@ from .shared_styles import (
 TABLE_ROW_RE = re.compile(r"^\|(.+)\|$")
 TABLE_SEP_RE = re.compile(r"^\|[\s\-:|]+\|$")
 
+# Excel sheet limits; larger matrices are always tiled
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_MAX_COLS = 16_384
+# Leading ID and name columns, repeated on every tile
+KEY_COLUMNS = 2
+DEFAULT_TILE_ROWS = 1000
+DEFAULT_TILE_COLS = 200
+
 # CRUD cell highlight colors
 CRUD_COLORS = {
     "C": "C6EFCE",  # green
@@ -26,10 +40,9 @@ CRUD_COLORS = {
 }
 
 
-def _parse_table(content: str) -> dict | None:
-    """Extract first markdown table from content as {header, rows}."""
-    header = None
-    rows = []
+def _parse_table(content: str) -> ColumnarTable | None:
+    """Extract first markdown table from content as a ColumnarTable."""
+    table = None
     for line in content.split("\n"):
         line = line.strip()
         if TABLE_SEP_RE.match(line):
@@ -37,24 +50,36 @@ def _parse_table(content: str) -> dict | None:
         m = TABLE_ROW_RE.match(line)
         if m:
             cells = [c.strip() for c in m.group(1).split("|")]
-            if header is None:
-                header = cells
+            if table is None:
+                table = ColumnarTable(cells)
             else:
-                rows.append(cells)
-        elif header is not None:
+                table.append_row(cells)
+        elif table is not None:
             break  # end of table
-    if header:
-        return {"header": header, "rows": rows}
+    return table
+
+
+def _mark_fill(val: str, is_crud: bool):
+    """Highlight fill for a matrix cell value, or None."""
+    from openpyxl.styles import PatternFill
+
+    if is_crud and val.strip():
+        for letter in "CRUD":
+            if letter in val.upper():
+                color = CRUD_COLORS[letter]
+                return PatternFill(start_color=color, end_color=color, fill_type="solid")
+    elif not is_crud and "○" in val:
+        return PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
     return None
 
 
-def _write_matrix_sheet(wb: Workbook, table: dict, sheet_name: str, is_crud: bool) -> None:
+def _write_matrix_sheet(wb: Workbook, table: ColumnarTable, sheet_name: str, is_crud: bool) -> None:
     """Write a matrix table to an Excel sheet with formatting."""
     ws = wb.create_sheet(sheet_name[:31])
-    from openpyxl.styles import PatternFill
+    strings = table.pool.strings
 
     # Header row
-    for col, h in enumerate(table["header"], 1):
+    for col, h in enumerate(table.header, 1):
         cell = ws.cell(row=1, column=col, value=h)
         cell.font = HEADER_FONT
         cell.fill = HEADER_BG
@@ -62,31 +87,28 @@ def _write_matrix_sheet(wb: Workbook, table: dict, sheet_name: str, is_crud: boo
         cell.alignment = HEADER_ALIGN
         ws.column_dimensions[get_column_letter(col)].width = jp_column_width(h)
 
+    # CRUD / ○ highlight fills, computed once per distinct matrix value
+    mark_fills = {}
+    for col in range(2, len(table.columns)):
+        for value_id in table.distinct_ids(col):
+            if value_id not in mark_fills:
+                mark_fills[value_id] = _mark_fill(strings[value_id], is_crud)
+
     # Data rows
-    for row_idx, row in enumerate(table["rows"], 2):
-        for col_idx, val in enumerate(row, 1):
-            cell = ws.cell(row=row_idx, column=col_idx, value=val)
+    for r in range(table.row_count):
+        checkpoint()
+        row_idx = r + 2
+        for col_idx in range(1, table.widths[r] + 1):
+            value_id = table.columns[col_idx - 1][r]
+            cell = ws.cell(row=row_idx, column=col_idx, value=strings[value_id])
             cell.font = DATA_FONT
             cell.border = THIN_BORDER
             cell.alignment = CENTER_ALIGN if col_idx > 2 else DATA_ALIGN
 
-            # Color CRUD cells
-            if is_crud and col_idx > 2 and val.strip():
-                for letter in "CRUD":
-                    if letter in val.upper():
-                        cell.fill = PatternFill(
-                            start_color=CRUD_COLORS[letter],
-                            end_color=CRUD_COLORS[letter],
-                            fill_type="solid",
-                        )
-                        break
-            # Color ○ cells in traceability
-            elif not is_crud and col_idx > 2 and "○" in val:
-                cell.fill = PatternFill(
-                    start_color="C6EFCE", end_color="C6EFCE", fill_type="solid"
-                )
-
-            if row_idx % 2 == 0 and (not cell.fill or cell.fill.fill_type is None):
+            fill = mark_fills.get(value_id) if col_idx > 2 else None
+            if fill is not None:
+                cell.fill = fill
+            elif row_idx % 2 == 0:
                 cell.fill = ALT_ROW_BG
 
     ws.freeze_panes = "C2"
@@ -94,11 +116,174 @@ def _write_matrix_sheet(wb: Workbook, table: dict, sheet_name: str, is_crud: boo
     ws.page_setup.orientation = "landscape"
 
 
+def _titles(is_crud: bool) -> tuple[str, str]:
+    """(document title for the cover, matrix sheet name); the same tiled or not."""
+    if is_crud:
+        return "CRUD図", "CRUD図"
+    return "トレーサビリティマトリックス", "トレーサビリティ"
+
+
+def _tile_ranges(total: int, size: int, start: int = 0) -> list[tuple[int, int]]:
+    """Half-open [lo, hi) blocks of at most size items covering start..total."""
+    return [(lo, min(lo + size, total)) for lo in range(start, total, size)] or [(start, start)]
+
+
+def _needs_tiling(table: ColumnarTable) -> bool:
+    return len(table.columns) > EXCEL_MAX_COLS or table.row_count + 1 > EXCEL_MAX_ROWS
+
+
+def _export_tiled(
+    table: ColumnarTable,
+    is_crud: bool,
+    output_path: str,
+    project_name: str,
+    tile_rows: int,
+    tile_cols: int,
+    compression: str = DEFAULT_COMPRESSION,
+) -> dict:
+    """Write the matrix as row x column tiles through openpyxl's write-only (streaming) mode.
+
+    Every tile repeats the ID and name columns (A:B, frozen and set as print
+    titles) next to its block of matrix columns. An index sheet after the cover
+    lists each tile's row and column range with a link to it.
+    """
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.worksheet.worksheet import Worksheet
+
+    strings = table.pool.strings
+    doc_title, title = _titles(is_crud)
+    key_cols = min(KEY_COLUMNS, len(table.columns))
+    row_blocks = _tile_ranges(table.row_count, tile_rows)
+    col_blocks = _tile_ranges(len(table.columns), tile_cols, start=key_cols)
+
+    # Resolving font/fill/border objects to style ids dominates per-cell cost,
+    # so each combination is resolved once and its style array copied after
+    style_arrays = {}
+
+    def cell(ws, value, font=DATA_FONT, fill=None, alignment=DATA_ALIGN):
+        c = WriteOnlyCell(ws, value=value)
+        key = (id(font), id(fill), id(alignment))
+        style = style_arrays.get(key)
+        if style is None:
+            c.font = font
+            c.border = THIN_BORDER
+            c.alignment = alignment
+            if fill is not None:
+                c.fill = fill
+            style_arrays[key] = copy(c._style)
+        else:
+            c._style = copy(style)
+        return c
+
+    def column_label(col: int) -> str:
+        return table.header[col] if col < len(table.header) else get_column_letter(col + 1)
+
+    def row_label(row: int) -> str:
+        return strings[table.columns[0][row]] if table.columns else str(row + 1)
+
+    tiles = []
+    for ri, (r0, r1) in enumerate(row_blocks, 1):
+        for ci, (c0, c1) in enumerate(col_blocks, 1):
+            name = f"{title} R{ri}C{ci}" if len(row_blocks) > 1 else f"{title} {ci}"
+            tiles.append((name[:31], r0, r1, c0, c1))
+
+    wb = Workbook(write_only=True)
+
+    ws = wb.create_sheet("表紙")
+    ws.sheet_properties.tabColor = "203864"
+    ws.column_dimensions["C"].width = 20
+    ws.column_dimensions["D"].width = 40
+    for _ in range(3):
+        ws.append([])
+    ws.append([None, cell(ws, doc_title, font=TITLE_FONT, alignment=CENTER_ALIGN)])
+    ws.append([])
+    ws.append([])
+    for label, value in (("プロジェクト名", project_name), ("ドキュメント種別", doc_title), ("版数", "1.0")):
+        label_cell = WriteOnlyCell(ws, value=label)
+        label_cell.font = SUBTITLE_FONT
+        value_cell = WriteOnlyCell(ws, value=value)
+        value_cell.font = DATA_FONT
+        ws.append([None, None, label_cell, value_cell])
+
+    index = wb.create_sheet("索引")
+    index_header = ["シート", "行", "行範囲", "列", "列範囲"]
+    for col, h in enumerate(index_header, 1):
+        index.column_dimensions[get_column_letter(col)].width = 24 if col in (1, 3, 5) else 14
+    index.freeze_panes = "A2"
+    index.append([cell(index, h, HEADER_FONT, HEADER_BG, HEADER_ALIGN) for h in index_header])
+    for name, r0, r1, c0, c1 in tiles:
+        quoted = name.replace("'", "''")
+        index.append([
+            cell(index, f'=HYPERLINK("#\'{quoted}\'!A1","{name}")'),
+            cell(index, f"{r0 + 1}-{r1}" if r1 > r0 else "-"),
+            cell(index, f"{row_label(r0)} 〜 {row_label(r1 - 1)}" if r1 > r0 else ""),
+            cell(index, f"{get_column_letter(c0 + 1)}-{get_column_letter(c1)}" if c1 > c0 else "-"),
+            cell(index, f"{column_label(c0)} 〜 {column_label(c1 - 1)}" if c1 > c0 else ""),
+        ])
+
+    mark_fills = {}
+    for col in range(key_cols, len(table.columns)):
+        for value_id in table.distinct_ids(col):
+            if value_id not in mark_fills:
+                mark_fills[value_id] = _mark_fill(strings[value_id], is_crud)
+
+    for name, r0, r1, c0, c1 in tiles:
+        checkpoint()
+        ws = wb.create_sheet(name)
+        columns = list(range(key_cols)) + list(range(c0, c1))
+        for out_col, col in enumerate(columns, 1):
+            ws.column_dimensions[get_column_letter(out_col)].width = jp_column_width(column_label(col))
+        ws.freeze_panes = get_column_letter(key_cols + 1) + "2"
+        ws.print_title_rows = "1:1"
+        if key_cols:
+            ws.print_title_cols = f"A:{get_column_letter(key_cols)}"
+        ws.page_setup.paperSize = Worksheet.PAPERSIZE_A4
+        ws.page_setup.orientation = "landscape"
+
+        ws.append([cell(ws, column_label(col), HEADER_FONT, HEADER_BG, HEADER_ALIGN) for col in columns])
+        for r in range(r0, r1):
+            checkpoint()
+            alt = ALT_ROW_BG if (r - r0) % 2 == 0 else None  # sheet rows 2, 4, ... as the single-sheet layout
+            width = table.widths[r]
+            row = []
+            for col in columns:
+                if col >= width:
+                    row.append(None)
+                    continue
+                value_id = table.columns[col][r]
+                if col < key_cols:
+                    row.append(cell(ws, strings[value_id], fill=alt, alignment=DATA_ALIGN))
+                else:
+                    fill = mark_fills.get(value_id) or alt
+                    row.append(cell(ws, strings[value_id], fill=fill, alignment=CENTER_ALIGN))
+            ws.append(row)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    save_seconds = save_workbook(wb, output_path, compression)
+
+    file_size = Path(output_path).stat().st_size
+    return {
+        "success": True,
+        "file_path": output_path,
+        "file_size": file_size,
+        "compression": compression,
+        "save_seconds": save_seconds,
+        "tiled": True,
+        "tiles": len(tiles),
+        "row_blocks": len(row_blocks),
+        "column_blocks": len(col_blocks),
+    }
+
+
 def export_matrix(
     content: str,
     matrix_type: str,
     output_path: str,
     project_name: str = "",
+    tiled: Optional[bool] = None,
+    tile_rows: int = DEFAULT_TILE_ROWS,
+    tile_cols: int = DEFAULT_TILE_COLS,
+    compression: str = DEFAULT_COMPRESSION,
 ) -> dict:
     """Export CRUD or traceability matrix markdown to Excel.
 
@@ -107,12 +292,24 @@ def export_matrix(
         matrix_type: "crud-matrix" or "traceability-matrix"
         output_path: Where to save the .xlsx file
         project_name: Project name for cover sheet
+        tiled: Split the matrix into tile sheets of tile_rows x tile_cols
+            matrix cells plus an index sheet. None (default) tiles only when
+            the matrix would exceed Excel's sheet size limits.
+        compression: Package compression level (see packaging.COMPRESSION_LEVELS)
     """
     table = _parse_table(content)
     if not table:
         return {"error": "No markdown table found in content"}
 
     is_crud = matrix_type == "crud-matrix"
+    if tiled or (tiled is None and _needs_tiling(table)):
+        if tile_rows < 1 or tile_cols < 1:
+            return {"error": "tile_rows and tile_cols must be positive"}
+        tile_rows = min(tile_rows, EXCEL_MAX_ROWS - 1)
+        tile_cols = min(tile_cols, EXCEL_MAX_COLS - KEY_COLUMNS)
+        return _export_tiled(table, is_crud, output_path, project_name, tile_rows, tile_cols, compression)
+
+    doc_title, sheet_name = _titles(is_crud)
     wb = Workbook()
 
     # Cover sheet
@@ -121,7 +318,7 @@ def export_matrix(
     ws.sheet_properties.tabColor = "203864"
     ws.merge_cells("B4:F4")
     cell = ws["B4"]
-    cell.value = "CRUD図" if is_crud else "トレーサビリティマトリックス"
+    cell.value = doc_title
     cell.font = TITLE_FONT
     cell.alignment = CENTER_ALIGN
 
@@ -139,11 +336,16 @@ def export_matrix(
     ws.column_dimensions["D"].width = 40
 
     # Matrix sheet
-    sheet_name = "CRUD図" if is_crud else "トレーサビリティ"
     _write_matrix_sheet(wb, table, sheet_name, is_crud)
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    wb.save(output_path)
+    save_seconds = save_workbook(wb, output_path, compression)
 
     file_size = Path(output_path).stat().st_size
-    return {"success": True, "file_path": output_path, "file_size": file_size}
+    return {
+        "success": True,
+        "file_path": output_path,
+        "file_size": file_size,
+        "compression": compression,
+        "save_seconds": save_seconds,
+    }
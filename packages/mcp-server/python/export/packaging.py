@@ -0,0 +1,168 @@
+"""Deterministic OOXML (.xlsx/.docx) packaging with selectable compression.
+
+openpyxl and python-docx save with zlib's default level and stamp every zip
+entry (and openpyxl's core.xml) with the current time, so the same input
+never produces the same bytes twice. Packages written here:
+
+- list [Content_Types].xml and _rels/.rels first, then every other part in
+  name order;
+- give every entry the same timestamp and attributes: SOURCE_DATE_EPOCH if
+  set, else 1980-01-01 (the zip epoch);
+- stamp the core.xml created/modified dates with SOURCE_DATE_EPOCH only when
+  it is set (reproducible output requested); otherwise they are the real
+  save time, as document properties should show;
+- compress at one of COMPRESSION_LEVELS: "fast" for drafts, "max" for
+  deliverables, "store" for no compression.
+
+openpyxl workbooks are serialized into an uncompressed spool and compressed
+once, here. python-docx insists on its own zip writer, so its output is
+repacked. Writers that assemble their own parts (docx_stream) use
+write_part/open_part and part_order directly.
+"""
+
+import datetime
+import os
+import tempfile
+import time
+import zipfile
+from typing import Callable, Iterable, Optional, Union
+
+# name -> (zip compression, zlib level)
+COMPRESSION_LEVELS = {
+    "store": (zipfile.ZIP_STORED, None),
+    "fast": (zipfile.ZIP_DEFLATED, 1),
+    "default": (zipfile.ZIP_DEFLATED, 6),
+    "max": (zipfile.ZIP_DEFLATED, 9),
+}
+DEFAULT_COMPRESSION = "default"
+
+_FIRST_PARTS = ("[Content_Types].xml", "_rels/.rels")
+_ZIP_EPOCH = datetime.datetime(1980, 1, 1)
+# Uncompressed packages up to this size stay in memory while being repacked
+_SPOOL_BYTES = 64 << 20
+
+
+def compression_args(compression: str) -> tuple[int, Optional[int]]:
+    try:
+        return COMPRESSION_LEVELS[compression]
+    except KeyError:
+        raise ValueError(
+            f"Unknown compression {compression!r}; expected one of {', '.join(COMPRESSION_LEVELS)}"
+        ) from None
+
+
+def package_datetime() -> datetime.datetime:
+    """Timestamp stamped into packages: SOURCE_DATE_EPOCH (UTC) or the zip epoch."""
+    raw = os.environ.get("SOURCE_DATE_EPOCH")
+    if raw:
+        stamp = datetime.datetime.fromtimestamp(int(raw), tz=datetime.timezone.utc).replace(tzinfo=None)
+        return max(stamp, _ZIP_EPOCH)  # zip cannot represent earlier dates
+    return _ZIP_EPOCH
+
+
+def core_properties_datetime() -> datetime.datetime:
+    """created/modified for docProps/core.xml: pinned only when SOURCE_DATE_EPOCH is set."""
+    if os.environ.get("SOURCE_DATE_EPOCH"):
+        return package_datetime()
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def part_order(names: Iterable[str]) -> list[str]:
+    """Fixed entry order: content types and package rels first, then by name."""
+    names = list(names)
+    first = [n for n in _FIRST_PARTS if n in names]
+    return first + sorted(n for n in names if n not in _FIRST_PARTS)
+
+
+def part_info(name: str, compression: str = DEFAULT_COMPRESSION) -> zipfile.ZipInfo:
+    """ZipInfo with the fixed timestamp and attributes for one package part."""
+    compress_type, level = compression_args(compression)
+    info = zipfile.ZipInfo(name, date_time=package_datetime().timetuple()[:6])
+    info.compress_type = compress_type
+    info.create_system = 0
+    info.external_attr = 0o600 << 16
+    return info
+
+
+def write_part(zf: zipfile.ZipFile, name: str, data: bytes, compression: str = DEFAULT_COMPRESSION) -> None:
+    """Add one part with the fixed ZipInfo at the compression's zlib level."""
+    zf.writestr(part_info(name, compression), data, compresslevel=compression_args(compression)[1])
+
+
+def open_part(zf: zipfile.ZipFile, name: str, compression: str = DEFAULT_COMPRESSION):
+    """Open one part for streamed writing with the fixed ZipInfo.
+
+    ZipFile.open() has no compresslevel argument; the level can only travel on
+    the ZipInfo, as the public compress_level from Python 3.13 and under its
+    older private name before that.
+    """
+    info = part_info(name, compression)
+    level = compression_args(compression)[1]
+    if hasattr(info, "compress_level"):
+        info.compress_level = level
+    else:
+        info._compresslevel = level
+    return zf.open(info, "w")
+
+
+def write_package(
+    source: Union[str, os.PathLike, zipfile.ZipFile],
+    output_path: str,
+    compression: str = DEFAULT_COMPRESSION,
+    replacements: Optional[dict[str, bytes]] = None,
+) -> None:
+    """Rewrite the package at source deterministically, swapping in replacement parts."""
+    compression_args(compression)  # validate before touching output_path
+    replacements = replacements or {}
+    own = not isinstance(source, zipfile.ZipFile)
+    src = zipfile.ZipFile(source) if own else source
+    try:
+        with zipfile.ZipFile(output_path, "w", allowZip64=True) as dst:
+            for name in part_order(src.namelist()):
+                data = replacements.get(name)
+                if data is None:
+                    data = src.read(name)
+                write_part(dst, name, data, compression)
+    finally:
+        if own:
+            src.close()
+
+
+def _timed(save: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    save()
+    return round(time.perf_counter() - start, 3)
+
+
+def save_workbook(wb, output_path: str, compression: str = DEFAULT_COMPRESSION) -> float:
+    """Save an openpyxl Workbook deterministically; returns the save time in seconds."""
+    from openpyxl.writer.excel import ExcelWriter
+
+    def save():
+        stamp = core_properties_datetime()
+        wb.properties.created = stamp
+        wb.properties.modified = stamp
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as spool:
+            with zipfile.ZipFile(spool, "w", zipfile.ZIP_STORED, allowZip64=True) as raw:
+                ExcelWriter(wb, raw).save()
+            spool.seek(0)
+            with zipfile.ZipFile(spool) as raw:
+                write_package(raw, output_path, compression)
+
+    return _timed(save)
+
+
+def save_document(doc, output_path: str, compression: str = DEFAULT_COMPRESSION) -> float:
+    """Save a python-docx Document deterministically; returns the save time in seconds."""
+    def save():
+        stamp = core_properties_datetime()
+        doc.core_properties.created = stamp
+        doc.core_properties.modified = stamp
+        with tempfile.SpooledTemporaryFile(max_size=_SPOOL_BYTES) as spool:
+            doc.save(spool)
+            spool.seek(0)
+            with zipfile.ZipFile(spool) as raw:
+                write_package(raw, output_path, compression)
+
+    return _timed(save)
+
@@ -0,0 +1,154 @@
+"""Compact PDF output: smaller files for archives and customer portal uploads.
+
+Compact mode asks WeasyPrint to recompress images (JPEG quality, DPI cap,
+optimize_images), drop font hinting and keep streams compressed. It also
+caches font subsets across documents. Embedding the JP fonts dominates
+export time, and most 設計書 in a project use nearly the same glyph set, so
+each subset is stored under a key of (font bytes, glyph ids, flags) in
+memory and in the sekkei cache. Images are cached there too through
+WeasyPrint's own cache option.
+
+The subset cache wraps weasyprint.pdf.fonts.Font.subset. If that hook is
+missing in a future WeasyPrint, compact mode still works, just without the cache.
+"""
+
+import hashlib
+import io
+import os
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from cache_paths import cache_dir
+
+COMPACT_JPEG_QUALITY = 70
+COMPACT_DPI = 150
+# Bump when the subset key or stored format changes
+SUBSET_CACHE_VERSION = "1"
+
+# Per-export hit/miss counters; None outside compact exports (cache bypassed)
+_SUBSET_STATS: ContextVar[Optional[dict]] = ContextVar("sekkei_subset_stats", default=None)
+_SUBSETS: dict[str, bytes] = {}
+_install_lock = threading.Lock()
+_installed = False
+
+
+def compact_options() -> dict:
+    """WeasyPrint write_pdf options for compact output."""
+    return {
+        "optimize_images": True,
+        "jpeg_quality": COMPACT_JPEG_QUALITY,
+        "dpi": COMPACT_DPI,
+        "hinting": False,
+        "full_fonts": False,
+        "uncompressed_pdf": False,
+        "cache": str(cache_dir("pdf-images")),
+    }
+
+
+def _subset_key(font, to_unicode: dict, hinting: bool) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    h.update(SUBSET_CACHE_VERSION.encode())
+    h.update(hashlib.blake2b(font.file_content).digest())
+    h.update(f"|{font.index}|{int(bool(hinting))}|{int(bool(font.missing))}|".encode())
+    h.update(array("I", sorted(to_unicode)).tobytes())
+    return h.hexdigest()
+
+
+def _load_subset(key: str) -> Optional[bytes]:
+    data = _SUBSETS.get(key)
+    if data is None:
+        try:
+            with open(cache_dir("pdf-fonts") / f"{key}.bin", "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        _SUBSETS[key] = data
+    return data
+
+
+def _store_subset(key: str, data: bytes) -> None:
+    _SUBSETS[key] = data
+    path = cache_dir("pdf-fonts") / f"{key}.bin"
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # the in-memory copy still serves this process
+
+
+def _cached_subset(original):
+    """Wrap Font.subset so compact exports reuse earlier subsets of the same glyphs."""
+    def subset(font, to_unicode, hinting):
+        stats = _SUBSET_STATS.get()
+        if stats is None or not to_unicode:
+            return original(font, to_unicode, hinting)
+
+        key = _subset_key(font, to_unicode, hinting)
+        data = _load_subset(key)
+        if data is not None:
+            stats["hits"] += 1
+            font.file_content = data
+            return None
+
+        stats["misses"] += 1
+        full = font.file_content
+        result = original(font, to_unicode, hinting)
+        if font.file_content is not full:  # subsetting succeeded
+            _store_subset(key, font.file_content)
+        return result
+
+    subset.__wrapped__ = original
+    return subset
+
+
+def _install_subset_cache() -> bool:
+    global _installed
+    with _install_lock:
+        if not _installed:
+            from weasyprint.pdf import fonts
+
+            original = getattr(getattr(fonts, "Font", None), "subset", None)
+            if original is None:
+                return False
+            fonts.Font.subset = _cached_subset(original)
+            _installed = True
+    return True
+
+
+@contextmanager
+def subset_cache():
+    """Enable the font subset cache for exports in this context; yields hit/miss counts."""
+    stats = {"hits": 0, "misses": 0, "enabled": _install_subset_cache()}
+    token = _SUBSET_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        _SUBSET_STATS.reset(token)
+
+
+def write_compact(full_html: str, output_path: str, compare: bool = False) -> dict:
+    """Write a compact PDF; with compare=True also measure a standard render first."""
+    from weasyprint import HTML
+
+    report = {}
+    if compare:
+        start = time.perf_counter()
+        buf = io.BytesIO()
+        HTML(string=full_html).write_pdf(buf)
+        report["standard_size"] = buf.tell()
+        report["standard_seconds"] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    with subset_cache() as stats:
+        HTML(string=full_html).write_pdf(output_path, **compact_options())
+    report["compact_seconds"] = round(time.perf_counter() - start, 3)
+    report["font_subset_cache"] = {"hits": stats["hits"], "misses": stats["misses"]}
+    if not stats["enabled"]:
+        report["font_subset_cache"]["disabled"] = True
+    return report
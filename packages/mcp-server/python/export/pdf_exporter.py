@@ -1,51 +1,65 @@
-"""Markdown -> PDF exporter using WeasyPrint with JP font support."""
+"""Markdown -> PDF exporter using WeasyPrint with JP font support.
+
+The body is rendered from mistune's AST by a renderer that anchors h1-h4 and
+collects them as it goes, so the TOC needs no second pass over the HTML. The
+cover, TOC and page shell are Jinja2 templates (python/templates/pdf), loaded
+once per process and byte-compiled into the sekkei cache, so a custom layout
+directory only costs a template lookup per export.
+"""
 
-import html as html_mod
 import json
 import re
 import sys
+from functools import lru_cache
 from pathlib import Path
+from typing import Optional
 
+import jinja2
 import mistune
 import yaml
 
+from cache_paths import cache_dir
+from jobs.cancellation import checkpoint
+
 from .shared_styles import PDF_CSS
 
 FRONTMATTER_RE = re.compile(r"^---\n([\s\S]*?)\n---\n([\s\S]*)$")
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+DOCUMENT_TEMPLATE = "pdf/document.html.j2"
+# Same plugin set as mistune.html
+MISTUNE_PLUGINS = ["strikethrough", "footnotes", "table"]
+TOC_MAX_LEVEL = 4
+
+
+class TocHTMLRenderer(mistune.HTMLRenderer):
+    """HTML renderer that anchors headings and records them for the TOC."""
+
+    def __init__(self):
+        super().__init__(escape=False)
+        self.headings: list[dict] = []
+
+    def heading(self, text: str, level: int, **attrs) -> str:
+        if level <= TOC_MAX_LEVEL:
+            anchor = f"sec-{len(self.headings) + 1}"
+            self.headings.append({"level": level, "text": text, "anchor": anchor})
+            attrs["id"] = anchor
+        return super().heading(text, level, **attrs)
+
+
+@lru_cache(maxsize=8)
+def template_environment(template_dir: Optional[str] = None) -> jinja2.Environment:
+    """Jinja2 environment per layout directory; custom templates override the defaults."""
+    loaders = [jinja2.FileSystemLoader(template_dir)] if template_dir else []
+    loaders.append(jinja2.FileSystemLoader(str(TEMPLATE_DIR)))
+    return jinja2.Environment(
+        loader=jinja2.ChoiceLoader(loaders),
+        autoescape=True,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(str(cache_dir("jinja"))),
+    )
 
 
-def extract_headings(html: str) -> list[dict]:
-    """Extract headings from HTML for TOC generation."""
-    headings = []
-    for match in re.finditer(r"<h([1-4])[^>]*>(.*?)</h\1>", html):
-        headings.append({"level": int(match.group(1)), "text": match.group(2)})
-    return headings
-
-
-def generate_toc_html(headings: list[dict]) -> str:
-    """Generate HTML TOC from headings."""
-    lines = ['<div class="toc">', "<h1>目次</h1>", "<ul>"]
-    for h in headings:
-        indent = "  " * (h["level"] - 1)
-        lines.append(f'{indent}<li style="margin-left:{(h["level"]-1)*20}px">{h["text"]}</li>')
-    lines.extend(["</ul>", "</div>"])
-    return "\n".join(lines)
-
-
-def generate_cover_html(meta: dict) -> str:
-    """Generate cover page HTML."""
-    title = html_mod.escape(meta.get("doc_type", "設計書"))
-    project = html_mod.escape(meta.get("project_name", ""))
-    version = html_mod.escape(str(meta.get("version", "1.0")))
-    return f"""<div class="cover">
-<h1>{title}</h1>
-<p style="font-size:16pt;margin-top:40px;">{project}</p>
-<p style="font-size:12pt;color:#666;">版数: {version}</p>
-</div>"""
-
-
-def md_to_html(content: str) -> tuple[str, dict]:
-    """Convert markdown to HTML, extracting frontmatter."""
+def md_to_html(content: str) -> tuple[str, dict, list[dict]]:
+    """Convert markdown to HTML, extracting frontmatter and the anchored headings."""
     meta = {}
     body = content
 
@@ -54,36 +68,69 @@ def md_to_html(content: str) -> tuple[str, dict]:
         meta = yaml.safe_load(fm_match.group(1)) or {}
         body = fm_match.group(2)
 
-    html = mistune.html(body)
-    return html, meta
+    renderer = TocHTMLRenderer()
+    html = mistune.create_markdown(renderer=renderer, plugins=MISTUNE_PLUGINS)(body)
+    return html, meta, renderer.headings
+
+
+def build_html(
+    content: str,
+    doc_type: str,
+    project_name: str = "",
+    template_dir: Optional[str] = None,
+) -> str:
+    """Full HTML document (cover, linked TOC, body) ready for WeasyPrint."""
+    body_html, meta, headings = md_to_html(content)
+    template = template_environment(template_dir).get_template(DOCUMENT_TEMPLATE)
+    return template.render(
+        css=PDF_CSS,
+        meta=meta,
+        cover={
+            "title": doc_type,
+            "project_name": project_name,
+            "version": str(meta.get("version", "1.0")),
+        },
+        headings=headings,
+        body=body_html,
+    )
 
 
-def export(content: str, doc_type: str, output_path: str, project_name: str = "") -> dict:
-    """Main export: MD -> PDF via WeasyPrint."""
+def export(
+    content: str,
+    doc_type: str,
+    output_path: str,
+    project_name: str = "",
+    template_dir: Optional[str] = None,
+    compact: bool = False,
+    compare: bool = False,
+) -> dict:
+    """Main export: MD -> PDF via WeasyPrint.
+
+    template_dir may hold pdf/document.html.j2, pdf/cover.html.j2 or
+    pdf/toc.html.j2 to replace the built-in layout. compact=True writes a
+    size-optimized PDF (see pdf_compact); compare=True additionally renders a
+    standard PDF in memory and reports both sizes and times.
+    """
     from weasyprint import HTML  # lazy import for optional dependency
 
-    body_html, meta = md_to_html(content)
-    meta = {**meta, "doc_type": doc_type, "project_name": project_name}
-
-    headings = extract_headings(body_html)
-    cover = generate_cover_html(meta)
-    toc = generate_toc_html(headings)
-
-    full_html = f"""<!DOCTYPE html>
-<html lang="ja">
-<head><meta charset="utf-8"><style>{PDF_CSS}</style></head>
-<body>
-{cover}
-{toc}
-{body_html}
-</body>
-</html>"""
+    full_html = build_html(content, doc_type, project_name, template_dir)
 
+    checkpoint()  # WeasyPrint layout is not interruptible; last chance to stop
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    HTML(string=full_html).write_pdf(output_path)
+    report = {}
+    if compact:
+        from .pdf_compact import write_compact
+        report = write_compact(full_html, output_path, compare=compare)
+    else:
+        HTML(string=full_html).write_pdf(output_path)
 
     file_size = Path(output_path).stat().st_size
-    return {"success": True, "file_path": output_path, "file_size": file_size}
+    result = {"success": True, "file_path": output_path, "file_size": file_size}
+    if compact:
+        result["compact"] = report
+        if "standard_size" in report:
+            report["size_reduction"] = round(1 - file_size / max(report["standard_size"], 1), 4)
+    return result
 
 
 if __name__ == "__main__":
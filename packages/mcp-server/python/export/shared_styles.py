@@ -1,30 +1,43 @@
 """Shared JP styling constants for Excel and PDF exports."""
 
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-
-# -- Fonts --
-HEADER_FONT = Font(name="Meiryo", size=10, bold=True, color="FFFFFF")
-DATA_FONT = Font(name="MS Gothic", size=10)
-TITLE_FONT = Font(name="Meiryo", size=16, bold=True)
-SUBTITLE_FONT = Font(name="Meiryo", size=12, bold=True)
-
-# -- Colors --
-HEADER_BG = PatternFill(start_color="203864", end_color="203864", fill_type="solid")
-ALT_ROW_BG = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-ACCENT_BG = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-
-# -- Borders --
-THIN_BORDER = Border(
-    left=Side(style="thin"),
-    right=Side(style="thin"),
-    top=Side(style="thin"),
-    bottom=Side(style="thin"),
-)
-
-# -- Alignment --
-HEADER_ALIGN = Alignment(horizontal="center", vertical="center", wrap_text=True)
-DATA_ALIGN = Alignment(vertical="top", wrap_text=True)
-CENTER_ALIGN = Alignment(horizontal="center", vertical="center")
+# openpyxl style objects are built on first access (PEP 562 module __getattr__)
+# so PDF-only callers importing PDF_CSS / jp_column_width never load openpyxl.
+_XLSX_STYLES: dict = {}
+
+
+def _build_xlsx_styles() -> dict:
+    from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+
+    thin = Side(style="thin")
+    return {
+        # -- Fonts --
+        "HEADER_FONT": Font(name="Meiryo", size=10, bold=True, color="FFFFFF"),
+        "DATA_FONT": Font(name="MS Gothic", size=10),
+        "TITLE_FONT": Font(name="Meiryo", size=16, bold=True),
+        "SUBTITLE_FONT": Font(name="Meiryo", size=12, bold=True),
+        # -- Colors --
+        "HEADER_BG": PatternFill(start_color="203864", end_color="203864", fill_type="solid"),
+        "ALT_ROW_BG": PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid"),
+        "ACCENT_BG": PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        # -- Borders --
+        "THIN_BORDER": Border(left=thin, right=thin, top=thin, bottom=thin),
+        # -- Alignment --
+        "HEADER_ALIGN": Alignment(horizontal="center", vertical="center", wrap_text=True),
+        "DATA_ALIGN": Alignment(vertical="top", wrap_text=True),
+        "CENTER_ALIGN": Alignment(horizontal="center", vertical="center"),
+    }
+
+
+def __getattr__(name: str):
+    if name.startswith("__"):  # import machinery probes (__path__, __spec__, ...)
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if not _XLSX_STYLES:
+        _XLSX_STYLES.update(_build_xlsx_styles())
+    try:
+        return _XLSX_STYLES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
 
 # -- PDF CSS --
 PDF_CSS = """
@@ -44,6 +57,7 @@ td { padding: 4pt 8pt; border: 1px solid #D3D3D3; vertical-align: top; }
 tr:nth-child(even) td { background-color: #F2F2F2; }
 .toc { page-break-after: always; }
 .toc a { text-decoration: none; color: #203864; }
+.toc a::after { content: leader(".") target-counter(attr(href), page); }
 .cover { text-align: center; padding-top: 200px; page-break-after: always; }
 .cover h1 { font-size: 28pt; border: none; }
 """
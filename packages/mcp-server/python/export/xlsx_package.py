@@ -0,0 +1,54 @@
+"""Low-level .xlsx package helpers: sheet part lookup and custom props."""
+
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+from openpyxl.packaging.custom import CustomPropertyList, StringProperty
+
+ARC_WORKBOOK = "xl/workbook.xml"
+ARC_WORKBOOK_RELS = "xl/_rels/workbook.xml.rels"
+ARC_STYLES = "xl/styles.xml"
+ARC_CUSTOM = "docProps/custom.xml"
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def sheet_parts(archive: zipfile.ZipFile) -> dict[str, str]:
+    """Map sheet title -> worksheet part name (e.g. 'xl/worksheets/sheet4.xml')."""
+    rels = ElementTree.fromstring(archive.read(ARC_WORKBOOK_RELS))
+    targets = {}
+    for rel in rels.iter(f"{_NS_PKG_REL}Relationship"):
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join("xl", target))
+        targets[rel.get("Id")] = target
+
+    workbook = ElementTree.fromstring(archive.read(ARC_WORKBOOK))
+    parts = {}
+    for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+        rid = sheet.get(f"{_NS_REL}id")
+        if rid in targets:
+            parts[sheet.get("name")] = targets[rid]
+    return parts
+
+
+def read_custom_props(archive: zipfile.ZipFile) -> dict[str, str]:
+    """Read docProps/custom.xml string properties without loading the workbook."""
+    if ARC_CUSTOM not in archive.namelist():
+        return {}
+    props = CustomPropertyList.from_tree(ElementTree.fromstring(archive.read(ARC_CUSTOM)))
+    return {p.name: str(p.value) for p in props.props}
+
+
+def set_custom_props(wb, values: dict[str, str]) -> None:
+    """Write string custom properties onto an openpyxl Workbook, replacing existing ones."""
+    keep = [p for p in wb.custom_doc_props.props if p.name not in values]
+    wb.custom_doc_props.props = keep
+    for name, value in values.items():
+        wb.custom_doc_props.append(StringProperty(name=name, value=value))
+
@@ -0,0 +1,195 @@
+"""Import a directory of Excel files in parallel, with a content-addressed result cache."""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from cache_paths import cache_dir
+
+# Bump when import_excel's output format changes so stale cache entries are ignored
+IMPORT_CACHE_VERSION = "2"
+STAT_INDEX_FILE = "stat-index.json"
+# Result entries kept per store; the least recently used are evicted beyond this
+MAX_CACHE_ENTRIES = 2000
+
+
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(digest: str, sheet_name: Optional[str], doc_type_hint: Optional[str]) -> str:
+    raw = json.dumps([IMPORT_CACHE_VERSION, digest, sheet_name, doc_type_hint])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _write_json(path: Path, data) -> None:
+    """Atomic JSON write so concurrent imports never see a half-written entry."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _evict(store: Path, keep: int) -> None:
+    """Delete the least recently used result entries beyond keep (hits refresh mtime)."""
+    def mtime(entry: Path) -> int:
+        try:
+            return entry.stat().st_mtime_ns
+        except OSError:
+            return 0  # removed by a concurrent import
+
+    entries = [p for p in store.glob("*.json") if p.name != STAT_INDEX_FILE]
+    if len(entries) <= keep:
+        return
+    entries.sort(key=mtime)
+    for entry in entries[:len(entries) - keep]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def _convert(path: str, doc_type_hint: Optional[str], sheet_name: Optional[str]) -> dict:
+    """Pool worker: import one workbook, turning failures into an error entry."""
+    from .excel_importer import import_excel  # openpyxl only loads when a file needs parsing
+
+    try:
+        return import_excel(path, doc_type_hint=doc_type_hint, sheet_name=sheet_name)
+    except Exception as e:  # one bad workbook must not fail the whole directory
+        return {"error": str(e)}
+
+
+def _convert_parallel(
+    paths: list[str], doc_type_hint: Optional[str], sheet_name: Optional[str], workers: int
+) -> dict[str, dict]:
+    """Convert on a process pool; a crashed worker only fails the file that crashed it.
+
+    A worker that dies (segfault, OOM kill) breaks the whole pool, so every file
+    still in flight is retried alone in a fresh single-worker pool.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    converted: dict[str, dict] = {}
+    retry = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {p: pool.submit(_convert, p, doc_type_hint, sheet_name) for p in paths}
+        for p, future in futures.items():
+            try:
+                converted[p] = future.result()
+            except BrokenProcessPool:
+                retry.append(p)
+            except Exception as e:
+                converted[p] = {"error": str(e)}
+
+    for p in retry:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            try:
+                converted[p] = pool.submit(_convert, p, doc_type_hint, sheet_name).result()
+            except BrokenProcessPool:
+                converted[p] = {"error": "Import worker crashed while reading this workbook"}
+            except Exception as e:
+                converted[p] = {"error": str(e)}
+    return converted
+
+
+def import_directory(
+    dir_path: str,
+    doc_type_hint: Optional[str] = None,
+    sheet_name: Optional[str] = None,
+    recursive: bool = True,
+    max_workers: Optional[int] = None,
+    cache_path: Optional[str] = None,
+    use_cache: bool = True,
+) -> dict:
+    """Convert every .xlsx under dir_path to Sekkei markdown.
+
+    Results are cached by (file SHA-256, sheet_name, doc_type_hint). A stat index
+    (size + mtime) skips re-hashing files that have not been touched, so
+    unchanged workbooks return without being opened; the rest are converted on
+    a process pool. Each store keeps at most MAX_CACHE_ENTRIES results, evicting
+    the least recently used.
+
+    Returns:
+        dict with: files (per-file import_excel result + file_path/cached),
+        file_count, cache_hits (only with use_cache), converted, errors
+    """
+    root = Path(dir_path)
+    if not root.is_dir():
+        return {"error": f"Not a directory: {dir_path}"}
+
+    pattern = "**/*.xlsx" if recursive else "*.xlsx"
+    paths = sorted(p for p in root.glob(pattern) if not p.name.startswith("~$"))
+
+    store = Path(cache_path) if cache_path else cache_dir("import")
+    store.mkdir(parents=True, exist_ok=True)
+    stat_index = (_read_json(store / STAT_INDEX_FILE) or {}) if use_cache else {}
+
+    results: dict[str, dict] = {}
+    pending: dict[str, str] = {}  # file path -> cache key
+    for path in paths:
+        st = path.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = stat_index.get(str(path))
+        if known and known["stat"] == stamp:
+            digest = known["sha256"]
+        else:
+            digest = file_digest(path)
+            stat_index[str(path)] = {"stat": stamp, "sha256": digest}
+
+        key = cache_key(digest, sheet_name, doc_type_hint)
+        entry = store / f"{key}.json"
+        cached = _read_json(entry) if use_cache else None
+        if cached is not None:
+            try:
+                os.utime(entry)  # mark recently used for eviction
+            except OSError:
+                pass
+            results[str(path)] = {"file_path": str(path), "cached": True, **cached}
+        else:
+            pending[str(path)] = key
+
+    if pending:
+        workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        if workers > 1 and len(pending) > 1:
+            converted = _convert_parallel(list(pending), doc_type_hint, sheet_name, workers)
+        else:
+            converted = {p: _convert(p, doc_type_hint, sheet_name) for p in pending}
+
+        for p, result in converted.items():
+            if "error" not in result and use_cache:
+                _write_json(store / f"{pending[p]}.json", result)
+            results[p] = {"file_path": p, "cached": False, **result}
+
+    if use_cache:
+        # Forget workbooks deleted from this directory so the index does not grow forever
+        prefix = str(root) + os.sep
+        scanned = {str(p) for p in paths}
+        for stale in [p for p in stat_index if p.startswith(prefix) and p not in scanned and not os.path.exists(p)]:
+            del stat_index[stale]
+        _write_json(store / STAT_INDEX_FILE, stat_index)
+        if pending:
+            _evict(store, MAX_CACHE_ENTRIES)
+
+    files = [results[str(p)] for p in paths]
+    summary = {"files": files, "file_count": len(files)}
+    if use_cache:
+        summary["cache_hits"] = sum(1 for f in files if f["cached"])
+    summary["converted"] = sum(1 for f in files if not f["cached"] and "error" not in f)
+    summary["errors"] = sum(1 for f in files if "error" in f)
+    return summary
@@ -0,0 +1,212 @@
+"""Direct xlsx-to-xlsx version diff keyed by ID rows.
+
+Both workbooks are streamed in read-only mode. The old sheet is reduced to an
+index of ID -> (row number, row digest); the new sheet is then streamed and
+hash-joined against it. Only changed and removed rows are revisited in a
+final pass over the old sheet, so memory is bounded by the key index plus the
+reported rows, not by workbook size.
+"""
+
+import hashlib
+from typing import Optional
+
+import openpyxl
+
+from jobs.cancellation import checkpoint
+
+# Rows scanned for a header (first row with >=3 non-empty cells, as import_excel)
+HEADER_SCAN_ROWS = 50
+
+
+def _norm(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def _find_header(ws) -> tuple[list[str], int]:
+    """Return (header values, header row number)."""
+    start = ws.min_row or 1
+    first = None
+    rows = ws.iter_rows(values_only=True, min_row=start, max_row=start + HEADER_SCAN_ROWS - 1)
+    for offset, row in enumerate(rows):
+        values = [_norm(v) for v in row]
+        if first is None:
+            first = values
+        if sum(1 for v in values if v) >= 3:
+            return values, start + offset
+    return first or [], start
+
+
+def _id_column(header: list[str], preferred: Optional[str]) -> int:
+    """Index of the key column: preferred header, else first header containing 'ID', else 0."""
+    if preferred and preferred in header:
+        return header.index(preferred)
+    for i, h in enumerate(header):
+        if "ID" in h.upper():
+            return i
+    return 0
+
+
+def _column_names(header: list[str]) -> list[str]:
+    """Unique cell keys: blank headers become ColumnN, repeats get " [2]", " [3]", ...
+
+    Sheets often repeat a header (several 備考 columns); suffixing keeps each
+    column's value, as version_store.split_sections does for repeated headings.
+    """
+    names, seen = [], {}
+    for i, h in enumerate(header):
+        name = h or f"Column{i + 1}"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} [{seen[name]}]")
+    return names
+
+
+def _iter_keyed_rows(ws, header: list[str], header_row: int, id_col: int):
+    """Yield (row number, key, {column name: value}) for non-empty data rows."""
+    width = len(header)
+    columns = _column_names(header)
+    for offset, row in enumerate(ws.iter_rows(values_only=True, min_row=header_row + 1)):
+        checkpoint()
+        values = [_norm(v) for v in row[:width]]
+        if not any(values):
+            continue
+        key = values[id_col] if id_col < len(values) else ""
+        cells = dict(zip(columns, values))
+        yield header_row + 1 + offset, key, cells
+
+
+def _digest(cells: dict[str, str]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for name in sorted(cells):
+        if cells[name]:
+            h.update(name.encode("utf-8"))
+            h.update(b"\x1f")
+            h.update(cells[name].encode("utf-8"))
+            h.update(b"\x1e")
+    return h.digest()
+
+
+def _cell_changes(old: dict[str, str], new: dict[str, str]) -> list[dict]:
+    changes = []
+    for column in list(new) + [c for c in old if c not in new]:
+        before, after = old.get(column, ""), new.get(column, "")
+        if before != after:
+            changes.append({"column": column, "old": before, "new": after})
+    return changes
+
+
+def diff_sheet(old_ws, new_ws, id_column: Optional[str] = None) -> dict:
+    """Hash-join two versions of one sheet on its ID column."""
+    old_header, old_header_row = _find_header(old_ws)
+    new_header, new_header_row = _find_header(new_ws)
+    old_id = _id_column(old_header, id_column)
+    new_id = _id_column(new_header, id_column or (old_header[old_id] if old_header else None))
+    warnings = []
+
+    # Pass 1: key index of the old sheet
+    index: dict[str, tuple[int, bytes]] = {}
+    duplicates = unkeyed = 0
+    for row_no, key, cells in _iter_keyed_rows(old_ws, old_header, old_header_row, old_id):
+        if not key:
+            unkeyed += 1
+        elif key in index:
+            duplicates += 1
+        else:
+            index[key] = (row_no, _digest(cells))
+
+    # Pass 2: stream the new sheet against the index
+    added, changed_new, seen = [], {}, set()
+    unchanged = 0
+    for row_no, key, cells in _iter_keyed_rows(new_ws, new_header, new_header_row, new_id):
+        if not key:
+            unkeyed += 1
+            continue
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        old = index.get(key)
+        if old is None:
+            added.append({"id": key, "row": row_no, "values": cells})
+        elif old[1] != _digest(cells):
+            changed_new[key] = (row_no, cells)
+        else:
+            unchanged += 1
+    removed_keys = index.keys() - seen
+
+    # Pass 3: fetch old values only for changed and removed rows
+    changed, removed = [], []
+    if changed_new or removed_keys:
+        for row_no, key, cells in _iter_keyed_rows(old_ws, old_header, old_header_row, old_id):
+            if index.get(key, (None,))[0] != row_no:
+                continue  # duplicate or unkeyed row
+            if key in changed_new:
+                new_row, new_cells = changed_new[key]
+                changed.append({
+                    "id": key,
+                    "old_row": row_no,
+                    "new_row": new_row,
+                    "cells": _cell_changes(cells, new_cells),
+                })
+            elif key in removed_keys:
+                removed.append({"id": key, "row": row_no, "values": cells})
+        changed.sort(key=lambda c: c["new_row"])
+
+    if duplicates:
+        warnings.append(f"{duplicates} row(s) with duplicate IDs ignored")
+    if unkeyed:
+        warnings.append(f"{unkeyed} row(s) without an ID ignored")
+
+    return {
+        "sheet": new_ws.title,
+        "id_column": new_header[new_id] if new_header else "",
+        "added": added,
+        "removed": removed,
+        "changed": changed,
+        "unchanged_count": unchanged,
+        "warnings": warnings,
+    }
+
+
+def diff_excel(
+    old_path: str,
+    new_path: str,
+    id_column: Optional[str] = None,
+    sheet_name: Optional[str] = None,
+) -> dict:
+    """Compare two versions of an Excel deliverable row by row, keyed by ID.
+
+    Args:
+        old_path: Path to the previous .xlsx
+        new_path: Path to the revised .xlsx
+        id_column: Header of the key column (auto-detected when omitted)
+        sheet_name: Only compare this sheet
+
+    Returns:
+        dict with: sheets (per-sheet added/removed/changed rows), added_sheets,
+        removed_sheets, summary
+    """
+    old_wb = openpyxl.load_workbook(old_path, read_only=True, data_only=True)
+    new_wb = openpyxl.load_workbook(new_path, read_only=True, data_only=True)
+    try:
+        names = [sheet_name] if sheet_name else new_wb.sheetnames
+        sheets = []
+        for name in names:
+            if name in old_wb.sheetnames and name in new_wb.sheetnames:
+                sheets.append(diff_sheet(old_wb[name], new_wb[name], id_column))
+        added_sheets = [n for n in names if n not in old_wb.sheetnames]
+        removed_sheets = [] if sheet_name else [n for n in old_wb.sheetnames if n not in new_wb.sheetnames]
+    finally:
+        old_wb.close()
+        new_wb.close()
+
+    return {
+        "sheets": sheets,
+        "added_sheets": added_sheets,
+        "removed_sheets": removed_sheets,
+        "summary": {
+            "added_rows": sum(len(s["added"]) for s in sheets),
+            "removed_rows": sum(len(s["removed"]) for s in sheets),
+            "changed_rows": sum(len(s["changed"]) for s in sheets),
+            "changed_cells": sum(len(c["cells"]) for s in sheets for c in s["changed"]),
+        },
+    }
@@ -1,11 +1,16 @@
 """Import Excel documents into Sekkei markdown format."""
 
+import io
 import re
+from bisect import bisect_right
 from typing import Optional
 
 # openpyxl is already in requirements.txt
 import openpyxl
 
+from jobs.cancellation import checkpoint
+from table_store.columnar import ColumnarTable, StringPool
+
 
 # Column patterns for auto-detecting document type
 DOC_TYPE_PATTERNS = {
@@ -32,11 +37,59 @@ def detect_doc_type(headers: list[str]) -> Optional[str]:
     return best_match if best_score > 0 else None
 
 
-def cell_value(cell) -> str:
+class MergedValueIndex:
+    """Per-sheet range index of vertically merged values, built once from ws.merged_cells.
+
+    Vertically merged 大分類/中分類 cells hold their value only in the top cell.
+    Each range spanning several rows is stored once, under its first column,
+    as (first row, last row, value), and a lookup bisects that column's ranges
+    instead of scanning every merged range. Horizontal spans are left as
+    openpyxl reads them, so a merged title row does not fan out into repeats.
+    Ranges starting above min_row (title and header rows) are skipped.
+    """
+
+    def __init__(self, ws, min_row: int = 1):
+        by_column: dict[int, list[tuple[int, int, object]]] = {}
+        for merged in ws.merged_cells.ranges:
+            if merged.max_row == merged.min_row or merged.min_row < min_row:
+                continue
+            value = ws.cell(row=merged.min_row, column=merged.min_col).value
+            if value is not None:
+                by_column.setdefault(merged.min_col, []).append((merged.min_row, merged.max_row, value))
+        self._ranges = {col: sorted(ranges) for col, ranges in by_column.items()}
+        self._starts = {col: [r[0] for r in ranges] for col, ranges in self._ranges.items()}
+
+    def __len__(self) -> int:
+        return sum(len(ranges) for ranges in self._ranges.values())
+
+    def get(self, row: int, column: int):
+        starts = self._starts.get(column)
+        if not starts:
+            return None
+        i = bisect_right(starts, row) - 1
+        if i < 0:
+            return None
+        _, last, value = self._ranges[column][i]
+        return value if row <= last else None
+
+
+def cell_value(cell, merged: Optional[MergedValueIndex] = None) -> str:
     """Extract string value from cell, handling None and merged cells."""
-    if cell.value is None:
+    value = cell.value
+    if value is None and merged:
+        value = merged.get(cell.row, cell.column)
+    if value is None:
         return ""
-    return str(cell.value).strip()
+    return str(value).strip()
+
+
+def write_markdown_table(out: io.StringIO, title: str, table: ColumnarTable) -> None:
+    """Append one sheet as a '## title' section with a markdown table."""
+    out.write(f"## {title}\n\n")
+    out.write("| " + " | ".join(h or "Column" for h in table.header) + " |\n")
+    out.write("| " + " | ".join("---" for _ in table.header) + " |")
+    for row in table.rows:
+        out.write("\n| " + " | ".join(row) + " |")
 
 
 def import_excel(
@@ -56,48 +109,49 @@ def import_excel(
     """
     wb = openpyxl.load_workbook(file_path, data_only=True)
     warnings = []
-    all_content = []
+    body = io.StringIO()
+    pool = StringPool()  # shared across sheets: enum-like cells repeat everywhere
     total_rows = 0
 
     sheets = [wb[sheet_name]] if sheet_name and sheet_name in wb.sheetnames else wb.worksheets
     detected_doc_type = doc_type_hint
 
     for ws in sheets:
-        rows = list(ws.iter_rows())
-        if not rows:
-            continue
-
-        # Find header row (first row with >3 non-empty cells)
-        header_row_idx = 0
-        for i, row in enumerate(rows):
+        # Find header row (first row with >3 non-empty cells, else the first row).
+        # Raw values: a merged title row must not count once per covered cell.
+        rows = ws.iter_rows()
+        header_row = None
+        for row in rows:
             non_empty = sum(1 for c in row if c.value is not None)
             if non_empty >= 3:
-                header_row_idx = i
+                header_row = row
                 break
+        if header_row is None:
+            rows = ws.iter_rows()
+            header_row = next(rows, None)
+            if header_row is None:
+                continue
 
-        headers = [cell_value(c) for c in rows[header_row_idx]]
+        headers = [cell_value(c) for c in header_row]
+        merged = MergedValueIndex(ws, min_row=header_row[0].row + 1)
 
         # Auto-detect doc type from first sheet headers
         if not detected_doc_type:
             detected_doc_type = detect_doc_type(headers)
 
-        # Build markdown table
-        section_title = ws.title or "Sheet"
-        md_lines = [f"## {section_title}", ""]
-
-        # Header row
-        md_lines.append("| " + " | ".join(h or "Column" for h in headers) + " |")
-        md_lines.append("| " + " | ".join("---" for _ in headers) + " |")
-
         # Data rows
-        data_rows = rows[header_row_idx + 1:]
-        for row in data_rows:
-            values = [cell_value(c) for c in row[: len(headers)]]
+        table = ColumnarTable(headers, pool)
+        for row in rows:
+            checkpoint()
+            values = [cell_value(c, merged) for c in row[: len(headers)]]
             if any(v for v in values):  # skip completely empty rows
-                md_lines.append("| " + " | ".join(values) + " |")
+                table.append_row(values)
                 total_rows += 1
 
-        all_content.append("\n".join(md_lines))
+        # Build markdown table
+        if body.tell():
+            body.write("\n\n")
+        write_markdown_table(body, ws.title or "Sheet", table)
 
     if not detected_doc_type:
         warnings.append("Could not auto-detect doc type from column patterns")
@@ -112,7 +166,7 @@ def import_excel(
         "---",
     ]
 
-    content = "\n".join(frontmatter) + "\n\n" + "\n\n".join(all_content)
+    content = "\n".join(frontmatter) + "\n\n" + body.getvalue()
 
     wb.close()
 
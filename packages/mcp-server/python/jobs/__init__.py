@@ -0,0 +1 @@
+"""Job scheduling and cooperative cancellation for long-running Sekkei workers."""
@@ -0,0 +1,64 @@
+"""Cooperative cancellation: tokens checked at checkpoints inside exporter/importer loops."""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+
+class JobCancelled(Exception):
+    """Raised at a checkpoint when the current job has been cancelled."""
+
+
+class DeadlineExceeded(JobCancelled):
+    """Raised at a checkpoint when the current job ran past its deadline."""
+
+
+class CancelToken:
+    """Thread-safe cancel flag with an optional monotonic deadline."""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self._event = threading.Event()
+        self.reason = ""
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() > self.deadline
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            if self.reason == "deadline":
+                raise DeadlineExceeded("Job deadline exceeded")
+            raise JobCancelled(f"Job {self.reason}")
+        if self.expired():
+            self.cancel("deadline")
+            raise DeadlineExceeded("Job deadline exceeded")
+
+
+_current_token: ContextVar[Optional[CancelToken]] = ContextVar("sekkei_cancel_token", default=None)
+
+
+@contextmanager
+def use_token(token: CancelToken):
+    """Make token the current job's token for checkpoint() calls in this context."""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def checkpoint() -> None:
+    """Cancellation point for row/line loops. No-op outside a scheduled job."""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
@@ -0,0 +1,262 @@
+"""Resource governance for long-running workers: rlimits, RSS tracking, recycling.
+
+WeasyPrint and openpyxl keep large caches and fragment the heap, so a serve
+process that runs jobs in threads only ever grows. GovernedWorker runs jobs
+in a child process instead: the child caps its address space (RLIMIT_AS) and
+per-job CPU time (RLIMIT_CPU), reports its RSS after every job, and the
+parent replaces it after max_jobs jobs, above max_rss_mb, after any limit
+error, or when it dies. A job that hits a limit gets a per-job error code
+(memory_limit, cpu_limit, worker_crashed) instead of taking the host down.
+
+Workers are not daemonic, so jobs that fan out to their own process pools
+(diff-batch, parallel export-excel, import-directory) can still do so. Each
+worker leads its own process group: kill() takes those pool processes down
+with it, and a multiprocessing finalizer stops the worker on recycle, close
+and interpreter exit.
+
+resource is POSIX-only; elsewhere limits are skipped and only recycling applies.
+"""
+
+import gc
+import os
+import signal
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LIMIT_CODES = {"memory_limit", "cpu_limit", "worker_crashed"}
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    memory_mb: Optional[int] = None  # RLIMIT_AS of each worker process
+    cpu_seconds: Optional[int] = None  # RLIMIT_CPU budget per job
+    max_jobs: int = 100  # recycle a worker after this many jobs
+    max_rss_mb: Optional[int] = 1024  # recycle when RSS after a job exceeds this
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        """Limits from SEKKEI_WORKER_{MEMORY_MB,CPU_SECONDS,MAX_JOBS,MAX_RSS_MB}."""
+        def env_int(name: str, default):
+            raw = os.environ.get(f"SEKKEI_WORKER_{name}")
+            return int(raw) if raw else default
+
+        return cls(
+            memory_mb=env_int("MEMORY_MB", cls.memory_mb),
+            cpu_seconds=env_int("CPU_SECONDS", cls.cpu_seconds),
+            max_jobs=env_int("MAX_JOBS", cls.max_jobs),
+            max_rss_mb=env_int("MAX_RSS_MB", cls.max_rss_mb),
+        )
+
+
+class CpuLimitExceeded(Exception):
+    """Raised in a worker when the per-job RLIMIT_CPU soft limit is reached."""
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1 << 20) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def apply_memory_limit(memory_mb: Optional[int]) -> None:
+    """Cap this process's address space so allocations fail with MemoryError."""
+    if resource is None or not memory_mb:
+        return
+    limit = memory_mb << 20
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def apply_cpu_limit(cpu_seconds: Optional[int]) -> None:
+    """Allow cpu_seconds more CPU time from now; SIGXCPU raises CpuLimitExceeded."""
+    if resource is None or not hasattr(resource, "RLIMIT_CPU"):
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if not cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _on_sigxcpu(signum, frame):
+    raise CpuLimitExceeded("Job exceeded its CPU time limit")
+
+
+def install_cpu_limit_handler() -> None:
+    """Turn SIGXCPU (RLIMIT_CPU soft limit reached) into CpuLimitExceeded, not a kill."""
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_sigxcpu)
+
+
+def run_limited(run: Callable[[str, dict], dict], action: str, input_data: dict, limits: ResourceLimits) -> dict:
+    """Run one job under the per-job CPU limit; return a scheduler payload."""
+    apply_cpu_limit(limits.cpu_seconds)
+    try:
+        return {"result": run(action, input_data)}
+    except MemoryError:
+        return {"error": f"Job exceeded the worker memory limit ({limits.memory_mb} MB)", "code": "memory_limit"}
+    except CpuLimitExceeded as e:
+        return {"error": f"{e} ({limits.cpu_seconds} s)", "code": "cpu_limit"}
+    except Exception as e:
+        return {"error": str(e), "code": "failed"}
+    finally:
+        apply_cpu_limit(None)
+
+
+def _child_main(conn, run: Callable[[str, dict], dict], limits: ResourceLimits) -> None:
+    """Worker process loop: (action, input) in, payload + rss_mb out, None to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent decides when we stop
+    if hasattr(os, "setpgid"):
+        os.setpgid(0, 0)  # so kill() also reaches this job's own pool processes
+    install_cpu_limit_handler()
+    apply_memory_limit(limits.memory_mb)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        action, input_data = message
+        payload = run_limited(run, action, input_data, limits)
+        gc.collect()
+        payload["rss_mb"] = round(current_rss_mb(), 1)
+        conn.send(payload)
+
+
+def _stop_process(process, conn, graceful: bool = True) -> None:
+    """Ask a worker to exit (or kill it), then reap it and close its pipe."""
+    if graceful and process.is_alive():
+        try:
+            conn.send(None)
+        except OSError:
+            pass
+        process.join(timeout=5)
+    if process.is_alive():
+        _kill_group(process)
+        process.join()
+    conn.close()
+
+
+def _kill_group(process) -> None:
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass  # not yet its own group leader
+    process.kill()
+
+
+class GovernedWorker:
+    """One recyclable worker process; call() blocks, so run it from a thread."""
+
+    def __init__(self, run: Callable[[str, dict], dict], limits: ResourceLimits, name: str = "sekkei-worker"):
+        self._run = run
+        self._limits = limits
+        self._name = name
+        import multiprocessing
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self._finalizer = None
+        self._killed = False
+        self.jobs_run = 0
+        self.recycles = 0
+        self.last_rss_mb = 0.0
+
+    def _spawn(self) -> None:
+        from multiprocessing import util
+
+        parent, child = self._ctx.Pipe()
+        # Not daemonic: jobs may start process pools of their own
+        self._process = self._ctx.Process(
+            target=_child_main, args=(child, self._run, self._limits), name=self._name, daemon=False
+        )
+        self._process.start()
+        child.close()
+        self._conn = parent
+        # Runs before multiprocessing joins non-daemonic children at exit
+        self._finalizer = util.Finalize(
+            self, _stop_process, args=(self._process, parent), exitpriority=10
+        )
+        self.jobs_run = 0
+        self._killed = False
+
+    def call(self, action: str, input_data: dict) -> dict:
+        """Run one job in the worker process, respawning or recycling it as needed."""
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self._spawn()
+            conn, process = self._conn, self._process
+        try:
+            conn.send((action, input_data))
+            payload = conn.recv()
+        except (EOFError, OSError):
+            process.join(timeout=1)
+            killed = self._killed
+            self._discard()
+            if killed:
+                return {"error": "Worker stopped", "code": "cancelled"}
+            return {
+                "error": f"Worker process exited unexpectedly (exit code {process.exitcode})",
+                "code": "worker_crashed",
+            }
+
+        self.jobs_run += 1
+        self.last_rss_mb = payload.pop("rss_mb", 0.0)
+        limits = self._limits
+        if (
+            payload.get("code") in LIMIT_CODES
+            or self.jobs_run >= limits.max_jobs
+            or (limits.max_rss_mb and self.last_rss_mb > limits.max_rss_mb)
+        ):
+            self.recycle()
+        return payload
+
+    def kill(self) -> None:
+        """Hard-stop the current job (cancellation/deadline); the next call respawns."""
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                self._killed = True
+                _kill_group(self._process)
+
+    def recycle(self) -> None:
+        """Stop the worker after its current job; a fresh one starts on the next call."""
+        self.recycles += 1
+        self._discard(graceful=True)
+
+    def _discard(self, graceful: bool = False) -> None:
+        with self._lock:
+            process, conn, finalizer = self._process, self._conn, self._finalizer
+            self._process = self._conn = self._finalizer = None
+        if process is None:
+            return
+        finalizer.cancel()
+        _stop_process(process, conn, graceful)
+
+    def close(self) -> None:
+        self._discard(graceful=True)
@@ -0,0 +1,210 @@
+"""asyncio job scheduler: priority lanes, bounded queues, deadlines and cancellation.
+
+Each lane (interactive diff/import vs. bulk export) has its own bounded queue,
+worker tasks and thread pool, so a long PDF export occupies only the bulk lane
+while quick diff calls keep flowing through the interactive lane. Admission
+never waits: a job for a full lane is rejected with code "busy", so the
+single request reader is never stuck behind one lane's backlog. Jobs run in
+threads, where cancellation and deadlines are cooperative via jobs.cancellation,
+or, when ResourceLimits are given, in one governed worker process per lane slot
+(jobs.governor), where cancellation and deadlines kill the process.
+"""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from .cancellation import CancelToken, DeadlineExceeded, JobCancelled, use_token
+from .governor import GovernedWorker, ResourceLimits
+
+
+@dataclass(frozen=True)
+class LaneConfig:
+    workers: int
+    queue_size: int
+    default_timeout: float  # seconds, counted from admission
+
+
+DEFAULT_LANES = {
+    "interactive": LaneConfig(workers=2, queue_size=32, default_timeout=60.0),
+    "bulk": LaneConfig(workers=1, queue_size=8, default_timeout=300.0),
+}
+
+INTERACTIVE_ACTIONS = {"diff", "import-excel", "stats"}
+
+
+def lane_for(action: str) -> str:
+    """Default priority lane for an action."""
+    return "interactive" if action in INTERACTIVE_ACTIONS else "bulk"
+
+
+@dataclass
+class Job:
+    id: str
+    action: str
+    input: dict
+    lane: str
+    token: CancelToken
+    cancel_requested: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class JobScheduler:
+    """Run jobs through per-lane bounded queues.
+
+    run(action, input_data) -> dict executes a job synchronously in a worker
+    thread (or, with limits, in a governed worker process, so run must then be
+    picklable); on_done(job_id, payload) receives either {"result": ...} or
+    {"error": ..., "code": ...} on the event loop thread.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str, dict], dict],
+        on_done: Callable[[str, dict], Any],
+        lanes: Optional[dict[str, LaneConfig]] = None,
+        limits: Optional[ResourceLimits] = None,
+    ):
+        self._run = run
+        self._on_done = on_done
+        self._lanes = lanes or DEFAULT_LANES
+        self._limits = limits
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._processes: dict[str, list[GovernedWorker]] = {}
+        self._workers: list[asyncio.Task] = []
+        self._jobs: dict[str, Job] = {}
+
+    async def start(self) -> None:
+        for name, lane in self._lanes.items():
+            self._queues[name] = asyncio.Queue(maxsize=lane.queue_size)
+            self._executors[name] = ThreadPoolExecutor(
+                max_workers=lane.workers, thread_name_prefix=f"sekkei-{name}"
+            )
+            if self._limits is not None:
+                self._processes[name] = [
+                    GovernedWorker(self._run, self._limits, name=f"sekkei-{name}-{slot}")
+                    for slot in range(lane.workers)
+                ]
+            for slot in range(lane.workers):
+                self._workers.append(asyncio.create_task(self._worker(name, slot)))
+
+    def submit(
+        self,
+        job_id: str,
+        action: str,
+        input_data: dict,
+        priority: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """Admit a job, or reject it with code busy when its lane's queue is full."""
+        lane = priority or lane_for(action)
+        if lane not in self._queues:
+            self._on_done(job_id, {"error": f"Unknown priority lane: {lane}", "code": "invalid"})
+            return False
+        if job_id in self._jobs:
+            self._on_done(job_id, {"error": f"Duplicate job id: {job_id}", "code": "invalid"})
+            return False
+
+        if timeout is None:
+            timeout = self._lanes[lane].default_timeout
+        job = Job(job_id, action, input_data, lane, CancelToken(time.monotonic() + timeout))
+        try:
+            self._queues[lane].put_nowait(job)
+        except asyncio.QueueFull:
+            self._on_done(job_id, {"error": f"The {lane} lane is full; retry later", "code": "busy"})
+            return False
+        self._jobs[job_id] = job
+        return True
+
+    def cancel(self, job_id: str) -> bool:
+        """Request cancellation; queued jobs are dropped, running ones stop at a checkpoint."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        job.token.cancel()
+        job.cancel_requested.set()
+        return True
+
+    async def close(self) -> None:
+        """Stop admitting work, let queued jobs drain, then shut down workers."""
+        for queue in self._queues.values():
+            await queue.join()
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        for processes in self._processes.values():
+            for process in processes:
+                process.close()
+
+    async def _worker(self, lane: str, slot: int) -> None:
+        queue = self._queues[lane]
+        while True:
+            job = await queue.get()
+            try:
+                await self._execute(job, slot)
+            finally:
+                self._jobs.pop(job.id, None)
+                queue.task_done()
+
+    async def _execute(self, job: Job, slot: int) -> None:
+        if job.token.cancelled:
+            self._on_done(job.id, {"error": "Job cancelled before start", "code": "cancelled"})
+            return
+        if job.token.expired():
+            self._on_done(job.id, {"error": "Job deadline exceeded in queue", "code": "deadline_exceeded"})
+            return
+
+        loop = asyncio.get_running_loop()
+        process = self._processes[job.lane][slot] if self._processes else None
+        if process is not None:
+            future = loop.run_in_executor(
+                self._executors[job.lane], process.call, job.action, job.input
+            )
+        else:
+            ctx = contextvars.copy_context()
+            future = loop.run_in_executor(
+                self._executors[job.lane], ctx.run, self._run_with_token, job
+            )
+        cancel_wait = asyncio.create_task(job.cancel_requested.wait())
+        remaining = max(job.token.deadline - time.monotonic(), 0)
+        done, _ = await asyncio.wait(
+            {future, cancel_wait}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+        )
+        cancel_wait.cancel()
+
+        if future in done:
+            self._on_done(job.id, future.result() if process is not None else _payload(future))
+            return
+
+        # Cancelled or past deadline while running: answer now, then wait for the
+        # thread to reach its next checkpoint (or the worker process to die) so the
+        # lane's concurrency stays bounded.
+        if job.cancel_requested.is_set():
+            self._on_done(job.id, {"error": "Job cancelled", "code": "cancelled"})
+        else:
+            job.token.cancel("deadline")
+            self._on_done(job.id, {"error": "Job deadline exceeded", "code": "deadline_exceeded"})
+        if process is not None:
+            process.kill()
+        await asyncio.wait({future})
+        future.exception()  # mark retrieved
+
+    def _run_with_token(self, job: Job) -> dict:
+        with use_token(job.token):
+            return self._run(job.action, job.input)
+
+
+def _payload(future: asyncio.Future) -> dict:
+    exc = future.exception()
+    if exc is None:
+        return {"result": future.result()}
+    if isinstance(exc, DeadlineExceeded):
+        return {"error": str(exc), "code": "deadline_exceeded"}
+    if isinstance(exc, JobCancelled):
+        return {"error": str(exc), "code": "cancelled"}
+    return {"error": str(exc), "code": "failed"}
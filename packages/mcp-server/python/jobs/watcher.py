@@ -0,0 +1,251 @@
+"""Watch a docs directory and re-run only the work an edit affects.
+
+Editors save in bursts (write, rename, touch), and re-running every export
+and diff through a fresh cli.py process on each save costs seconds of import
+and parse time. The watcher is one long-running process that polls the
+directory stat (size, mtime), waits until it has been quiet for debounce_ms,
+then hashes only the files whose stat moved. A file counts as changed only
+when its content hash differs, so touches and rewrites of identical content
+cost nothing.
+
+For each real change it re-runs the export rules whose source changed and
+the impact rules whose upstream changed. Exports run in-process, where the
+exporters are already imported and incremental modes keep their caches warm.
+Impact analysis diffs the previous upstream text against the new one and
+looks the changed IDs up in a downstream ID index. The parsed sections are
+kept in a batch_diff.SectionCache, and the index is rebuilt only when a
+downstream document changes.
+
+Config (the action input):
+    {"dir_path": "docs", "pattern": "*.md", "debounce_ms": 150, "poll_ms": 50,
+     "exports": [{"source": "functions-list.md", "action": "export-excel",
+                  "output_path": "out/functions-list.xlsx", "doc_type": "functions-list",
+                  ...other action input}],
+     "impacts": [{"upstream": "requirements.md", "downstream": ["functions-list.md"],
+                  "output_path": "out/impacts.json"}],
+     "run_initial": false}
+
+Events are emitted as dicts tagged by "event": ready, changes, export,
+impacts, error, settled (with latency from first save to last output) and
+stopped.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from nlp.batch_diff import SectionCache, _lookup_impacts, build_id_index, diff_pair
+
+DEFAULT_DEBOUNCE_MS = 150
+DEFAULT_POLL_MS = 50
+EXPORT_ACTIONS = {"export-excel", "export-pdf", "export-docx", "export-matrix"}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class DocsWatcher:
+    """Polls one directory; process_pending() runs the rules for settled changes."""
+
+    def __init__(
+        self,
+        config: dict,
+        run: Callable[[str, dict], dict],
+        emit: Callable[[dict], None],
+    ):
+        self.root = Path(config["dir_path"]).resolve()
+        if not self.root.is_dir():
+            raise ValueError(f"Not a directory: {config['dir_path']}")
+        self.pattern = config.get("pattern", "*.md")
+        self.debounce = config.get("debounce_ms", DEFAULT_DEBOUNCE_MS) / 1000
+        self.poll = config.get("poll_ms", DEFAULT_POLL_MS) / 1000
+        self.exports = config.get("exports", [])
+        self.impacts = config.get("impacts", [])
+        for rule in self.exports:
+            if rule.get("action") not in EXPORT_ACTIONS:
+                raise ValueError(f"Unsupported export action: {rule.get('action')}")
+        self._run = run
+        self._emit = emit
+
+        self._stats: dict[str, tuple[int, int]] = {}
+        self._digests: dict[str, str] = {}
+        self._contents: dict[str, str] = {}
+        self._sections = SectionCache()
+        self._index_key: Optional[tuple] = None
+        self._index: dict = {}
+        self._pending: set[str] = set()
+        self._first_seen = 0.0
+        self._last_seen = 0.0
+
+    # -- directory state -------------------------------------------------
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        stats = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                if not fnmatch.fnmatch(name, self.pattern):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue  # removed between listing and stat
+                stats[os.path.relpath(path, self.root).replace(os.sep, "/")] = (st.st_size, st.st_mtime_ns)
+        return stats
+
+    def _read(self, rel: str) -> Optional[bytes]:
+        try:
+            return (self.root / rel).read_bytes()
+        except OSError:
+            return None
+
+    def _load(self, rel: str, data: bytes) -> None:
+        self._digests[rel] = _digest(data)
+        self._contents[rel] = data.decode("utf-8", errors="replace")
+
+    def start(self) -> None:
+        """Baseline every watched file (hash and content) without running any rule."""
+        self._stats = self._scan()
+        for rel in self._stats:
+            data = self._read(rel)
+            if data is not None:
+                self._load(rel, data)
+        self._emit({"event": "ready", "dir_path": str(self.root), "files": len(self._digests)})
+
+    def poll_once(self) -> bool:
+        """Record stat changes; return True when a settled batch is ready."""
+        now = time.monotonic()
+        stats = self._scan()
+        moved = {rel for rel, st in stats.items() if self._stats.get(rel) != st}
+        moved |= self._stats.keys() - stats.keys()
+        self._stats = stats
+        if moved:
+            if not self._pending:
+                self._first_seen = now
+            self._pending |= moved
+            self._last_seen = now
+        return bool(self._pending) and now - self._last_seen >= self.debounce
+
+    # -- rules -----------------------------------------------------------
+
+    def process_pending(self) -> None:
+        """Hash the settled paths and re-run the rules their real changes affect."""
+        pending, self._pending = self._pending, set()
+        changed, removed = [], []
+        previous: dict[str, str] = {}
+        for rel in sorted(pending):
+            data = self._read(rel) if rel in self._stats else None
+            if data is None:
+                if rel in self._digests:
+                    removed.append(rel)
+                    del self._digests[rel]
+                    del self._contents[rel]
+                continue
+            if _digest(data) == self._digests.get(rel):
+                continue  # touched or rewritten with identical content
+            if rel in self._contents:
+                previous[rel] = self._contents[rel]
+            self._load(rel, data)
+            changed.append(rel)
+
+        if not changed and not removed:
+            return
+        self._emit({"event": "changes", "changed": changed, "removed": removed})
+
+        changed_set = set(changed)
+        for rule in self.exports:
+            if rule["source"] in changed_set:
+                self._run_export(rule)
+        for rule in self.impacts:
+            upstream = rule["upstream"]
+            if upstream in changed_set and upstream in previous:
+                self._run_impacts(rule, previous[upstream])
+
+        # Drop parses of superseded versions so a long session stays bounded
+        self._sections = self._sections.retain(self._contents.values())
+        self._emit({
+            "event": "settled",
+            "latency_ms": round((time.monotonic() - self._first_seen) * 1000, 1),
+        })
+
+    def run_all(self) -> None:
+        for rule in self.exports:
+            if rule["source"] in self._contents:
+                self._run_export(rule)
+
+    def _run_export(self, rule: dict) -> None:
+        input_data = {k: v for k, v in rule.items() if k not in ("source", "action")}
+        input_data["content"] = self._contents[rule["source"]]
+        input_data.setdefault("doc_type", Path(rule["source"]).stem)
+        start = time.perf_counter()
+        try:
+            result = self._run(rule["action"], input_data)
+        except Exception as e:
+            self._emit({"event": "error", "source": rule["source"], "action": rule["action"], "error": str(e)})
+            return
+        self._emit({
+            "event": "export",
+            "source": rule["source"],
+            "action": rule["action"],
+            "seconds": round(time.perf_counter() - start, 3),
+            "result": result,
+        })
+
+    def _downstream_index(self, names: list[str]) -> dict:
+        key = tuple((name, self._digests.get(name)) for name in names)
+        if key != self._index_key:
+            downstream = {name: self._contents[name] for name in names if name in self._contents}
+            self._index = build_id_index(downstream, self._sections)
+            self._index_key = key
+        return self._index
+
+    def _run_impacts(self, rule: dict, old_content: str) -> None:
+        upstream = rule["upstream"]
+        start = time.perf_counter()
+        diff, changed_ids = diff_pair(old_content, self._contents[upstream], self._sections)
+        hits = _lookup_impacts(changed_ids, self._downstream_index(rule.get("downstream", [])))
+        result = {
+            "diff": diff,
+            "changed_ids": changed_ids,
+            "impacts": [
+                {"document": doc, "section": section, "referenced_ids": sorted(ids)}
+                for (_, doc, section), ids in sorted(hits.items())
+            ],
+        }
+        result["total_impacted_sections"] = len(result["impacts"])
+        if rule.get("output_path"):
+            path = Path(rule["output_path"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, path)
+        self._emit({
+            "event": "impacts",
+            "upstream": upstream,
+            "seconds": round(time.perf_counter() - start, 3),
+            **({"output_path": rule["output_path"]} if rule.get("output_path") else result),
+        })
+
+    # -- loop ------------------------------------------------------------
+
+    def run_forever(self, stop: threading.Event, run_initial: bool = False) -> None:
+        self.start()
+        if run_initial:
+            self.run_all()
+        while not stop.wait(self.poll):
+            if self.poll_once():
+                self.process_pending()
+        self._emit({"event": "stopped"})
+
+
+def watch(config: dict, run: Callable[[str, dict], dict], emit: Callable[[dict], None], stop: Optional[threading.Event] = None) -> None:
+    """Run a DocsWatcher until stop is set (or forever)."""
+    watcher = DocsWatcher(config, run, emit)
+    watcher.run_forever(stop or threading.Event(), run_initial=config.get("run_initial", False))
@@ -0,0 +1,295 @@
+"""Cumulative per-action metrics for the Python processing layer.
+
+Every action run through cli.run_instrumented records a call count, error
+codes, latency, input size, output file size and cache hits/misses (from the
+result fields actions already report). One-shot CLI processes and serve
+workers all merge their deltas into one JSON state file under a file lock, so
+the counters are cumulative across processes. The `stats` action reads it
+back with bucket-estimated percentiles; when SEKKEI_METRICS_PROM is set, a
+Prometheus text-format file is rewritten at most every
+SEKKEI_METRICS_INTERVAL seconds. SEKKEI_METRICS=0 disables recording.
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from jobs.cancellation import DeadlineExceeded, JobCancelled
+
+STATE_FILE = "metrics.json"
+STATE_VERSION = 1
+DEFAULT_PROM_INTERVAL = 10.0
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))  # 1 KiB .. 256 MiB
+
+HISTOGRAMS = {
+    "latency_seconds": LATENCY_BUCKETS,
+    "input_chars": SIZE_BUCKETS,
+    "output_bytes": SIZE_BUCKETS,
+}
+
+# Result fields that report cache behaviour: hit field -> miss field. Actions
+# only include the hit field when a cache was consulted (use_cache/incremental),
+# so runs that bypass the cache are not counted as misses.
+CACHE_FIELDS = {
+    "cache_hits": "converted",  # import-directory
+    "reused_sheets": "regenerated_sheets",  # export-excel incremental
+    "reused_files": "scanned_files",  # validate-refs incremental
+}
+
+
+def enabled() -> bool:
+    return os.environ.get("SEKKEI_METRICS") != "0"
+
+
+def input_size(value) -> int:
+    """Total characters of the string values in an action's input."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(input_size(v) for v in value.values())
+    if isinstance(value, list):
+        return sum(input_size(v) for v in value)
+    return 0
+
+
+def _new_histogram(name: str) -> dict:
+    return {"buckets": [0] * (len(HISTOGRAMS[name]) + 1), "sum": 0.0, "count": 0}
+
+
+def _new_action() -> dict:
+    return {
+        "calls": 0,
+        "errors": {},
+        "cache_hits": 0,
+        "cache_misses": 0,
+        **{name: _new_histogram(name) for name in HISTOGRAMS},
+    }
+
+
+def _observe(action_stats: dict, name: str, value: float) -> None:
+    hist = action_stats[name]
+    hist["buckets"][bisect.bisect_left(HISTOGRAMS[name], value)] += 1
+    hist["sum"] += value
+    hist["count"] += 1
+
+
+def _merge(into: dict, delta: dict) -> None:
+    for action, stats in delta.items():
+        target = into.setdefault(action, _new_action())
+        target["calls"] += stats["calls"]
+        target["cache_hits"] += stats["cache_hits"]
+        target["cache_misses"] += stats["cache_misses"]
+        for code, n in stats["errors"].items():
+            target["errors"][code] = target["errors"].get(code, 0) + n
+        for name in HISTOGRAMS:
+            t, d = target[name], stats[name]
+            t["buckets"] = [a + b for a, b in zip(t["buckets"], d["buckets"])]
+            t["sum"] += d["sum"]
+            t["count"] += d["count"]
+
+
+def record(action: str, seconds: float, input_data: dict, result: Optional[dict], error_code: Optional[str]) -> dict:
+    """One call's observations as a mergeable delta."""
+    stats = _new_action()
+    stats["calls"] = 1
+    _observe(stats, "latency_seconds", seconds)
+    _observe(stats, "input_chars", input_size(input_data))
+    if error_code is None and isinstance(result, dict) and "error" in result:
+        error_code = "error"
+    if error_code:
+        stats["errors"][error_code] = 1
+    if isinstance(result, dict):
+        if isinstance(result.get("file_size"), int):
+            _observe(stats, "output_bytes", result["file_size"])
+        for hit, miss in CACHE_FIELDS.items():
+            if isinstance(result.get(hit), int):
+                stats["cache_hits"] += result[hit]
+                stats["cache_misses"] += result.get(miss) or 0
+    return {action: stats}
+
+
+@contextmanager
+def _locked(path: str):
+    """Exclusive lock on a sidecar file (no-op where fcntl is unavailable)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _read_state(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") == STATE_VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": STATE_VERSION, "since": time.time(), "actions": {}}
+
+
+def _write_text(path: str, text: str) -> None:
+    """Atomic write through a unique temp file, safe for concurrent writers."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def state_path() -> str:
+    from cache_paths import cache_dir  # pathlib stays off the import path of cli
+
+    return str(cache_dir("metrics") / STATE_FILE)
+
+
+def flush(delta: dict) -> None:
+    """Merge a delta into the shared state file and refresh the Prometheus file if due."""
+    path = state_path()
+    with _locked(path):
+        state = _read_state(path)
+        _merge(state["actions"], delta)
+        _write_text(path, json.dumps(state))
+    prom_path = os.environ.get("SEKKEI_METRICS_PROM")
+    if prom_path:
+        interval = float(os.environ.get("SEKKEI_METRICS_INTERVAL", DEFAULT_PROM_INTERVAL))
+        try:
+            due = time.time() - os.path.getmtime(prom_path) >= interval
+        except OSError:
+            due = True
+        if due:
+            write_prometheus(prom_path, state)
+
+
+def instrument(action: str, input_data: dict, run: Callable[[str, dict], dict]) -> dict:
+    """Run an action and record its metrics; exceptions are recorded then re-raised."""
+    if not enabled() or action == "stats":
+        return run(action, input_data)
+    start = time.perf_counter()
+    result, error_code = None, None
+    try:
+        result = run(action, input_data)
+        return result
+    except MemoryError:
+        error_code = "memory_limit"
+        raise
+    except DeadlineExceeded:
+        error_code = "deadline_exceeded"
+        raise
+    except JobCancelled:
+        error_code = "cancelled"
+        raise
+    except Exception:
+        error_code = "failed"
+        raise
+    finally:
+        try:
+            flush(record(action, time.perf_counter() - start, input_data, result, error_code))
+        except OSError:
+            pass  # metrics must never fail the job
+
+
+def _quantile(buckets: list[int], bounds: tuple, q: float) -> Optional[float]:
+    """Estimate a quantile by linear interpolation inside the bucket that holds it."""
+    total = sum(buckets)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, n in enumerate(buckets):
+        if n and seen + n >= rank:
+            lower = bounds[i - 1] if i > 0 else 0.0
+            upper = bounds[i] if i < len(bounds) else bounds[-1]
+            return round(lower + (upper - lower) * (rank - seen) / n, 4)
+        seen += n
+    return bounds[-1]
+
+
+def stats(reset: bool = False) -> dict:
+    """Cumulative per-action metrics with p50/p90/p99 estimates."""
+    path = state_path()
+    with _locked(path):
+        state = _read_state(path)
+        if reset:
+            _write_text(path, json.dumps({"version": STATE_VERSION, "since": time.time(), "actions": {}}))
+
+    actions = {}
+    for action, s in sorted(state["actions"].items()):
+        summary = {
+            "calls": s["calls"],
+            "errors": sum(s["errors"].values()),
+            "error_codes": s["errors"],
+        }
+        lookups = s["cache_hits"] + s["cache_misses"]
+        if lookups:
+            summary["cache"] = {
+                "hits": s["cache_hits"],
+                "misses": s["cache_misses"],
+                "hit_rate": round(s["cache_hits"] / lookups, 4),
+            }
+        for name, bounds in HISTOGRAMS.items():
+            hist = s[name]
+            if not hist["count"]:
+                continue
+            summary[name] = {
+                "count": hist["count"],
+                "sum": round(hist["sum"], 4),
+                "mean": round(hist["sum"] / hist["count"], 4),
+                **{f"p{int(q * 100)}": _quantile(hist["buckets"], bounds, q) for q in (0.5, 0.9, 0.99)},
+            }
+        actions[action] = summary
+    return {"since": state["since"], "actions": actions}
+
+
+def write_prometheus(path: str, state: Optional[dict] = None) -> None:
+    """Write the cumulative state in Prometheus text exposition format."""
+    if state is None:
+        state = _read_state(state_path())
+    lines = [
+        "# HELP sekkei_action_calls_total Actions run by the Python layer.",
+        "# TYPE sekkei_action_calls_total counter",
+    ]
+    actions = sorted(state["actions"].items())
+    for action, s in actions:
+        lines.append(f'sekkei_action_calls_total{{action="{action}"}} {s["calls"]}')
+    lines += ["# HELP sekkei_action_errors_total Failed actions by error code.",
+              "# TYPE sekkei_action_errors_total counter"]
+    for action, s in actions:
+        for code, n in sorted(s["errors"].items()):
+            lines.append(f'sekkei_action_errors_total{{action="{action}",code="{code}"}} {n}')
+    lines += ["# HELP sekkei_cache_lookups_total Cache lookups reported by actions.",
+              "# TYPE sekkei_cache_lookups_total counter"]
+    for action, s in actions:
+        if s["cache_hits"] or s["cache_misses"]:
+            lines.append(f'sekkei_cache_lookups_total{{action="{action}",result="hit"}} {s["cache_hits"]}')
+            lines.append(f'sekkei_cache_lookups_total{{action="{action}",result="miss"}} {s["cache_misses"]}')
+    for name, bounds in HISTOGRAMS.items():
+        metric = f"sekkei_action_{name}"
+        lines += [f"# HELP {metric} Per-action {name.replace('_', ' ')}.", f"# TYPE {metric} histogram"]
+        for action, s in actions:
+            hist = s[name]
+            if not hist["count"]:
+                continue
+            cumulative = 0
+            for bound, n in zip(list(bounds) + ["+Inf"], hist["buckets"]):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{action="{action}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{action="{action}"}} {hist["sum"]}')
+            lines.append(f'{metric}_count{{action="{action}"}} {hist["count"]}')
+    _write_text(path, "\n".join(lines) + "\n")
@@ -0,0 +1,224 @@
+"""Batch diff: many upstream old/new pairs against a shared set of downstream documents."""
+
+import hashlib
+import os
+
+from jobs.cancellation import checkpoint
+
+from .diff_analyzer import (
+    build_changes_list,
+    build_line_level_diffs,
+    build_marked_document,
+    build_revision_history_row,
+    extract_ids,
+    extract_sections,
+)
+
+# Below this many pairs, process start-up costs more than it saves
+PARALLEL_MIN_PAIRS = 4
+
+
+class SectionCache:
+    """Parse each distinct document text once, keyed by content hash."""
+
+    def __init__(self):
+        self._sections: dict[str, dict[str, str]] = {}
+        self._ids: dict[str, set[str]] = {}
+
+    @staticmethod
+    def _key(content: str) -> str:
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def sections(self, content: str) -> dict[str, str]:
+        key = self._key(content)
+        if key not in self._sections:
+            self._sections[key] = extract_sections(content)
+        return self._sections[key]
+
+    def ids(self, content: str) -> set[str]:
+        key = self._key(content)
+        if key not in self._ids:
+            self._ids[key] = extract_ids(content)
+        return self._ids[key]
+
+    def preload(self, doc) -> None:
+        """Seed the cache from a table_store.shared_docs.ParsedDocument without re-parsing."""
+        key = self._key(doc.content)
+        self._sections[key] = doc.sections()
+        self._ids[key] = doc.ids()
+        for i in range(doc.section_count):
+            self._ids[self._key(doc.section_text(i))] = doc.section_ids(i)
+
+    def retain(self, contents) -> "SectionCache":
+        """A new cache holding only what these documents need (bounds long-running use)."""
+        kept = SectionCache()
+        for content in contents:
+            key = self._key(content)
+            kept._sections[key] = self.sections(content)
+            kept._ids[key] = self.ids(content)
+            for section in kept._sections[key].values():
+                section_key = self._key(section)
+                kept._ids[section_key] = self.ids(section)
+        return kept
+
+
+def build_id_index(downstream: dict[str, str], cache: SectionCache) -> dict[str, list[tuple]]:
+    """Map ID -> [(ordinal, document, section)] for every downstream section citing it."""
+    index: dict[str, list[tuple]] = {}
+    ordinal = 0
+    for doc_name, content in downstream.items():
+        for section_name, section_content in cache.sections(content).items():
+            checkpoint()
+            for cid in cache.ids(section_content):
+                index.setdefault(cid, []).append((ordinal, doc_name, section_name))
+            ordinal += 1
+    return index
+
+
+def diff_pair(old_content: str, new_content: str, cache: SectionCache) -> tuple[dict, list[str]]:
+    """Section diff plus changed IDs for one pair.
+
+    Sections and changed IDs follow diff_analyzer.diff_documents/_prepare (ID
+    lists sorted here). Impacts differ from analyze: they are looked up by whole
+    ID token in build_id_index, while find_downstream_impacts matches substrings,
+    so a section citing only REQ-0010 is not hit by a change to REQ-001 here.
+    """
+    old_sections = cache.sections(old_content)
+    new_sections = cache.sections(new_content)
+
+    diff = {
+        "added_sections": [s for s in new_sections if s not in old_sections],
+        "removed_sections": [s for s in old_sections if s not in new_sections],
+        "modified_sections": [
+            s for s in new_sections
+            if s in old_sections and new_sections[s] != old_sections[s]
+        ],
+    }
+    old_ids = cache.ids(old_content)
+    new_ids = cache.ids(new_content)
+    # Sorted: set order depends on the hash seed, which differs in spawned workers
+    diff["added_ids"] = sorted(new_ids - old_ids)
+    diff["removed_ids"] = sorted(old_ids - new_ids)
+
+    changed = set(diff["added_ids"]) | set(diff["removed_ids"])
+    for section in diff["modified_sections"]:
+        checkpoint()
+        changed |= cache.ids(old_sections[section]) ^ cache.ids(new_sections[section])
+    return diff, sorted(changed)
+
+
+def _lookup_impacts(changed_ids: list[str], index: dict[str, list[tuple]]) -> dict[tuple, set[str]]:
+    hits: dict[tuple, set[str]] = {}
+    for cid in changed_ids:
+        for location in index.get(cid, ()):
+            hits.setdefault(location, set()).add(cid)
+    return hits
+
+
+def _run_pair(pair: dict, revision_mode: bool, cache: SectionCache | None = None) -> dict:
+    """Worker body: diff one pair (runs in a pool process or inline)."""
+    cache = cache or SectionCache()
+    old, new = pair["old"], pair["new"]
+    diff, changed_ids = diff_pair(old, new, cache)
+    result = {"name": pair["name"], "diff": diff, "changed_ids": changed_ids}
+    if revision_mode:
+        changes = build_changes_list(old, new, diff)
+        result["changes"] = changes
+        result["revision_history_row"] = build_revision_history_row(diff)
+        result["marked_document"] = build_marked_document(new, changes)
+        result["line_diffs"] = build_line_level_diffs(old, new, diff)
+    return result
+
+
+def _run_shared_pair(name: str, old_handle: tuple, new_handle: tuple, revision_mode: bool) -> dict:
+    """Worker body for the parallel path: map both versions from shared memory, then diff."""
+    from table_store.shared_docs import attach
+
+    old, new = attach(old_handle), attach(new_handle)
+    cache = SectionCache()
+    cache.preload(old)
+    cache.preload(new)
+    return _run_pair({"name": name, "old": old.content, "new": new.content}, revision_mode, cache)
+
+
+def analyze_batch(
+    pairs: list[dict],
+    downstream: dict[str, str],
+    revision_mode: bool = False,
+    max_workers: int | None = None,
+) -> dict:
+    """Diff many upstream pairs and resolve impacts across all downstream documents.
+
+    Args:
+        pairs: [{"name": optional, "old": str, "new": str}, ...]
+        downstream: {document name: content}
+        revision_mode: Include changes/line diffs/marked document per pair
+        max_workers: Process count for pair diffs (default: CPU count when
+            there are at least PARALLEL_MIN_PAIRS pairs, else inline)
+
+    Downstream sections are impacted when they cite a changed ID as a whole
+    token (see diff_pair for how this differs from diff_analyzer.analyze).
+
+    In parallel mode each distinct document text (a version chain shares
+    one text between consecutive pairs) is parsed once here and published
+    through table_store.shared_docs. Workers map it instead of receiving a
+    pickled copy and re-parsing it.
+    """
+    pairs = [
+        {"name": p.get("name") or f"pair{i + 1}", "old": p["old"], "new": p["new"]}
+        for i, p in enumerate(pairs)
+    ]
+    if max_workers is None:
+        max_workers = (os.cpu_count() or 1) if len(pairs) >= PARALLEL_MIN_PAIRS else 1
+    max_workers = max(1, min(max_workers, len(pairs) or 1))
+
+    cache = SectionCache()
+    if max_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from table_store.shared_docs import SharedDocumentCache
+
+        with SharedDocumentCache() as shared, ProcessPoolExecutor(max_workers=max_workers) as pool:
+            jobs = []
+            for p in pairs:
+                checkpoint()
+                jobs.append(pool.submit(
+                    _run_shared_pair, p["name"], shared.add(p["old"]), shared.add(p["new"]), revision_mode
+                ))
+            # Downstream documents are parsed and indexed once, while pairs are diffed
+            index = build_id_index(downstream, cache)
+            pair_results = [job.result() for job in jobs]
+    else:
+        pair_results = [_run_pair(p, revision_mode, cache) for p in pairs]
+        index = build_id_index(downstream, cache)
+
+    consolidated: dict[tuple, dict] = {}
+    all_changed: set[str] = set()
+    for pr in pair_results:
+        all_changed.update(pr["changed_ids"])
+        hits = _lookup_impacts(pr["changed_ids"], index)
+        pr["impacts"] = [
+            {"document": doc, "section": section, "referenced_ids": sorted(ids)}
+            for (_, doc, section), ids in sorted(hits.items())
+        ]
+        for location, ids in hits.items():
+            entry = consolidated.setdefault(location, {"ids": set(), "sources": []})
+            entry["ids"] |= ids
+            entry["sources"].append(pr["name"])
+
+    impacts = [
+        {
+            "document": doc,
+            "section": section,
+            "referenced_ids": sorted(entry["ids"]),
+            "source_pairs": entry["sources"],
+            "needs_update": True,
+        }
+        for (_, doc, section), entry in sorted(consolidated.items())
+    ]
+
+    return {
+        "pairs": pair_results,
+        "changed_ids": sorted(all_changed),
+        "impacts": impacts,
+        "total_impacted_sections": len(impacts),
+    }
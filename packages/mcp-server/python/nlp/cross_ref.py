@@ -0,0 +1,190 @@
+"""Project-wide cross-reference validation in a single pass over every document.
+
+Each document is scanned once with diff_analyzer._ID_PATTERN. An ID in the
+first cell of a markdown table row is a definition; any other occurrence is a
+reference. Definitions and references go into two ID-keyed tables, so
+dangling, duplicate and orphaned IDs are found in time linear in the total
+text size instead of by comparing document pairs.
+
+In incremental mode per-file scan results are cached by (size, mtime) and
+SHA-256, so only files that changed since the last run are re-read.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from cache_paths import cache_dir
+from jobs.cancellation import checkpoint
+
+from .diff_analyzer import _ID_PATTERN
+
+# Bump when the scan rules change so cached scans are ignored
+SCAN_CACHE_VERSION = "2"
+
+
+def scan_document(content: str) -> dict:
+    """Return {"defs": [[id, line]], "refs": [[id, line]]} for one document.
+
+    Lines inside ``` code fences are sample text, so their IDs are ignored.
+    """
+    defs, refs = [], []
+    in_fence = False
+    for line_no, line in enumerate(content.split("\n"), 1):
+        stripped = line.strip()
+        if stripped.startswith("```"):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        first_cell = ""
+        if stripped.startswith("|"):
+            first_cell = stripped[1:].split("|", 1)[0]
+        defined = set(_ID_PATTERN.findall(first_cell))
+        for m in _ID_PATTERN.finditer(line):
+            id_ = m.group(0)
+            if id_ in defined:
+                defs.append([id_, line_no])
+                defined.discard(id_)  # the same ID later in the row is a reference
+            else:
+                refs.append([id_, line_no])
+    return {"defs": defs, "refs": refs}
+
+
+def _content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class _ScanCache:
+    """Per-file scan results keyed by path, validated by stat then content hash."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data["files"] if data.get("version") == SCAN_CACHE_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+
+    def scan(self, file_path: Path) -> tuple[dict, bool]:
+        """Return (scan, reused) for a file, rescanning only when it changed."""
+        st = file_path.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self.entries.get(str(file_path))
+        if entry and entry["stat"] == stamp:
+            return entry["scan"], True
+
+        content = file_path.read_text(encoding="utf-8")
+        digest = _content_digest(content)
+        if entry and entry["sha256"] == digest:
+            entry["stat"] = stamp
+            return entry["scan"], True
+
+        result = scan_document(content)
+        self.entries[str(file_path)] = {"stat": stamp, "sha256": digest, "scan": result}
+        return result, False
+
+    def save(self, keep: set[str]) -> None:
+        files = {p: e for p, e in self.entries.items() if p in keep}
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": SCAN_CACHE_VERSION, "files": files}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def _cache_file(root: Path) -> Path:
+    key = hashlib.sha256(str(root.resolve()).encode("utf-8")).hexdigest()[:16]
+    return cache_dir("xref") / f"{key}.json"
+
+
+def validate_references(
+    documents: Optional[dict[str, str]] = None,
+    dir_path: Optional[str] = None,
+    incremental: bool = False,
+) -> dict:
+    """Check every ID definition and reference across a set of documents.
+
+    Args:
+        documents: {document name: markdown content}
+        dir_path: Directory of .md files to scan instead (names are relative paths)
+        incremental: With dir_path, reuse cached scans of unchanged files
+            (inline documents are always scanned; a warning says so)
+
+    Returns:
+        dict with: dangling (referenced but never defined), duplicates (defined
+        more than once), orphaned (defined but never referenced from another
+        document), summary, scanned_files, (incremental only) reused_files and
+        warnings
+    """
+    scans: dict[str, dict] = {}
+    reused = 0
+    warnings = []
+    if dir_path is not None:
+        root = Path(dir_path)
+        if not root.is_dir():
+            return {"error": f"Not a directory: {dir_path}"}
+        cache = _ScanCache(_cache_file(root)) if incremental else None
+        paths = sorted(root.glob("**/*.md"))
+        for path in paths:
+            checkpoint()
+            name = path.relative_to(root).as_posix()
+            if cache is not None:
+                scans[name], hit = cache.scan(path)
+                reused += hit
+            else:
+                scans[name] = scan_document(path.read_text(encoding="utf-8"))
+        if cache is not None:
+            cache.save({str(p) for p in paths})
+    else:
+        if incremental:
+            warnings.append("incremental applies to dir_path only; inline documents were fully scanned")
+        for name, content in (documents or {}).items():
+            checkpoint()
+            scans[name] = scan_document(content)
+
+    definitions: dict[str, list[dict]] = {}
+    references: dict[str, list[dict]] = {}
+    for name, scan in scans.items():
+        for id_, line in scan["defs"]:
+            definitions.setdefault(id_, []).append({"document": name, "line": line})
+        for id_, line in scan["refs"]:
+            references.setdefault(id_, []).append({"document": name, "line": line})
+
+    dangling = [
+        {"id": id_, "references": refs}
+        for id_, refs in sorted(references.items())
+        if id_ not in definitions
+    ]
+    duplicates = [
+        {"id": id_, "definitions": defs}
+        for id_, defs in sorted(definitions.items())
+        if len(defs) > 1
+    ]
+    orphaned = []
+    for id_, defs in sorted(definitions.items()):
+        defining = {d["document"] for d in defs}
+        if not any(r["document"] not in defining for r in references.get(id_, ())):
+            orphaned.append({"id": id_, "definitions": defs})
+
+    result = {
+        "dangling": dangling,
+        "duplicates": duplicates,
+        "orphaned": orphaned,
+        "summary": {
+            "documents": len(scans),
+            "defined_ids": len(definitions),
+            "referenced_ids": len(references),
+            "dangling": len(dangling),
+            "duplicates": len(duplicates),
+            "orphaned": len(orphaned),
+        },
+        "scanned_files": len(scans) - reused,
+        "warnings": warnings,
+    }
+    if dir_path is not None and incremental:
+        result["reused_files"] = reused
+    return result
@@ -1,9 +1,9 @@
 """Diff analysis: detect upstream changes and find downstream impacts."""
 
-import json
 import re
-import sys
-from datetime import date
+from typing import Iterator, Optional
+
+from jobs.cancellation import checkpoint
 
 
 def extract_sections(content: str) -> dict[str, str]:
@@ -81,6 +81,7 @@ def find_downstream_impacts(
     impacts = []
 
     for section_name, section_content in sections.items():
+        checkpoint()
         referenced = [cid for cid in changed_ids if cid in section_content]
         if referenced:
             impacts.append({
@@ -92,72 +93,71 @@ def find_downstream_impacts(
     return impacts
 
 
-def build_changes_list(old_content: str, new_content: str, diff: dict) -> list[dict]:
-    """Build structured changes list with change_type tags."""
-    old_sections = extract_sections(old_content)
-    new_sections = extract_sections(new_content)
-    changes = []
-
+def iter_changes(old_sections: dict[str, str], new_sections: dict[str, str], diff: dict) -> Iterator[dict]:
+    """Yield one structured change (with change_type tag) per changed section."""
     for section in diff["added_sections"]:
-        changes.append({
+        yield {
             "section": section,
             "change_type": "add",
             "content": new_sections.get(section, ""),
-        })
+        }
     for section in diff["removed_sections"]:
-        changes.append({
+        yield {
             "section": section,
             "change_type": "del",
             "content": old_sections.get(section, ""),
-        })
+        }
     for section in diff["modified_sections"]:
-        changes.append({
+        yield {
             "section": section,
             "change_type": "mod",
             "before": old_sections.get(section, ""),
             "after": new_sections.get(section, ""),
-        })
+        }
 
-    return changes
 
+def build_changes_list(old_content: str, new_content: str, diff: dict) -> list[dict]:
+    """Build structured changes list with change_type tags."""
+    return list(iter_changes(extract_sections(old_content), extract_sections(new_content), diff))
 
-def build_line_level_diffs(old_content: str, new_content: str, diff: dict) -> list[dict]:
-    """Build line-level diffs within modified sections using SequenceMatcher."""
-    import difflib
 
-    old_sections = extract_sections(old_content)
-    new_sections = extract_sections(new_content)
-    line_diffs = []
+def iter_line_hunks(old_sections: dict[str, str], new_sections: dict[str, str], diff: dict) -> Iterator[dict]:
+    """Yield line-level hunks within modified sections using SequenceMatcher."""
+    import difflib
 
     for section in diff["modified_sections"]:
-        old_text = old_sections.get(section, "")
-        new_text = new_sections.get(section, "")
-        old_lines = old_text.split("\n")
-        new_lines = new_text.split("\n")
+        checkpoint()
+        old_lines = old_sections.get(section, "").split("\n")
+        new_lines = new_sections.get(section, "").split("\n")
 
         matcher = difflib.SequenceMatcher(None, old_lines, new_lines)
-        section_diffs = []
-
         for tag, i1, i2, j1, j2 in matcher.get_opcodes():
             if tag == "equal":
                 continue
-            section_diffs.append({
+            yield {
+                "section": section,
                 "type": tag,  # "replace", "insert", "delete"
                 "old_lines": old_lines[i1:i2] if tag in ("replace", "delete") else [],
                 "new_lines": new_lines[j1:j2] if tag in ("replace", "insert") else [],
-            })
+            }
 
-        if section_diffs:
-            line_diffs.append({
-                "section": section,
-                "diffs": section_diffs,
-            })
 
+def build_line_level_diffs(old_content: str, new_content: str, diff: dict) -> list[dict]:
+    """Build line-level diffs within modified sections using SequenceMatcher."""
+    line_diffs = []
+    hunks = iter_line_hunks(extract_sections(old_content), extract_sections(new_content), diff)
+    for hunk in hunks:
+        section = hunk.pop("section")
+        if not line_diffs or line_diffs[-1]["section"] != section:
+            line_diffs.append({"section": section, "diffs": []})
+        line_diffs[-1]["diffs"].append(hunk)
     return line_diffs
 
 
 def build_revision_history_row(diff: dict) -> dict:
     """Generate a suggested 改訂履歴 row from diff results."""
+    from datetime import date
+
     parts = []
     if diff["added_sections"]:
         parts.append(f"追加: {', '.join(diff['added_sections'][:3])}")
@@ -175,25 +175,24 @@ def build_revision_history_row(diff: dict) -> dict:
     }
 
 
-def build_marked_document(content: str, changes: list[dict]) -> str:
-    """Insert 【新規】/【変更】/【削除】 markers into table cells of the document."""
-    lines = content.split("\n")
+_CHANGE_MARKERS = {"add": "【新規】", "del": "【削除】", "mod": "【変更】"}
+
+
+def iter_marked_lines(content: str, changes: list[dict]) -> Iterator[str]:
+    """Yield document lines with 【新規】/【変更】/【削除】 markers in table cells."""
     section_markers = {}
     for change in changes:
-        marker = {"add": "【新規】", "del": "【削除】", "mod": "【変更】"}.get(change["change_type"], "")
+        marker = _CHANGE_MARKERS.get(change["change_type"], "")
         if marker:
             section_markers[change["section"]] = marker
 
-    result = []
     current_section = "_preamble"
-    in_table = False
 
-    for line in lines:
+    for line in content.split("\n"):
         heading_match = re.match(r"^(#{1,4})\s+(.+)$", line)
         if heading_match:
             current_section = heading_match.group(2).strip()
-            in_table = False
-            result.append(line)
+            yield line
             continue
 
         # Detect table rows (not separator)
@@ -206,49 +205,189 @@ def build_marked_document(content: str, changes: list[dict]) -> str:
                 cells[1] = f" {marker}{cells[1].strip()} "
             line = "|".join(cells)
 
-        result.append(line)
+        yield line
+
+
+def build_marked_document(content: str, changes: list[dict]) -> str:
+    """Insert 【新規】/【変更】/【削除】 markers into table cells of the document."""
+    return "\n".join(iter_marked_lines(content, changes))
+
+
+def write_marked_document(content: str, changes: list[dict], path: str) -> str:
+    """Write the marked document to path line by line instead of building one string."""
+    from pathlib import Path
 
-    return "\n".join(result)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, line in enumerate(iter_marked_lines(content, changes)):
+            if i:
+                f.write("\n")
+            f.write(line)
+    return path
 
 
-def analyze(upstream_old: str, upstream_new: str, downstream: str, revision_mode: bool = False) -> dict:
-    """Full analysis: diff upstream, find downstream impacts."""
+# Result parts callers can select; revision parts are only produced in revision mode
+SUMMARY_PARTS = ("diff", "changed_ids", "impacts")
+REVISION_PARTS = ("changes", "revision_history_row", "marked_document", "line_diffs")
+
+
+def _section_changes(diff: dict) -> list[dict]:
+    """Section/change_type pairs only — all iter_marked_lines needs, without section text."""
+    return (
+        [{"section": s, "change_type": "add"} for s in diff["added_sections"]]
+        + [{"section": s, "change_type": "del"} for s in diff["removed_sections"]]
+        + [{"section": s, "change_type": "mod"} for s in diff["modified_sections"]]
+    )
+
+
+def _prepare(upstream_old: str, upstream_new: str) -> tuple[dict, dict, dict, list[str]]:
+    """Parse both versions once; return (old_sections, new_sections, diff, changed_ids)."""
+    old_sections = extract_sections(upstream_old)
+    new_sections = extract_sections(upstream_new)
     diff = diff_documents(upstream_old, upstream_new)
 
     all_changed_ids = diff["added_ids"] + diff["removed_ids"]
     # Also extract IDs from modified sections
-    old_sections = extract_sections(upstream_old)
-    new_sections = extract_sections(upstream_new)
     for section in diff["modified_sections"]:
         old_ids = extract_ids(old_sections.get(section, ""))
         new_ids = extract_ids(new_sections.get(section, ""))
         all_changed_ids.extend(list(old_ids.symmetric_difference(new_ids)))
 
-    all_changed_ids = list(set(all_changed_ids))
-    impacts = find_downstream_impacts(all_changed_ids, downstream)
+    return old_sections, new_sections, diff, list(set(all_changed_ids))
 
-    result = {
-        "diff": diff,
-        "changed_ids": all_changed_ids,
-        "impacts": impacts,
-        "total_impacted_sections": len(impacts),
-    }
 
-    if revision_mode:
-        changes = build_changes_list(upstream_old, upstream_new, diff)
-        result["changes"] = changes
+def _semantic_impacts(
+    old_sections: dict, new_sections: dict, diff: dict, downstream: str, impacts: list[dict]
+) -> list[dict]:
+    """Similarity matches, leaving out sections the ID-based impacts already list."""
+    from .semantic_impact import find_semantic_impacts
+
+    changes = list(iter_changes(old_sections, new_sections, diff))
+    cited = {("downstream", impact["section"]) for impact in impacts}
+    return find_semantic_impacts(changes, {"downstream": downstream}, exclude=cited)
+
+
+def _selected(parts: Optional[list[str]], revision_mode: bool, semantic: bool = False) -> set[str]:
+    selected = set(SUMMARY_PARTS + (REVISION_PARTS if revision_mode else ()))
+    if semantic:
+        selected.add("semantic_impacts")
+    if parts is not None:
+        selected &= set(parts)
+    return selected
+
+
+def analyze(
+    upstream_old: str,
+    upstream_new: str,
+    downstream: str,
+    revision_mode: bool = False,
+    parts: Optional[list[str]] = None,
+    marked_document_path: Optional[str] = None,
+    semantic: bool = False,
+) -> dict:
+    """Full analysis: diff upstream, find downstream impacts.
+
+    parts limits the result to the named keys (see SUMMARY_PARTS/REVISION_PARTS);
+    with marked_document_path the marked document is written there and only
+    its path is returned. semantic adds similarity-based semantic_impacts
+    for downstream sections that do not cite the changed IDs.
+    """
+    selected = _selected(parts, revision_mode, semantic)
+    old_sections, new_sections, diff, all_changed_ids = _prepare(upstream_old, upstream_new)
+
+    impacts = []
+    if selected & {"impacts", "semantic_impacts"}:
+        impacts = find_downstream_impacts(all_changed_ids, downstream)
+
+    result = {}
+    if "diff" in selected:
+        result["diff"] = diff
+    if "changed_ids" in selected:
+        result["changed_ids"] = all_changed_ids
+    if "impacts" in selected:
+        result["impacts"] = impacts
+        result["total_impacted_sections"] = len(impacts)
+
+    if "changes" in selected:
+        result["changes"] = list(iter_changes(old_sections, new_sections, diff))
+    if "revision_history_row" in selected:
         result["revision_history_row"] = build_revision_history_row(diff)
-        result["marked_document"] = build_marked_document(upstream_new, changes)
+    if "marked_document" in selected:
+        if marked_document_path:
+            result["marked_document_path"] = write_marked_document(
+                upstream_new, _section_changes(diff), marked_document_path
+            )
+        else:
+            result["marked_document"] = build_marked_document(upstream_new, _section_changes(diff))
+    if "line_diffs" in selected:
         result["line_diffs"] = build_line_level_diffs(upstream_old, upstream_new, diff)
+    if "semantic_impacts" in selected:
+        result["semantic_impacts"] = _semantic_impacts(old_sections, new_sections, diff, downstream, impacts)
 
     return result
 
 
-if __name__ == "__main__":
-    input_data = json.loads(sys.stdin.read())
-    result = analyze(
-        input_data["upstream_old"],
-        input_data["upstream_new"],
-        input_data["downstream"],
-    )
-    print(json.dumps(result, ensure_ascii=False))
+def stream_analysis(
+    upstream_old: str,
+    upstream_new: str,
+    downstream: str,
+    revision_mode: bool = False,
+    parts: Optional[list[str]] = None,
+    marked_document_path: Optional[str] = None,
+    semantic: bool = False,
+) -> Iterator[dict]:
+    """Same analysis as analyze(), yielded as small NDJSON-ready records.
+
+    Records carry a "record" tag: summary, impact, semantic_impact, change,
+    line_hunk, revision_history_row, marked_document, then a final end record
+    with counts. Section text is emitted once per change record and never
+    accumulated.
+    """
+    selected = _selected(parts, revision_mode, semantic)
+    old_sections, new_sections, diff, all_changed_ids = _prepare(upstream_old, upstream_new)
+    counts = {"impact": 0, "change": 0, "line_hunk": 0}
+
+    summary = {"record": "summary"}
+    if "diff" in selected:
+        summary["diff"] = diff
+    if "changed_ids" in selected:
+        summary["changed_ids"] = all_changed_ids
+    yield summary
+
+    impacts = []
+    if selected & {"impacts", "semantic_impacts"}:
+        impacts = find_downstream_impacts(all_changed_ids, downstream)
+    if "impacts" in selected:
+        for impact in impacts:
+            counts["impact"] += 1
+            yield {"record": "impact", **impact}
+
+    if "semantic_impacts" in selected:
+        for impact in _semantic_impacts(old_sections, new_sections, diff, downstream, impacts):
+            yield {"record": "semantic_impact", **impact}
+
+    if "changes" in selected:
+        for change in iter_changes(old_sections, new_sections, diff):
+            counts["change"] += 1
+            yield {"record": "change", **change}
+
+    if "line_diffs" in selected:
+        for hunk in iter_line_hunks(old_sections, new_sections, diff):
+            counts["line_hunk"] += 1
+            yield {"record": "line_hunk", **hunk}
+
+    if "revision_history_row" in selected:
+        yield {"record": "revision_history_row", **build_revision_history_row(diff)}
+
+    if "marked_document" in selected:
+        if marked_document_path:
+            path = write_marked_document(upstream_new, _section_changes(diff), marked_document_path)
+            yield {"record": "marked_document", "path": path}
+        else:
+            yield {
+                "record": "marked_document",
+                "content": build_marked_document(upstream_new, _section_changes(diff)),
+            }
+
+    yield {"record": "end", "counts": counts}
+
@@ -0,0 +1,239 @@
+"""Similarity-based impact matching: character n-gram TF-IDF over downstream sections.
+
+Explicit ID references (diff_analyzer.find_downstream_impacts) miss downstream
+sections that describe a changed requirement without citing its ID. This
+engine vectorizes every downstream section once into an L2-normalized sparse
+TF-IDF matrix (character 2/3-grams work for Japanese without a tokenizer),
+persists it per document keyed by content hash, and scores all changed
+upstream sections against it with a single sparse matrix product.
+
+numpy/scipy are imported lazily so the plain diff action stays light.
+"""
+
+import hashlib
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Collection, Iterable, Optional
+
+from cache_paths import cache_dir
+from jobs.cancellation import checkpoint
+
+from .diff_analyzer import extract_sections
+
+NGRAM_SIZES = (2, 3)
+DEFAULT_THRESHOLD = 0.3
+DEFAULT_TOP_K = 5
+# Bump when tokenization or weighting changes so persisted indexes are rebuilt
+INDEX_VERSION = "1"
+
+_MD_NOISE = re.compile(r"[|#*`>\-:_=\s]+")
+
+# In-process LRU for long-running workers (serve, watch): content hash -> VectorIndex.
+# Edited documents get new hashes, so the bound keeps old versions from piling up.
+MAX_CACHED_INDEXES = 32
+_INDEXES: "OrderedDict[str, VectorIndex]" = OrderedDict()
+
+
+def char_ngrams(text: str) -> Counter:
+    """Character n-gram counts of markdown text, ignoring table/heading syntax."""
+    normalized = _MD_NOISE.sub(" ", unicodedata.normalize("NFKC", text).lower())
+    counts = Counter()
+    for chunk in normalized.split():
+        for n in NGRAM_SIZES:
+            for i in range(len(chunk) - n + 1):
+                counts[chunk[i:i + n]] += 1
+    return counts
+
+
+class VectorIndex:
+    """TF-IDF matrix of one document's sections (rows) over its n-gram vocabulary."""
+
+    def __init__(self, sections: list[str], vocab: dict[str, int], idf, matrix):
+        self.sections = sections
+        self.vocab = vocab
+        self.idf = idf
+        self.matrix = matrix  # scipy.sparse.csr_matrix, rows L2-normalized
+
+    @classmethod
+    def build(cls, content: str) -> "VectorIndex":
+        import numpy as np
+        from scipy import sparse
+
+        sections = extract_sections(content)
+        names = list(sections)
+        counts = []
+        for name in names:
+            checkpoint()
+            counts.append(char_ngrams(sections[name]))
+
+        vocab: dict[str, int] = {}
+        df: list[int] = []
+        for c in counts:
+            for gram in c:
+                col = vocab.setdefault(gram, len(vocab))
+                if col == len(df):
+                    df.append(0)
+                df[col] += 1
+
+        n_docs = len(counts)
+        idf = np.log((1 + n_docs) / (1 + np.asarray(df, dtype=np.float64))) + 1.0
+        matrix = _weigh(counts, vocab, idf, sparse)
+        return cls(names, vocab, idf, matrix)
+
+    def vectorize(self, texts: Iterable[str]):
+        """TF-IDF rows for query texts in this index's vocabulary space."""
+        from scipy import sparse
+
+        return _weigh([char_ngrams(t) for t in texts], self.vocab, self.idf, sparse)
+
+    def save(self, path) -> None:
+        """Write the index atomically: readers never see a partly written file."""
+        import numpy as np
+
+        grams = [""] * len(self.vocab)
+        for gram, col in self.vocab.items():
+            grams[col] = gram
+        fd, tmp = tempfile.mkstemp(suffix=".npz.tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(
+                    f,
+                    version=np.array(INDEX_VERSION),
+                    sections=np.array(self.sections, dtype=str),
+                    vocab=np.array(grams, dtype=str),
+                    idf=self.idf,
+                    data=self.matrix.data,
+                    indices=self.matrix.indices,
+                    indptr=self.matrix.indptr,
+                    shape=np.array(self.matrix.shape),
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path) -> Optional["VectorIndex"]:
+        import numpy as np
+        from scipy import sparse
+
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                if str(z["version"]) != INDEX_VERSION:
+                    return None
+                matrix = sparse.csr_matrix(
+                    (z["data"], z["indices"], z["indptr"]), shape=tuple(z["shape"])
+                )
+                vocab = {str(g): i for i, g in enumerate(z["vocab"])}
+                return cls([str(s) for s in z["sections"]], vocab, z["idf"], matrix)
+        except Exception:
+            # Truncated or corrupt file (BadZipFile, EOFError, ...): a cache miss
+            return None
+
+
+def _weigh(counts: list[Counter], vocab: dict[str, int], idf, sparse):
+    """Sublinear TF x IDF, L2-normalized per row, as a CSR matrix."""
+    import numpy as np
+
+    indptr = [0]
+    indices: list[int] = []
+    data: list[float] = []
+    for c in counts:
+        row = [(vocab[g], (1.0 + math.log(tf)) * idf[vocab[g]]) for g, tf in c.items() if g in vocab]
+        norm = math.sqrt(sum(w * w for _, w in row)) or 1.0
+        for col, w in row:
+            indices.append(col)
+            data.append(w / norm)
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int32), np.asarray(indptr)),
+        shape=(len(counts), max(len(vocab), 1)),
+    )
+
+
+def load_index(content: str, persist: bool = True) -> VectorIndex:
+    """Vector index for a document, from memory, the on-disk cache, or built fresh."""
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    index = _INDEXES.get(key)
+    if index is not None:
+        _INDEXES.move_to_end(key)
+        return index
+
+    path = cache_dir("vectors") / f"{key}.npz" if persist else None
+    if path is not None and path.exists():
+        index = VectorIndex.load(path)
+    if index is None:
+        index = VectorIndex.build(content)
+        if path is not None:
+            try:
+                index.save(path)
+            except OSError:
+                pass  # the in-memory index still serves this call
+    _INDEXES[key] = index
+    while len(_INDEXES) > MAX_CACHED_INDEXES:
+        _INDEXES.popitem(last=False)
+    return index
+
+
+def find_semantic_impacts(
+    changes: list[dict],
+    downstream: dict[str, str],
+    threshold: float = DEFAULT_THRESHOLD,
+    top_k: int = DEFAULT_TOP_K,
+    persist: bool = True,
+    exclude: Collection[tuple[str, str]] = (),
+) -> list[dict]:
+    """Score changed upstream sections against every downstream section.
+
+    Args:
+        changes: diff_analyzer change records (content, or before/after for mod)
+        downstream: {document name: content}
+        threshold: Minimum cosine similarity to report
+        top_k: Maximum matches per changed section and document
+        persist: Save/load vector indexes under the sekkei cache directory
+        exclude: (document, section) pairs never reported, e.g. sections the
+            ID-based impacts already cover
+
+    Returns:
+        [{"section", "change_type", "matches": [{"document", "section", "score"}]}]
+    """
+    if not changes:
+        return []
+    texts = [c.get("after") or c.get("content") or c.get("before", "") for c in changes]
+    matches: list[list[dict]] = [[] for _ in changes]
+
+    for doc_name, content in downstream.items():
+        index = load_index(content, persist)
+        if not index.sections:
+            continue
+        # One sparse product scores every changed section against every downstream section
+        scores = (index.vectorize(texts) @ index.matrix.T).tocsr()
+        for i in range(scores.shape[0]):
+            row = scores.getrow(i)
+            ranked = sorted(
+                ((col, score) for col, score in zip(row.indices, row.data)
+                 if (doc_name, index.sections[col]) not in exclude),
+                key=lambda x: -x[1],
+            )
+            for col, score in ranked[:top_k]:
+                if score < threshold:
+                    break
+                matches[i].append({
+                    "document": doc_name,
+                    "section": index.sections[col],
+                    "score": round(float(score), 4),
+                })
+
+    return [
+        {
+            "section": change["section"],
+            "change_type": change["change_type"],
+            "matches": sorted(m, key=lambda x: -x["score"]),
+        }
+        for change, m in zip(changes, matches)
+        if m
+    ]
@@ -0,0 +1,338 @@
+"""Local document version store: section-level deltas over content-addressed blobs.
+
+Layout under the store root:
+
+    blobs/ab/abcdef...   section text, named by its SHA-256 (shared by all documents)
+    docs/<doc_id>.jsonl  one record per version: {"version", "label", "date", "author",
+                         "note", "set": {section: blob}, "del": [section], "order"?,
+                         "snapshot"?}
+
+Sections are keyed by heading path ("1. 概要 > 目的"), not bare heading text:
+設計書 repeat headings such as 概要 in every chapter. A path that still
+repeats gets an occurrence suffix ("… > 備考 [2]").
+
+Every SNAPSHOT_EVERY versions a record also carries the full ordered
+[section, blob] list so checkout() never replays more than that many deltas.
+Queries (section history, changes between versions, 改訂履歴 rows) run on a
+per-section timeline built from the deltas, without rebuilding or re-diffing
+whole documents.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+from datetime import date as date_cls
+from pathlib import Path
+from typing import Optional
+
+from .diff_analyzer import build_revision_history_row
+
+SNAPSHOT_EVERY = 10
+PATH_SEPARATOR = " > "
+
+_DOC_ID_RE = re.compile(r"^[\w.\-]+$")
+_HEADING_RE = re.compile(r"^(#{1,4})\s+(.+)$")
+
+
+def split_sections(content: str) -> dict[str, str]:
+    """Split markdown at headings (as extract_sections) into path-keyed sections, in order.
+
+    Joining the values with "\n" gives back content exactly.
+    """
+    sections: dict[str, str] = {}
+    seen: dict[str, int] = {}
+    stack: list[tuple[int, str]] = []
+    key = "_preamble"
+    lines: list[str] = []
+
+    def close() -> None:
+        if lines:
+            sections[key] = "\n".join(lines)
+
+    for line in content.split("\n"):
+        match = _HEADING_RE.match(line)
+        if match:
+            close()
+            level = len(match.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, match.group(2).strip()))
+            path = PATH_SEPARATOR.join(title for _, title in stack)
+            seen[path] = seen.get(path, 0) + 1
+            key = path if seen[path] == 1 else f"{path} [{seen[path]}]"
+            lines = [line]
+        else:
+            lines.append(line)
+    close()
+    return sections
+
+
+class VersionStore:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        (self.root / "docs").mkdir(parents=True, exist_ok=True)
+
+    # -- blobs --
+
+    def put_blob(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self.root / "blobs" / digest[:2] / digest
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            os.replace(tmp, path)
+        return digest
+
+    def get_blob(self, digest: Optional[str]) -> str:
+        if digest is None:
+            return ""
+        return (self.root / "blobs" / digest[:2] / digest).read_text(encoding="utf-8")
+
+    # -- records --
+
+    def _doc_path(self, doc_id: str) -> Path:
+        if not _DOC_ID_RE.match(doc_id):
+            raise ValueError(f"Invalid doc_id: {doc_id}")
+        return self.root / "docs" / f"{doc_id}.jsonl"
+
+    def records(self, doc_id: str) -> list[dict]:
+        path = self._doc_path(doc_id)
+        if not path.exists():
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def timeline(self, doc_id: str) -> "Timeline":
+        return Timeline(self.records(doc_id))
+
+    def commit(
+        self,
+        doc_id: str,
+        content: str,
+        label: Optional[str] = None,
+        author: str = "",
+        note: str = "",
+        date: Optional[str] = None,
+    ) -> dict:
+        """Record content as the next version if any section changed."""
+        records = self.records(doc_id)
+        timeline = Timeline(records)
+        latest = timeline.latest
+        current = timeline.state(latest) if latest else {}
+
+        sections = split_sections(content)
+        blobs = {name: self.put_blob(text) for name, text in sections.items()}
+        changed = {name: b for name, b in blobs.items() if current.get(name) != b}
+        deleted = [name for name in current if name not in blobs]
+        order = list(blobs)
+
+        if latest and not changed and not deleted and order == timeline.order(latest):
+            return {"version": latest, "label": records[-1]["label"], "created": False}
+
+        version = latest + 1
+        record = {
+            "version": version,
+            "label": label or _next_label(records[-1]["label"] if records else None),
+            "date": date or date_cls.today().isoformat(),
+            "author": author,
+            "note": note,
+            "set": changed,
+            "del": deleted,
+        }
+        if not latest or order != timeline.order(latest):
+            record["order"] = order
+        if version % SNAPSHOT_EVERY == 0:
+            record["snapshot"] = [[name, blobs[name]] for name in order]
+
+        with open(self._doc_path(doc_id), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return {"version": version, "label": record["label"], "created": True,
+                "changed_sections": list(changed), "deleted_sections": deleted}
+
+    # -- queries --
+
+    def checkout(self, doc_id: str, version: Optional[int] = None) -> str:
+        """Materialize a version from its nearest snapshot plus later deltas."""
+        records = self.records(doc_id)
+        version = version or len(records)
+        if not 1 <= version <= len(records):
+            raise ValueError(f"Unknown version {version} of {doc_id}")
+
+        state: dict[str, str] = {}
+        order: list[str] = []
+        start = 0
+        for i in range(version - 1, -1, -1):
+            if "snapshot" in records[i]:
+                state = dict(records[i]["snapshot"])
+                order = [name for name, _ in records[i]["snapshot"]]
+                start = i + 1
+                break
+        for record in records[start:version]:
+            state.update(record["set"])
+            for name in record["del"]:
+                state.pop(name, None)
+            if "order" in record:
+                order = record["order"]
+        return "\n".join(self.get_blob(state[name]) for name in order if name in state)
+
+    def section_history(self, doc_id: str, section: str, include_text: bool = False) -> list[dict]:
+        """Every version in which the section was added, changed or removed."""
+        timeline = self.timeline(doc_id)
+        history = []
+        previous = None
+        for version, blob in timeline.events(section):
+            entry = {
+                "version": version,
+                "label": timeline.meta[version]["label"],
+                "date": timeline.meta[version]["date"],
+                "change_type": "del" if blob is None else ("add" if previous is None else "mod"),
+            }
+            if include_text:
+                entry["content"] = self.get_blob(blob)
+            history.append(entry)
+            previous = blob
+        return history
+
+    def changes_between(self, doc_id: str, a: int, b: int, include_text: bool = False) -> dict:
+        """Section-level diff between versions a and b, touching only sections changed in (a, b]."""
+        timeline = self.timeline(doc_id)
+        added, removed, modified = [], [], []
+        changes = []
+        for section in timeline.touched(a, b):
+            before, after = timeline.blob_at(section, a), timeline.blob_at(section, b)
+            if before == after:
+                continue
+            if before is None:
+                added.append(section)
+                change = {"section": section, "change_type": "add"}
+            elif after is None:
+                removed.append(section)
+                change = {"section": section, "change_type": "del"}
+            else:
+                modified.append(section)
+                change = {"section": section, "change_type": "mod"}
+            if include_text:
+                change["before"] = self.get_blob(before)
+                change["after"] = self.get_blob(after)
+            changes.append(change)
+        return {
+            "from": a,
+            "to": b,
+            "added_sections": added,
+            "removed_sections": removed,
+            "modified_sections": modified,
+            "changes": changes,
+        }
+
+    def revision_history(self, doc_id: str) -> list[dict]:
+        """Full 改訂履歴 table, one row per stored version, straight from the deltas."""
+        records = self.records(doc_id)
+        timeline = Timeline(records)
+        rows = []
+        for record in records:
+            version = record["version"]
+            if version == 1:
+                summary = "初版作成"
+            else:
+                diff = {"added_sections": [], "removed_sections": list(record["del"]), "modified_sections": []}
+                for section in record["set"]:
+                    existed = timeline.blob_at(section, version - 1) is not None
+                    diff["modified_sections" if existed else "added_sections"].append(section)
+                summary = build_revision_history_row(diff)["変更内容"]
+            rows.append({
+                "版数": record["label"],
+                "日付": record["date"],
+                "変更内容": record["note"] or summary,
+                "変更者": record["author"],
+            })
+        return rows
+
+
+class Timeline:
+    """Per-section (version, blob-or-None) event lists built from version records."""
+
+    def __init__(self, records: list[dict]):
+        self.meta = {r["version"]: r for r in records}
+        self.latest = records[-1]["version"] if records else 0
+        self._events: dict[str, tuple[list[int], list[Optional[str]]]] = {}
+        self._order_versions: list[int] = []
+        self._orders: list[list[str]] = []
+        for r in records:
+            for name, blob in r["set"].items():
+                self._add(name, r["version"], blob)
+            for name in r["del"]:
+                self._add(name, r["version"], None)
+            if "order" in r:
+                self._order_versions.append(r["version"])
+                self._orders.append(r["order"])
+
+    def _add(self, section: str, version: int, blob: Optional[str]) -> None:
+        versions, blobs = self._events.setdefault(section, ([], []))
+        versions.append(version)
+        blobs.append(blob)
+
+    def events(self, section: str) -> list[tuple[int, Optional[str]]]:
+        versions, blobs = self._events.get(section, ([], []))
+        return list(zip(versions, blobs))
+
+    def blob_at(self, section: str, version: int) -> Optional[str]:
+        versions, blobs = self._events.get(section, ([], []))
+        i = bisect.bisect_right(versions, version)
+        return blobs[i - 1] if i else None
+
+    def touched(self, a: int, b: int) -> list[str]:
+        lo, hi = min(a, b), max(a, b)
+        return [
+            name for name, (versions, _) in self._events.items()
+            if bisect.bisect_right(versions, hi) > bisect.bisect_right(versions, lo)
+        ]
+
+    def state(self, version: int) -> dict[str, str]:
+        """Section -> blob at a version (used when committing the next one)."""
+        state = {}
+        for name in self._events:
+            blob = self.blob_at(name, version)
+            if blob is not None:
+                state[name] = blob
+        return state
+
+    def order(self, version: int) -> list[str]:
+        i = bisect.bisect_right(self._order_versions, version)
+        return self._orders[i - 1] if i else []
+
+
+def _next_label(previous: Optional[str]) -> str:
+    """1.0 for the first version, then bump the minor number (1.0 -> 1.1)."""
+    if not previous:
+        return "1.0"
+    major, _, minor = previous.partition(".")
+    if major.isdigit() and minor.isdigit():
+        return f"{major}.{int(minor) + 1}"
+    return f"{previous}+1"
+
+
+def version_store(op: str, store_dir: str, doc_id: str, **kwargs) -> dict:
+    """CLI entry: dispatch one version-store operation."""
+    store = VersionStore(store_dir)
+    if op == "commit":
+        return store.commit(
+            doc_id, kwargs["content"],
+            label=kwargs.get("label"), author=kwargs.get("author", ""),
+            note=kwargs.get("note", ""), date=kwargs.get("date"),
+        )
+    if op == "section_history":
+        return {"history": store.section_history(
+            doc_id, kwargs["section"], include_text=kwargs.get("include_text", False))}
+    if op == "changes":
+        return store.changes_between(
+            doc_id, kwargs["from_version"], kwargs["to_version"],
+            include_text=kwargs.get("include_text", False))
+    if op == "revision_history":
+        return {"rows": store.revision_history(doc_id)}
+    if op == "checkout":
+        return {"content": store.checkout(doc_id, kwargs.get("version"))}
+    return {"error": f"Unknown version-store op: {op}"}
@@ -0,0 +1,111 @@
+"""Startup-time budget check for cli.py actions, based on `python -X importtime`.
+
+Each action is run as a one-shot `python cli.py <action>` with empty input, so
+the whole import chain of main() is measured (metrics, resource-limit setup,
+the lazily imported handler module) before the handler fails on the missing
+fields. Its import cost above a bare interpreter is compared with a per-action
+budget. Actions must also not pull in libraries they do not use.
+
+Usage: python startup_budget.py [--runs N] [action ...]
+Exits with status 1 if any action is over budget or loads a forbidden module.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PYTHON_DIR = Path(__file__).resolve().parent
+
+_HEAVY = ("openpyxl", "yaml", "mistune", "docx", "weasyprint", "jinja2", "numpy", "scipy")
+
+# action -> (handler module, budget in ms above bare interpreter, modules that must not load)
+ACTION_BUDGETS = {
+    "diff": ("nlp.diff_analyzer", 30, _HEAVY),
+    "diff-batch": ("nlp.batch_diff", 50, _HEAVY),
+    "import-excel": ("import_pkg.excel_importer", 250, ("yaml", "mistune", "docx", "weasyprint", "jinja2")),
+    "diff-excel": ("import_pkg.excel_diff", 250, ("yaml", "mistune", "docx", "weasyprint", "jinja2")),
+    "import-directory": ("import_pkg.batch_import", 50, ("openpyxl", "yaml", "mistune", "docx", "weasyprint", "jinja2")),
+    "validate-refs": ("nlp.cross_ref", 40, _HEAVY),
+    "version-store": ("nlp.version_store", 40, _HEAVY),
+    "watch": ("jobs.watcher", 50, _HEAVY),
+    "export-excel": ("export.excel_exporter", 350, ("mistune", "docx", "weasyprint", "jinja2")),
+    "export-matrix": ("export.matrix_exporter", 300, ("yaml", "mistune", "docx", "weasyprint", "jinja2")),
+    "export-docx": ("export.docx_exporter", 250, ("openpyxl", "mistune", "weasyprint", "jinja2")),
+    "export-pdf": ("export.pdf_exporter", 150, ("openpyxl", "docx", "weasyprint")),
+}
+
+
+def measure_imports(args: list[str], env: dict | None = None) -> tuple[int, set[str]]:
+    """Run the interpreter with args under -X importtime; return (top-level cumulative µs, imported module names).
+
+    The exit status is ignored: a one-shot action fed empty input fails after
+    its imports are done, which is all that is measured here.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PYTHON_DIR, capture_output=True, text=True, env=env,
+    )
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # top-level import (no nesting indent)
+            total += int(cumulative)
+    return total, modules
+
+
+def _cli_env(cache_dir: str) -> dict:
+    """Environment for a default one-shot run: no resource limits, throwaway metrics."""
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SEKKEI_")}
+    return {**env, "SEKKEI_INPUT": "{}", "SEKKEI_CACHE_DIR": cache_dir}
+
+
+def check(actions: list[str], runs: int) -> bool:
+    baseline = min(measure_imports(["-c", "pass"])[0] for _ in range(runs))
+    ok = True
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = _cli_env(cache_dir)
+        for action in actions:
+            module, budget_ms, forbidden = ACTION_BUDGETS[action]
+            samples = [measure_imports([str(PYTHON_DIR / "cli.py"), action], env) for _ in range(runs)]
+            cost_ms = (min(total for total, _ in samples) - baseline) / 1000
+            loaded = samples[0][1]
+            leaked = sorted(f for f in forbidden if any(m == f or m.startswith(f + ".") for m in loaded))
+
+            problems = []
+            if module not in loaded:
+                problems.append(f"never imports {module}")
+            if leaked:
+                problems.append(f"loads {', '.join(leaked)}")
+            status = "ok"
+            if cost_ms > budget_ms or problems:
+                status = "FAIL"
+                ok = False
+            detail = "".join(f" {p}" for p in problems)
+            print(f"{status:4} {action:14} {cost_ms:8.1f} ms / {budget_ms} ms budget{detail}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("actions", nargs="*", default=list(ACTION_BUDGETS))
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of N runs")
+    args = parser.parse_args()
+
+    unknown = [a for a in args.actions if a not in ACTION_BUDGETS]
+    if unknown:
+        parser.error(f"unknown action(s): {', '.join(unknown)}")
+
+    sys.exit(0 if check(args.actions, args.runs) else 1)
+
+
+if __name__ == "__main__":
+    main()
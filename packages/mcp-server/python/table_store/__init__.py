@@ -0,0 +1 @@
+"""Compact in-memory table representation shared by exporters and importers."""
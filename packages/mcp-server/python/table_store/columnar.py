@@ -0,0 +1,163 @@
+"""Columnar table store: per-column arrays of interned string ids plus row views.
+
+Design documents repeat a handful of values (処理分類, 優先度, ○ marks, CRUD
+letters) across hundreds of thousands of cells. Storing each cell as a 4-byte
+id into a shared StringPool instead of its own str object cuts memory several
+fold, and per-column work (widths, validation, coloring) can be computed once
+per distinct value.
+"""
+
+from array import array
+from collections.abc import Iterator, Sequence
+
+EMPTY_ID = 0  # id of "" in every pool; also fills cells past a short row's end
+
+
+class StringPool:
+    """Shared string dictionary: value <-> small integer id."""
+
+    __slots__ = ("_ids", "strings")
+
+    def __init__(self):
+        self._ids: dict[str, int] = {"": EMPTY_ID}
+        self.strings: list[str] = [""]
+
+    @classmethod
+    def from_strings(cls, strings: list[str]) -> "StringPool":
+        """Pool over an existing id-ordered string list (strings[0] must be "")."""
+        pool = cls.__new__(cls)
+        pool.strings = strings
+        pool._ids = {value: idx for idx, value in enumerate(strings)}
+        return pool
+
+    def intern(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.strings)
+            self._ids[value] = idx
+            self.strings.append(value)
+        return idx
+
+    def __getitem__(self, idx: int) -> str:
+        return self.strings[idx]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class RowView(Sequence):
+    """Read-only list-like view of one table row."""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: "ColumnarTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __len__(self) -> int:
+        return self._table.widths[self._index]
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return [self[i] for i in range(*col.indices(len(self)))]
+        width = len(self)
+        if col < 0:
+            col += width
+        if not 0 <= col < width:
+            raise IndexError("row index out of range")
+        table = self._table
+        return table.pool.strings[table.columns[col][self._index]]
+
+    def __iter__(self) -> Iterator[str]:
+        table = self._table
+        strings = table.pool.strings
+        for col in table.columns[: len(self)]:
+            yield strings[col[self._index]]
+
+    def __repr__(self) -> str:
+        return f"RowView({list(self)!r})"
+
+
+class _Rows(Sequence):
+    __slots__ = ("_table",)
+
+    def __init__(self, table: "ColumnarTable"):
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table.widths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return RowView(self._table, index)
+
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(len(self)):
+            yield RowView(self._table, index)
+
+
+class ColumnarTable:
+    """Header plus per-column id arrays; rows may be ragged like parsed markdown.
+
+    columns[c][r] is the pool id of row r's cell c; widths[r] is how many cells
+    row r actually has (cells beyond it hold EMPTY_ID and are not part of the row).
+    """
+
+    __slots__ = ("header", "pool", "columns", "widths")
+
+    def __init__(self, header: list[str], pool: StringPool | None = None):
+        self.header = list(header)
+        self.pool = pool if pool is not None else StringPool()
+        self.columns: list[array] = [array("I") for _ in self.header]
+        self.widths = array("H")
+
+    @classmethod
+    def from_buffers(cls, header: list[str], pool: StringPool, columns: list, widths) -> "ColumnarTable":
+        """Read-only table over existing id buffers (arrays or typed memoryviews).
+
+        Used to map tables stored elsewhere (e.g. shared memory) without copying;
+        append_row is not supported on such tables.
+        """
+        table = cls.__new__(cls)
+        table.header = list(header)
+        table.pool = pool
+        table.columns = list(columns)
+        table.widths = widths
+        return table
+
+    @property
+    def rows(self) -> _Rows:
+        return _Rows(self)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.widths)
+
+    def append_row(self, cells: Sequence[str]) -> None:
+        width = len(cells)
+        if width > len(self.columns):
+            self.columns.extend(
+                array("I", [EMPTY_ID]) * self.row_count for _ in range(width - len(self.columns))
+            )
+        intern = self.pool.intern
+        for col, value in zip(self.columns, cells):
+            col.append(intern(value))
+        for col in self.columns[width:]:
+            col.append(EMPTY_ID)
+        self.widths.append(width)
+
+    def column_ids(self, col: int) -> array:
+        """Raw id array for a column (EMPTY_ID where a row is too short)."""
+        return self.columns[col] if col < len(self.columns) else array("I")
+
+    def distinct_ids(self, col: int) -> set[int]:
+        return set(self.column_ids(col))
+
+    def distinct_values(self, col: int) -> list[str]:
+        strings = self.pool.strings
+        return [strings[i] for i in self.distinct_ids(col)]
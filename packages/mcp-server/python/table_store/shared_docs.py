@@ -0,0 +1,350 @@
+"""Parsed documents in shared memory, mapped zero-copy by worker processes.
+
+Parallel diffs and exports over a document chain hand the same markdown to
+several worker processes. Each worker would otherwise unpickle its own copy
+and re-run extract_sections / the table parser on it. Instead, the parent
+parses each distinct document once into a flat little-endian buffer and
+publishes it as a multiprocessing.shared_memory segment. Workers attach by
+name, and sections, IDs and table cells are read straight out of the
+mapping: id columns are typed memoryviews, and section text is decoded only
+when asked for.
+
+Buffer layout (all integers u32 unless noted, every block 4-byte aligned):
+
+    header    magic "SKPD", u16 layout version, u16 reserved, then
+              text_bytes, n_strings, strings_bytes, n_sections, n_idrefs, n_tables
+    text      UTF-8 document text
+    strings   offsets[n_strings + 1] then UTF-8 bytes; id 0 is ""
+    sections  n_sections x (name id, heading level, start byte, end byte)
+    idrefs    n_idrefs x (section index, id string id), grouped by section
+    tables    n_tables x (block offset, header cols, cols, rows), then per table:
+              header ids[header cols], u16 widths[rows], cells[cols][rows]
+
+Sections follow diff_analyzer.extract_sections over the whole text, IDs its
+extract_ids per section, and tables excel_exporter.parse_markdown's line rules
+over the body after any frontmatter.
+"""
+
+import atexit
+import gc
+import hashlib
+import re
+import struct
+from array import array
+from typing import Optional
+
+from .columnar import ColumnarTable, StringPool
+
+MAGIC = b"SKPD"
+LAYOUT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHH6I")
+_TABLE_DIR = struct.Struct("<4I")
+_HEADING_RE = re.compile(r"^(#{1,4})\s+(.+)$")
+_FRONTMATTER_RE = re.compile(r"^---\n([\s\S]*?)\n---\n")
+_TABLE_ROW_RE = re.compile(r"^\|(.+)\|$")
+_TABLE_SEP_RE = re.compile(r"^\|[\s\-:|]+\|$")
+
+# Segments this process has attached to, by name; mappings live until exit
+_ATTACHED: dict[str, tuple] = {}
+
+
+def content_key(content: str) -> str:
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def _parse_tables(content: str, pool: StringPool) -> list[ColumnarTable]:
+    fm = _FRONTMATTER_RE.match(content)
+    body = content[fm.end():] if fm else content
+    tables, current = [], None
+    for line in body.split("\n"):
+        stripped = line.strip()
+        if _HEADING_RE.match(line):
+            if current:
+                tables.append(current)
+                current = None
+            continue
+        if _TABLE_SEP_RE.match(stripped):
+            continue
+        row = _TABLE_ROW_RE.match(stripped)
+        if row:
+            cells = [c.strip() for c in row.group(1).split("|")]
+            if current is None:
+                current = ColumnarTable(cells, pool)
+            else:
+                current.append_row(cells)
+        elif current:
+            tables.append(current)
+            current = None
+    if current:
+        tables.append(current)
+    return tables
+
+
+def encode_document(content: str, tables: Optional[list[ColumnarTable]] = None) -> bytes:
+    """Parse content once into the shared buffer layout.
+
+    tables may pass tables the caller already parsed (in document order) to
+    skip the table scan. If they share one StringPool, that pool becomes the
+    document's pool; otherwise they are re-interned into a new one.
+    """
+    from nlp.diff_analyzer import extract_ids
+
+    pools = {id(t.pool): t.pool for t in tables or ()}
+    pool = next(iter(pools.values())) if len(pools) == 1 else StringPool()
+    text = content.encode("utf-8")
+
+    # Sections with byte offsets, same boundaries as extract_sections
+    sections = []  # (name id, level, start, end)
+    idrefs = array("I")
+    name, level, start, pos, last_end = "_preamble", 0, 0, 0, 0
+    has_lines = False
+
+    def close(end: int) -> None:
+        index = len(sections)
+        sections.append((pool.intern(name), level, start, end))
+        for id_ in sorted(extract_ids(text[start:end].decode("utf-8"))):
+            idrefs.extend((index, pool.intern(id_)))
+
+    for line in content.split("\n"):
+        line_bytes = len(line.encode("utf-8"))
+        match = _HEADING_RE.match(line)
+        if match:
+            if has_lines:
+                close(last_end)
+            name, level, start = match.group(2).strip(), len(match.group(1)), pos
+        has_lines = True
+        last_end = pos + line_bytes
+        pos = last_end + 1
+    if has_lines:
+        close(last_end)
+
+    if tables is None:
+        tables = _parse_tables(content, pool)
+    else:
+        tables = [_reintern(table, pool) for table in tables]
+    header_ids = [array("I", (pool.intern(h) for h in table.header)) for table in tables]
+
+    strings = [s.encode("utf-8") for s in pool.strings]
+    offsets = array("I", [0])
+    for s in strings:
+        offsets.append(offsets[-1] + len(s))
+    string_bytes = b"".join(strings)
+
+    buf = bytearray(_HEADER.size)
+    buf.extend(text)
+    _pad(buf)
+    buf.extend(offsets.tobytes())
+    buf.extend(string_bytes)
+    _pad(buf)
+    for section in sections:
+        buf.extend(array("I", section).tobytes())
+    buf.extend(idrefs.tobytes())
+
+    table_dir_at = len(buf)
+    buf.extend(b"\0" * (_TABLE_DIR.size * len(tables)))
+    for i, table in enumerate(tables):
+        block = len(buf)
+        buf.extend(header_ids[i].tobytes())
+        buf.extend(array("H", table.widths).tobytes())
+        _pad(buf)
+        for col in table.columns:
+            buf.extend(array("I", col).tobytes())
+        _TABLE_DIR.pack_into(buf, table_dir_at + i * _TABLE_DIR.size,
+                             block, len(table.header), len(table.columns), table.row_count)
+
+    _HEADER.pack_into(buf, 0, MAGIC, LAYOUT_VERSION, 0, len(text), len(strings),
+                      len(string_bytes), len(sections), len(idrefs) // 2, len(tables))
+    return bytes(buf)
+
+
+def _reintern(table: ColumnarTable, pool: StringPool) -> ColumnarTable:
+    if table.pool is pool:
+        return table
+    strings = table.pool.strings
+    remap = {}
+    columns = []
+    for col in table.columns:
+        ids = array("I")
+        for value_id in col:
+            new_id = remap.get(value_id)
+            if new_id is None:
+                new_id = remap[value_id] = pool.intern(strings[value_id])
+            ids.append(new_id)
+        columns.append(ids)
+    return ColumnarTable.from_buffers(table.header, pool, columns, table.widths)
+
+
+class ParsedDocument:
+    """Read-only view over an encoded document buffer (bytes or shared memory)."""
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        (magic, version, _, text_bytes, n_strings, strings_bytes,
+         n_sections, n_idrefs, n_tables) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError("Not a parsed-document buffer of this layout version")
+
+        pos = _HEADER.size
+        self._text = view[pos:pos + text_bytes]
+        pos += text_bytes + (-text_bytes % 4)
+
+        offsets = view[pos:pos + 4 * (n_strings + 1)].cast("I")
+        pos += 4 * (n_strings + 1)
+        blob = view[pos:pos + strings_bytes]
+        pos += strings_bytes + (-strings_bytes % 4)
+        # The string pool is the one part decoded up front: it is deduplicated
+        # and every lookup below needs it
+        self.pool = StringPool.from_strings(
+            [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in range(n_strings)]
+        )
+
+        self._sections = view[pos:pos + 16 * n_sections].cast("I")
+        pos += 16 * n_sections
+        self._idrefs = view[pos:pos + 8 * n_idrefs].cast("I")
+        pos += 8 * n_idrefs
+        self._table_dir = [_TABLE_DIR.unpack_from(view, pos + i * _TABLE_DIR.size) for i in range(n_tables)]
+        self._view = view
+        self._section_ids: Optional[list[set[str]]] = None
+
+    @property
+    def content(self) -> str:
+        return str(self._text, "utf-8")
+
+    @property
+    def section_count(self) -> int:
+        return len(self._sections) // 4
+
+    def section_name(self, index: int) -> str:
+        return self.pool.strings[self._sections[4 * index]]
+
+    def section_level(self, index: int) -> int:
+        return self._sections[4 * index + 1]
+
+    def section_text(self, index: int) -> str:
+        start, end = self._sections[4 * index + 2], self._sections[4 * index + 3]
+        return str(self._text[start:end], "utf-8")
+
+    def sections(self) -> dict[str, str]:
+        """Same mapping as diff_analyzer.extract_sections (later duplicates win)."""
+        return {self.section_name(i): self.section_text(i) for i in range(self.section_count)}
+
+    def section_ids(self, index: int) -> set[str]:
+        if self._section_ids is None:
+            per_section: list[set[str]] = [set() for _ in range(self.section_count)]
+            strings = self.pool.strings
+            refs = self._idrefs
+            for i in range(0, len(refs), 2):
+                per_section[refs[i]].add(strings[refs[i + 1]])
+            self._section_ids = per_section
+        return self._section_ids[index]
+
+    def ids(self) -> set[str]:
+        """Same set as diff_analyzer.extract_ids over the whole document."""
+        strings = self.pool.strings
+        refs = self._idrefs
+        return {strings[refs[i]] for i in range(1, len(refs), 2)}
+
+    @property
+    def table_count(self) -> int:
+        return len(self._table_dir)
+
+    def table(self, index: int) -> ColumnarTable:
+        """Table index as a ColumnarTable whose id columns map the buffer directly."""
+        block, header_cols, cols, rows = self._table_dir[index]
+        view = self._view
+        strings = self.pool.strings
+        header = [strings[i] for i in view[block:block + 4 * header_cols].cast("I")]
+        pos = block + 4 * header_cols
+        widths = view[pos:pos + 2 * rows].cast("H")
+        pos += 2 * rows + (-(2 * rows) % 4)
+        columns = []
+        for _ in range(cols):
+            columns.append(view[pos:pos + 4 * rows].cast("I"))
+            pos += 4 * rows
+        return ColumnarTable.from_buffers(header, self.pool, columns, widths)
+
+    def tables(self) -> list[ColumnarTable]:
+        return [self.table(i) for i in range(self.table_count)]
+
+
+def _attach_segment(name: str):
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+    except TypeError:
+        # Pool workers share the owner's resource tracker, so registering again
+        # is a no-op and the owner's unlink() still does the cleanup
+        return shared_memory.SharedMemory(name=name)
+
+
+def _detach_all() -> None:
+    # Views into a mapping must be gone before it closes, or SharedMemory.__del__
+    # complains (BufferError) at interpreter shutdown of spawned workers
+    segments = [shm for shm, _ in _ATTACHED.values()]
+    _ATTACHED.clear()
+    gc.collect()
+    for shm in segments:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # a view outlived its job; the mapping goes with the process
+
+
+def attach(handle: tuple[str, int]) -> ParsedDocument:
+    """Map a published document in this process; repeated calls reuse the mapping."""
+    name, size = handle
+    entry = _ATTACHED.get(name)
+    if entry is None:
+        if not _ATTACHED:
+            atexit.register(_detach_all)
+        shm = _attach_segment(name)
+        entry = _ATTACHED[name] = (shm, ParsedDocument(shm.buf[:size]))
+    return entry[1]
+
+
+class SharedDocumentCache:
+    """Owner side: publishes each distinct document once; unlinks everything on close.
+
+    Use as a context manager around the pool whose workers attach() to handles.
+    """
+
+    def __init__(self):
+        self._segments: dict[str, object] = {}
+        self._handles: dict[str, tuple[str, int]] = {}
+
+    def add(self, content: str, tables: Optional[list[ColumnarTable]] = None) -> tuple[str, int]:
+        """Publish content (parsed once per distinct text); returns its picklable handle."""
+        key = content_key(content)
+        handle = self._handles.get(key)
+        if handle is None:
+            from multiprocessing import shared_memory
+
+            data = encode_document(content, tables)
+            shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            shm.buf[:len(data)] = data
+            self._segments[key] = shm
+            handle = self._handles[key] = (shm.name, len(data))
+        return handle
+
+    @property
+    def nbytes(self) -> int:
+        return sum(size for _, size in self._handles.values())
+
+    def close(self) -> None:
+        for shm in self._segments.values():
+            shm.close()
+            shm.unlink()
+        self._segments.clear()
+        self._handles.clear()
+
+    def __enter__(self) -> "SharedDocumentCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
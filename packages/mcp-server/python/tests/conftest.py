@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PYTHON_ROOT = Path(__file__).resolve().parent.parent
+
+# cli.py imports its packages as top-level modules (jobs, nlp, export, ...)
+if str(PYTHON_ROOT) not in sys.path:
+    sys.path.insert(0, str(PYTHON_ROOT))
+
+
+@pytest.fixture(autouse=True)
+def cache_root(tmp_path, monkeypatch) -> Path:
+    """Keep every test's caches and metrics out of ~/.cache/sekkei.
+
+    Subprocesses started by the tests inherit the variable through os.environ.
+    """
+    root = tmp_path / "sekkei-cache"
+    monkeypatch.setenv("SEKKEI_CACHE_DIR", str(root))
+    monkeypatch.delenv("SEKKEI_METRICS_PROM", raising=False)
+    return root
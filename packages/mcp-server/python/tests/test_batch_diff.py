@@ -0,0 +1,30 @@
+"""diff-batch: per-pair diffs against diff_analyzer.analyze, and whole-token impact lookup."""
+
+from nlp.batch_diff import analyze_batch
+from nlp.diff_analyzer import analyze
+
+OLD = "# 要件\n## ログイン\nREQ-001 ログインできる\n## 検索\nREQ-002 検索できる\n"
+NEW = "# 要件\n## ログイン\nREQ-003 ログインできる\n## 検索\nREQ-002 検索できる\n## 出力\nREQ-004\n"
+DOWNSTREAM = "# 設計\n## 認証\nREQ-001 を実装\n## 帳票\nREQ-0010 を実装\n## 出力画面\nREQ-004 を実装\n"
+
+
+def test_pair_diff_and_changed_ids_match_analyze():
+    single = analyze(OLD, NEW, DOWNSTREAM)
+    pair = analyze_batch([{"name": "req", "old": OLD, "new": NEW}], {"design.md": DOWNSTREAM})["pairs"][0]
+
+    assert pair["changed_ids"] == sorted(single["changed_ids"]) == ["REQ-001", "REQ-003", "REQ-004"]
+    for key in ("added_sections", "removed_sections", "modified_sections"):
+        assert pair["diff"][key] == single["diff"][key]
+    assert pair["diff"]["added_ids"] == sorted(single["diff"]["added_ids"])
+
+
+def test_impacts_match_whole_id_tokens_only():
+    single = analyze(OLD, NEW, DOWNSTREAM)
+    batch = analyze_batch([{"name": "req", "old": OLD, "new": NEW}], {"design.md": DOWNSTREAM})
+
+    # analyze matches substrings, so REQ-001 also hits the section citing REQ-0010
+    assert [i["section"] for i in single["impacts"]] == ["認証", "帳票", "出力画面"]
+    assert [(i["section"], i["referenced_ids"]) for i in batch["impacts"]] == [
+        ("認証", ["REQ-001"]),
+        ("出力画面", ["REQ-004"]),
+    ]
@@ -0,0 +1,117 @@
+"""import-directory: result cache, cache bypass, eviction and per-file failures."""
+
+import os
+
+import openpyxl
+import pytest
+
+from import_pkg import batch_import
+from import_pkg.batch_import import import_directory
+
+
+def _workbook(path, function_id):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "機能一覧"
+    for col, header in enumerate(["機能ID", "機能名", "備考"], start=1):
+        ws.cell(row=1, column=col, value=header)
+    ws.cell(row=2, column=1, value=function_id)
+    ws.cell(row=2, column=2, value=f"機能 {function_id}")
+    wb.save(path)
+    return path
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    root = tmp_path / "xlsx"
+    root.mkdir()
+    for i in range(1, 4):
+        _workbook(root / f"book{i}.xlsx", f"F-00{i}")
+    return root
+
+
+def _entries(store):
+    return sorted(p.name for p in store.glob("*.json") if p.name != batch_import.STAT_INDEX_FILE)
+
+
+def test_second_run_is_served_from_cache(workbooks, cache_root):
+    first = import_directory(str(workbooks), max_workers=1)
+    assert (first["file_count"], first["cache_hits"], first["converted"], first["errors"]) == (3, 0, 3, 0)
+    assert len(_entries(cache_root / "import")) == 3
+
+    second = import_directory(str(workbooks), max_workers=1)
+    assert (second["cache_hits"], second["converted"]) == (3, 0)
+    assert all(f["cached"] for f in second["files"])
+    assert [f["content"] for f in second["files"]] == [f["content"] for f in first["files"]]
+
+    _workbook(workbooks / "book2.xlsx", "F-200")  # edited workbook misses
+    third = import_directory(str(workbooks), max_workers=1)
+    assert (third["cache_hits"], third["converted"]) == (2, 1)
+    assert "F-200" in third["files"][1]["content"]
+
+
+def test_use_cache_false_neither_reads_nor_writes(workbooks, cache_root):
+    import_directory(str(workbooks), max_workers=1)
+    store = cache_root / "import"
+    before = _entries(store)
+
+    result = import_directory(str(workbooks), max_workers=1, use_cache=False)
+    assert "cache_hits" not in result
+    assert result["converted"] == 3
+    assert not any(f["cached"] for f in result["files"])
+    assert _entries(store) == before
+
+
+def test_bad_workbook_is_reported_per_file(workbooks):
+    (workbooks / "broken.xlsx").write_bytes(b"not a zip file")
+
+    result = import_directory(str(workbooks), max_workers=2)
+    assert (result["file_count"], result["converted"], result["errors"]) == (4, 3, 1)
+    broken = next(f for f in result["files"] if f["file_path"].endswith("broken.xlsx"))
+    assert broken["error"] and not broken["cached"]
+
+    again = import_directory(str(workbooks), max_workers=2)
+    assert (again["cache_hits"], again["errors"]) == (3, 1)  # failures are not cached
+
+
+_convert = batch_import._convert
+
+
+def _crash_on_book2(path, doc_type_hint, sheet_name):
+    if path.endswith("book2.xlsx"):
+        os._exit(1)  # kills the worker, breaking the pool
+    return _convert(path, doc_type_hint, sheet_name)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="patched worker needs fork start method")
+def test_crashed_worker_only_fails_its_own_file(workbooks, monkeypatch):
+    monkeypatch.setattr(batch_import, "_convert", _crash_on_book2)
+    result = import_directory(str(workbooks), max_workers=2, use_cache=False)
+
+    errors = {os.path.basename(f["file_path"]): f.get("error") for f in result["files"]}
+    assert errors["book1.xlsx"] is None and errors["book3.xlsx"] is None
+    assert "crashed" in errors["book2.xlsx"]
+    assert (result["converted"], result["errors"]) == (2, 1)
+
+
+def test_least_recently_used_entries_are_evicted(workbooks, tmp_path, cache_root, monkeypatch):
+    monkeypatch.setattr(batch_import, "MAX_CACHE_ENTRIES", 3)
+    store = cache_root / "import"
+    import_directory(str(workbooks), max_workers=1)
+
+    def entry(path):
+        return store / f"{batch_import.cache_key(batch_import.file_digest(path), None, None)}.json"
+
+    now = entry(workbooks / "book1.xlsx").stat().st_mtime
+    for name, age in [("book1.xlsx", 100), ("book2.xlsx", 300), ("book3.xlsx", 200)]:
+        os.utime(entry(workbooks / name), (now - age, now - age))
+
+    other = tmp_path / "other"
+    other.mkdir()
+    import_directory(str(_workbook(other / "book4.xlsx", "F-004").parent), max_workers=1)
+    assert len(_entries(store)) == 3
+    assert not entry(workbooks / "book2.xlsx").exists()
+
+    result = import_directory(str(workbooks), max_workers=1)
+    assert (result["cache_hits"], result["converted"]) == (2, 1)
+    assert not result["files"][1]["cached"]
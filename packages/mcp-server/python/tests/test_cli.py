@@ -0,0 +1,52 @@
+"""One-shot cli.py runs: resource limits surface as JSON errors and cost nothing when unset."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PYTHON_ROOT
+
+
+def _run(action: str, input_data: dict, **env) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, str(PYTHON_ROOT / "cli.py"), action],
+        input=json.dumps(input_data, ensure_ascii=False),
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env={**os.environ, **env},  # carries the per-test SEKKEI_CACHE_DIR
+    )
+
+
+@pytest.mark.skipif(not hasattr(__import__("signal"), "SIGXCPU"), reason="needs RLIMIT_CPU/SIGXCPU")
+def test_cpu_limit_is_reported_as_json_error():
+    # Every changed ID checked against every downstream section: seconds of CPU
+    n = 6000
+    old = "# 要件\n" + "".join(f"## S{i}\nREQ-{i:04d}\n" for i in range(n))
+    new = "# 要件\n" + "".join(f"## S{i}\nNFR-{i:04d}\n" for i in range(n))
+    downstream = "# 設計\n" + "".join(f"## D{i}\n" + "参照 " * 50 + "\n" for i in range(n))
+
+    proc = _run("diff", {"upstream_old": old, "upstream_new": new, "downstream": downstream},
+                SEKKEI_WORKER_CPU_SECONDS="1")
+
+    assert proc.returncode == 1
+    assert proc.stdout == ""
+    assert json.loads(proc.stderr) == {"error": "Job exceeded its CPU time limit (1 s)", "code": "cpu_limit"}
+
+
+def test_governor_is_not_imported_without_limits():
+    doc = "# 要件\n## S1\nREQ-001\n"
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(PYTHON_ROOT / "cli.py"), "diff"],
+        input=json.dumps({"upstream_old": doc, "upstream_new": doc, "downstream": doc}, ensure_ascii=False),
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env={k: v for k, v in os.environ.items() if not k.startswith("SEKKEI_WORKER_")},
+    )
+
+    assert proc.returncode == 0
+    assert "jobs.governor" not in proc.stderr
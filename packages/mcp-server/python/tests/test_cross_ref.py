@@ -0,0 +1,73 @@
+"""validate-refs: definitions vs references, code fences and incremental scans."""
+
+import os
+
+from nlp.cross_ref import scan_document, validate_references
+
+REQUIREMENTS = "# 要件定義書\n| ID | 要件 |\n|----|----|\n| REQ-001 | ログイン |\n| REQ-002 | 検索 |\n"
+DESIGN = "# 基本設計書\n| ID | 画面 | 要件 |\n|----|----|----|\n| SCR-001 | ログイン画面 | REQ-001 |\n本画面は REQ-009 も満たす。\n"
+
+
+def _ids(result, key):
+    return [entry["id"] for entry in result[key]]
+
+
+def test_definitions_and_references_across_documents():
+    result = validate_references(documents={"requirements.md": REQUIREMENTS, "design.md": DESIGN})
+
+    assert _ids(result, "dangling") == ["REQ-009"]
+    assert _ids(result, "orphaned") == ["REQ-002", "SCR-001"]
+    assert result["duplicates"] == []
+    assert result["dangling"][0]["references"] == [{"document": "design.md", "line": 5}]
+    assert result["warnings"] == []
+    assert "reused_files" not in result
+
+
+def test_ids_inside_code_fences_are_ignored():
+    sample = "例:\n```markdown\n| REQ-777 | サンプル |\nREQ-888 を参照\n```\n| REQ-001 | 本物 |\n"
+
+    scan = scan_document(sample)
+    assert scan == {"defs": [["REQ-001", 6]], "refs": []}
+
+    result = validate_references(documents={"guide.md": sample, "requirements.md": REQUIREMENTS})
+    assert _ids(result, "duplicates") == ["REQ-001"]
+    assert "REQ-777" not in _ids(result, "orphaned")
+    assert result["dangling"] == []
+
+
+def test_incremental_reuses_unchanged_files(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "requirements.md").write_text(REQUIREMENTS, encoding="utf-8")
+    (docs / "design.md").write_text(DESIGN, encoding="utf-8")
+
+    first = validate_references(dir_path=str(docs), incremental=True)
+    assert (first["scanned_files"], first["reused_files"]) == (2, 0)
+
+    second = validate_references(dir_path=str(docs), incremental=True)
+    assert (second["scanned_files"], second["reused_files"]) == (0, 2)
+    assert second["dangling"] == first["dangling"] and second["orphaned"] == first["orphaned"]
+
+    # Touched but unchanged content is reused via its hash
+    os.utime(docs / "requirements.md", (1, 1))
+    touched = validate_references(dir_path=str(docs), incremental=True)
+    assert (touched["scanned_files"], touched["reused_files"]) == (0, 2)
+
+    (docs / "design.md").write_text(DESIGN.replace("REQ-009", "REQ-002"), encoding="utf-8")
+    edited = validate_references(dir_path=str(docs), incremental=True)
+    assert (edited["scanned_files"], edited["reused_files"]) == (1, 1)
+    assert edited["dangling"] == []
+    assert _ids(edited, "orphaned") == ["SCR-001"]
+
+    (docs / "design.md").unlink()
+    removed = validate_references(dir_path=str(docs), incremental=True)
+    assert removed["summary"]["documents"] == 1
+    assert _ids(removed, "orphaned") == ["REQ-001", "REQ-002"]
+
+
+def test_incremental_with_inline_documents_warns():
+    result = validate_references(documents={"requirements.md": REQUIREMENTS}, incremental=True)
+
+    assert result["warnings"] == ["incremental applies to dir_path only; inline documents were fully scanned"]
+    assert result["scanned_files"] == 1
+    assert "reused_files" not in result
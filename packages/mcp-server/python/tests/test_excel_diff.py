@@ -0,0 +1,72 @@
+"""diff-excel: ID-keyed row diff between two workbook versions."""
+
+import openpyxl
+import pytest
+
+from import_pkg.excel_diff import diff_excel
+
+HEADER = ["機能ID", "機能名", "優先度"]
+
+
+def _workbook(path, rows, first_row, header=HEADER):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "機能一覧"
+    for offset, row in enumerate([header, *rows]):
+        for col, value in enumerate(row, start=1):
+            ws.cell(row=first_row + offset, column=col, value=value)
+    wb.save(path)
+    return path
+
+
+@pytest.mark.parametrize("first_row", [1, 3])
+def test_diff_is_independent_of_table_position(tmp_path, first_row):
+    old = _workbook(tmp_path / "old.xlsx", [
+        ["F-1", "ログイン", "高"],
+        ["F-2", "ログアウト", "低"],
+        ["F-3", "検索", "中"],
+    ], first_row)
+    new = _workbook(tmp_path / "new.xlsx", [
+        ["F-1", "ログイン", "中"],
+        ["F-3", "検索", "中"],
+        ["F-4", "出力", "低"],
+    ], first_row)
+
+    sheet = diff_excel(str(old), str(new))["sheets"][0]
+
+    assert sheet["id_column"] == "機能ID"
+    assert [r["id"] for r in sheet["added"]] == ["F-4"]
+    assert sheet["added"][0]["row"] == first_row + 3
+    assert [r["id"] for r in sheet["removed"]] == ["F-2"]
+    assert sheet["changed"] == [{
+        "id": "F-1",
+        "old_row": first_row + 1,
+        "new_row": first_row + 1,
+        "cells": [{"column": "優先度", "old": "高", "new": "中"}],
+    }]
+    assert sheet["unchanged_count"] == 1
+    assert sheet["warnings"] == []
+
+
+def test_repeated_header_names_keep_every_column(tmp_path):
+    header = ["機能ID", "機能名", "備考", "備考", None, "備考"]
+    old = _workbook(tmp_path / "old.xlsx", [
+        ["F-1", "ログイン", "a", "b", "x", "c"],
+        ["F-2", "検索", "同じ", "同じ", None, None],
+    ], 1, header)
+    new = _workbook(tmp_path / "new.xlsx", [
+        ["F-1", "ログイン", "a", "B", "x", "C"],
+        ["F-2", "検索", "同じ", "同じ", None, None],
+        ["F-3", "出力", "1", "2", None, "3"],
+    ], 1, header)
+
+    sheet = diff_excel(str(old), str(new))["sheets"][0]
+
+    assert sheet["changed"][0]["cells"] == [
+        {"column": "備考 [2]", "old": "b", "new": "B"},
+        {"column": "備考 [3]", "old": "c", "new": "C"},
+    ]
+    assert sheet["added"][0]["values"] == {
+        "機能ID": "F-3", "機能名": "出力", "備考": "1", "備考 [2]": "2", "Column5": "", "備考 [3]": "3",
+    }
+    assert sheet["unchanged_count"] == 1
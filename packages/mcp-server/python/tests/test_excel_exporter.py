@@ -0,0 +1,90 @@
+"""export-excel: incremental and parallel modes produce the same package as a serial export."""
+
+import zipfile
+
+import pytest
+
+from export import excel_exporter
+from export.excel_exporter import export
+
+
+def _document(tables: int = 10, rows: int = 30, edited: int | None = None) -> str:
+    parts = ["---\ndoc_type: functions-list\nversion: \"1.0\"\n---\n\n# 機能一覧\n"]
+    for t in range(tables):
+        parts.append(f"## 機能群{t}\n\n| 機能ID | 機能名 | 優先度 |\n|--------|--------|--------|")
+        for r in range(rows + t):
+            name = f"機能{t}-{r}" + ("(改)" if t == edited else "")
+            parts.append(f"| F-{t:02d}{r:03d} | {name} | {'高中低'[r % 3]} |")
+        parts.append("")
+    return "\n".join(parts)
+
+
+def _export(path, content, **kwargs) -> dict:
+    return export(content, "functions-list", str(path), "テスト", **kwargs)
+
+
+@pytest.fixture
+def serial(tmp_path):
+    def build(content: str) -> bytes:
+        path = tmp_path / "serial.xlsx"
+        _export(path, content)
+        return path.read_bytes()
+    return build
+
+
+def test_parallel_matches_serial(tmp_path, serial):
+    content = _document()
+    result = _export(tmp_path / "parallel.xlsx", content, parallel=True, max_workers=3)
+
+    assert result["workers"] == 3
+    assert (tmp_path / "parallel.xlsx").read_bytes() == serial(content)
+
+
+def test_incremental_reuses_unchanged_sheets_and_matches_serial(tmp_path, serial):
+    path = tmp_path / "incremental.xlsx"
+    _export(path, _document(), incremental=True)
+
+    edited = _document(edited=4)
+    result = _export(path, edited, incremental=True)
+
+    assert result["reused_sheets"] == 9
+    assert result["regenerated_sheets"] == 1
+    assert path.read_bytes() == serial(edited)
+
+
+def test_incremental_parallel_matches_serial(tmp_path, serial):
+    path = tmp_path / "both.xlsx"
+    _export(path, _document(), incremental=True, parallel=True, max_workers=2)
+
+    edited = _document(edited=2)
+    result = _export(path, edited, incremental=True, parallel=True, max_workers=2)
+
+    assert result["reused_sheets"] == 9
+    assert path.read_bytes() == serial(edited)
+
+
+def test_style_mismatch_falls_back_in_parallel(tmp_path, serial, monkeypatch):
+    path = tmp_path / "stale.xlsx"
+    content = _document()
+    _export(path, content, incremental=True)
+
+    # A previous file whose style table no longer matches: reused XML must not be spliced
+    with zipfile.ZipFile(path) as src:
+        parts = {name: src.read(name) for name in src.namelist()}
+    parts["xl/styles.xml"] += b" "
+    with zipfile.ZipFile(path, "w") as dst:
+        for name, data in parts.items():
+            dst.writestr(name, data)
+
+    calls = []
+    render_parallel = excel_exporter._render_parallel
+    monkeypatch.setattr(
+        excel_exporter, "_render_parallel",
+        lambda *args: calls.append(args[-1]) or render_parallel(*args),
+    )
+    result = _export(path, content, incremental=True, parallel=True, max_workers=2)
+
+    assert calls == [2]
+    assert result["workers"] == 2
+    assert result["reused_sheets"] == 0
+    assert path.read_bytes() == serial(content)
@@ -0,0 +1,63 @@
+"""import-excel: header detection and merged-cell resolution."""
+
+import openpyxl
+
+from import_pkg.excel_importer import MergedValueIndex, import_excel
+
+
+def _functions_list(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "機能一覧"
+    ws["A1"] = "機能一覧表"
+    ws.merge_cells("A1:E1")
+    for col, header in enumerate(["大分類", "中分類", "機能ID", "機能名", "備考"], start=1):
+        ws.cell(row=3, column=col, value=header)
+    rows = [
+        ["会員管理", "認証", "F-001", "ログイン", None],
+        [None, None, "F-002", "ログアウト", None],
+        [None, "登録", "F-003", "会員登録", None],
+        ["帳票", "月次", "F-004", "売上集計", None],
+    ]
+    for r, row in enumerate(rows, start=4):
+        for col, value in enumerate(row, start=1):
+            if value is not None:
+                ws.cell(row=r, column=col, value=value)
+    ws.merge_cells("A4:A6")  # 大分類 spans three rows
+    ws.merge_cells("B4:B5")  # 中分類 spans two
+    ws.merge_cells("D7:E7")  # horizontal span, must not repeat
+    wb.save(path)
+    return path
+
+
+def test_merged_title_row_does_not_win_header_detection(tmp_path):
+    result = import_excel(str(_functions_list(tmp_path / "functions.xlsx")))
+
+    assert result["detected_doc_type"] == "functions-list"
+    lines = result["content"].split("\n")
+    table = lines[lines.index("## 機能一覧") + 2:]
+    assert table[0] == "| 大分類 | 中分類 | 機能ID | 機能名 | 備考 |"
+    assert "機能一覧表" not in result["content"]
+
+
+def test_vertical_merges_fill_data_rows(tmp_path):
+    result = import_excel(str(_functions_list(tmp_path / "functions.xlsx")))
+
+    rows = [line for line in result["content"].split("\n") if "| F-" in line]
+    assert rows == [
+        "| 会員管理 | 認証 | F-001 | ログイン |  |",
+        "| 会員管理 | 認証 | F-002 | ログアウト |  |",
+        "| 会員管理 | 登録 | F-003 | 会員登録 |  |",
+        "| 帳票 | 月次 | F-004 | 売上集計 |  |",
+    ]
+    assert result["row_count"] == 4
+
+
+def test_merged_value_index_stores_one_entry_per_range(tmp_path):
+    ws = openpyxl.load_workbook(_functions_list(tmp_path / "functions.xlsx"))["機能一覧"]
+    index = MergedValueIndex(ws, min_row=4)
+
+    assert len(index) == 2  # A4:A6 and B4:B5; the title and D7:E7 are horizontal
+    assert [index.get(r, 1) for r in range(3, 8)] == [None, "会員管理", "会員管理", "会員管理", None]
+    assert index.get(5, 2) == "認証"
+    assert index.get(6, 2) is None
@@ -0,0 +1,56 @@
+"""export-matrix: tiled and single-sheet exports of the same matrix."""
+
+import openpyxl
+import pytest
+
+from export.matrix_exporter import export_matrix
+
+MATRIX = "\n".join([
+    "| 要件ID | 要件名 | F-001 | F-002 | F-003 |",
+    "|--------|--------|-------|-------|-------|",
+    *(f"| REQ-{i:03d} | 要件{i} | {'○' if i % 2 else ''} | ○ | {'○' if i % 3 == 0 else ''} |" for i in range(1, 8)),
+])
+
+
+def _cover(path) -> list[tuple]:
+    wb = openpyxl.load_workbook(path)
+    try:
+        return [tuple(c for c in row if c is not None) for row in wb["表紙"].iter_rows(values_only=True) if any(row)]
+    finally:
+        wb.close()
+
+
+@pytest.mark.parametrize("matrix_type", ["traceability-matrix", "crud-matrix"])
+def test_tiling_does_not_change_the_cover(tmp_path, matrix_type):
+    single = export_matrix(MATRIX, matrix_type, str(tmp_path / "single.xlsx"), "案件A", tiled=False)
+    tiled = export_matrix(MATRIX, matrix_type, str(tmp_path / "tiled.xlsx"), "案件A",
+                          tiled=True, tile_rows=3, tile_cols=2)
+    assert single["success"] and tiled["success"]
+
+    cover = _cover(tmp_path / "single.xlsx")
+    assert cover == _cover(tmp_path / "tiled.xlsx")
+    title = "CRUD図" if matrix_type == "crud-matrix" else "トレーサビリティマトリックス"
+    assert cover[0] == (title,)
+    assert ("ドキュメント種別", title) in cover
+
+
+def test_tiles_cover_every_cell_once(tmp_path):
+    path = tmp_path / "tiled.xlsx"
+    export_matrix(MATRIX, "traceability-matrix", str(path), tiled=True, tile_rows=3, tile_cols=2)
+
+    wb = openpyxl.load_workbook(path)
+    tiles = [ws for ws in wb.worksheets if ws.title not in ("表紙", "索引")]
+    assert len(tiles) == 3 * 2  # 7 rows in blocks of 3, 3 matrix columns in blocks of 2
+    cells = {}
+    for ws in tiles:
+        rows = list(ws.iter_rows(values_only=True))
+        header = rows[0]
+        assert header[:2] == ("要件ID", "要件名")
+        for row in rows[1:]:
+            for col, value in zip(header[2:], row[2:]):
+                assert (row[0], col) not in cells
+                cells[(row[0], col)] = value or ""
+    wb.close()
+    assert len(cells) == 7 * 3
+    assert cells[("REQ-003", "F-003")] == "○"
+    assert cells[("REQ-002", "F-001")] == ""
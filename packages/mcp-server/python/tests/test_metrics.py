@@ -0,0 +1,119 @@
+"""Per-action metrics: recording, cumulative stats, quantiles and Prometheus output."""
+
+import pytest
+
+import cli
+import metrics
+
+
+def _run_ok(action, input_data):
+    return {"success": True, "file_size": 2048}
+
+
+def _run_fail(action, input_data):
+    raise ValueError("boom")
+
+
+def test_record_error_codes_and_output_size():
+    ok = metrics.record("export-excel", 0.2, {"content": "abc"}, {"file_size": 5000}, None)["export-excel"]
+    assert ok["calls"] == 1 and ok["errors"] == {}
+    assert ok["input_chars"]["sum"] == 3
+    assert ok["output_bytes"]["count"] == 1 and ok["output_bytes"]["sum"] == 5000
+
+    reported = metrics.record("diff", 0.1, {}, {"error": "Not a directory"}, None)["diff"]
+    assert reported["errors"] == {"error": 1}
+    raised = metrics.record("diff", 0.1, {}, None, "deadline_exceeded")["diff"]
+    assert raised["errors"] == {"deadline_exceeded": 1}
+    assert raised["output_bytes"]["count"] == 0
+
+
+@pytest.mark.parametrize("result, hits, misses", [
+    ({"cache_hits": 2, "converted": 3}, 2, 3),
+    ({"converted": 3}, 0, 0),  # use_cache=False: no lookups
+    ({"reused_sheets": 4, "regenerated_sheets": 1}, 4, 1),
+    ({"scanned_files": 5}, 0, 0),  # non-incremental validate-refs
+    ({"reused_files": 0, "scanned_files": 5}, 0, 5),
+])
+def test_record_counts_cache_lookups_only_when_reported(result, hits, misses):
+    stats = metrics.record("action", 0.01, {}, result, None)["action"]
+    assert (stats["cache_hits"], stats["cache_misses"]) == (hits, misses)
+
+
+def test_stats_are_cumulative_and_reset():
+    metrics.instrument("export-pdf", {"content": "x" * 100}, _run_ok)
+    metrics.instrument("export-pdf", {"content": "x" * 100}, _run_ok)
+    with pytest.raises(ValueError):
+        metrics.instrument("export-pdf", {}, _run_fail)
+    metrics.flush(metrics.record("import-directory", 0.5, {}, {"cache_hits": 3, "converted": 1}, None))
+
+    summary = metrics.stats()["actions"]
+    assert summary["export-pdf"]["calls"] == 3
+    assert summary["export-pdf"]["errors"] == 1
+    assert summary["export-pdf"]["error_codes"] == {"failed": 1}
+    assert summary["export-pdf"]["output_bytes"]["count"] == 2
+    assert "cache" not in summary["export-pdf"]
+    assert summary["import-directory"]["cache"] == {"hits": 3, "misses": 1, "hit_rate": 0.75}
+
+    assert metrics.stats(reset=True)["actions"]
+    assert metrics.stats()["actions"] == {}
+
+
+def test_quantiles_interpolate_within_buckets():
+    for _ in range(9):
+        metrics.flush(metrics.record("diff", 0.003, {}, {}, None))
+    metrics.flush(metrics.record("diff", 0.2, {}, {}, None))
+
+    latency = metrics.stats()["actions"]["diff"]["latency_seconds"]
+    assert latency["count"] == 10
+    assert latency["sum"] == pytest.approx(0.227)
+    # 9 samples in (0, 0.005], 1 in (0.1, 0.25]
+    assert latency["p50"] == pytest.approx(0.0028)
+    assert latency["p90"] == pytest.approx(0.005)
+    assert latency["p99"] == pytest.approx(0.235)
+
+
+def test_write_prometheus_text_format(tmp_path):
+    metrics.flush(metrics.record("import-directory", 0.003, {}, {"cache_hits": 3, "converted": 1}, None))
+    metrics.flush(metrics.record("import-directory", 0.2, {}, None, "failed"))
+    (tmp_path / "prom").mkdir()
+    path = tmp_path / "prom" / "sekkei.prom"
+    metrics.write_prometheus(str(path))
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert "# TYPE sekkei_action_calls_total counter" in lines
+    assert 'sekkei_action_calls_total{action="import-directory"} 2' in lines
+    assert 'sekkei_action_errors_total{action="import-directory",code="failed"} 1' in lines
+    assert 'sekkei_cache_lookups_total{action="import-directory",result="hit"} 3' in lines
+    assert 'sekkei_cache_lookups_total{action="import-directory",result="miss"} 1' in lines
+    assert "# TYPE sekkei_action_latency_seconds histogram" in lines
+
+    buckets = [l for l in lines if l.startswith("sekkei_action_latency_seconds_bucket")]
+    assert len(buckets) == len(metrics.LATENCY_BUCKETS) + 1
+    assert buckets[0] == 'sekkei_action_latency_seconds_bucket{action="import-directory",le="0.005"} 1'
+    assert buckets[-1] == 'sekkei_action_latency_seconds_bucket{action="import-directory",le="+Inf"} 2'
+    counts = [int(l.rsplit(" ", 1)[1]) for l in buckets]
+    assert counts == sorted(counts)  # cumulative
+    assert 'sekkei_action_latency_seconds_count{action="import-directory"} 2' in lines
+    # No output_bytes samples: the histogram has a header but no series
+    assert not any(l.startswith("sekkei_action_output_bytes_bucket") for l in lines)
+    assert list(path.parent.iterdir()) == [path]  # temp file replaced, not left behind
+
+
+def test_stats_action_reports_instrumented_runs(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    (docs_dir / "a.md").write_text("| REQ-001 | 要件 |\n", encoding="utf-8")
+    (docs_dir / "b.md").write_text("REQ-001 を参照\n", encoding="utf-8")
+
+    cli.run_instrumented("validate-refs", {"dir_path": str(docs_dir)})
+    cli.run_instrumented("validate-refs", {"dir_path": str(docs_dir), "incremental": True})
+    cli.run_instrumented("validate-refs", {"dir_path": str(docs_dir), "incremental": True})
+    prom = tmp_path / "metrics.prom"
+    result = cli.run_instrumented("stats", {"prometheus_path": str(prom)})
+
+    refs = result["actions"]["validate-refs"]
+    assert refs["calls"] == 3 and refs["errors"] == 0
+    # Only the incremental runs looked files up: 2 misses, then 2 hits
+    assert refs["cache"] == {"hits": 2, "misses": 2, "hit_rate": 0.5}
+    assert "stats" not in result["actions"]
+    assert 'sekkei_action_calls_total{action="validate-refs"} 3' in prom.read_text(encoding="utf-8")
@@ -0,0 +1,103 @@
+"""Deterministic OOXML packaging across the Excel and Word exporters."""
+
+import datetime
+import re
+import zipfile
+
+import pytest
+
+from export import docx_exporter, excel_exporter
+from export.packaging import COMPRESSION_LEVELS, write_package
+
+CONTENT = """---
+doc_type: functions-list
+version: "1.0"
+---
+
+# 機能一覧
+
+## 会員管理
+
+| 機能ID | 機能名 | 概要 |
+|--------|--------|------|
+""" + "\n".join(f"| F-{i:03d} | 機能{i} | {'説明文' * 20} |" for i in range(200)) + "\n"
+
+EXPORTS = {
+    "xlsx": lambda path, **kw: excel_exporter.export(CONTENT, "functions-list", str(path), "案件A", **kw),
+    "docx": lambda path, **kw: docx_exporter.export(CONTENT, "functions-list", str(path), "案件A", **kw),
+    "docx-stream": lambda path, **kw: docx_exporter.export(
+        CONTENT, "functions-list", str(path), "案件A", streaming=True, **kw),
+}
+
+
+def _core_dates(path) -> set[str]:
+    with zipfile.ZipFile(path) as archive:
+        core = archive.read("docProps/core.xml").decode("utf-8")
+    return set(re.findall(r"<dcterms:(?:created|modified)[^>]*>([^<]*)<", core))
+
+
+@pytest.mark.parametrize("kind", EXPORTS)
+def test_repeated_exports_are_byte_identical(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "315532800")  # reproducible output requested
+    suffix = ".xlsx" if kind == "xlsx" else ".docx"
+    first, second = tmp_path / f"a{suffix}", tmp_path / f"b{suffix}"
+    EXPORTS[kind](first)
+    EXPORTS[kind](second)
+
+    assert first.read_bytes() == second.read_bytes()
+    with zipfile.ZipFile(first) as archive:
+        names = archive.namelist()
+        assert names[0] == "[Content_Types].xml"
+        assert {info.date_time for info in archive.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+
+
+@pytest.mark.parametrize("kind", EXPORTS)
+def test_core_dates_are_the_save_time_by_default(tmp_path, monkeypatch, kind):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    path = tmp_path / ("out.xlsx" if kind == "xlsx" else "out.docx")
+    before = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+    EXPORTS[kind](path)
+    after = datetime.datetime.now(datetime.timezone.utc)
+
+    dates = _core_dates(path)
+    assert len(dates) == 1
+    saved = datetime.datetime.strptime(dates.pop(), "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=datetime.timezone.utc)
+    assert before <= saved <= after
+    with zipfile.ZipFile(path) as archive:
+        assert {info.date_time for info in archive.infolist()} == {(1980, 1, 1, 0, 0, 0)}
+
+
+@pytest.mark.parametrize("kind", EXPORTS)
+def test_compression_levels_order_by_size(tmp_path, kind):
+    suffix = ".xlsx" if kind == "xlsx" else ".docx"
+    sizes = {}
+    for level in COMPRESSION_LEVELS:
+        result = EXPORTS[kind](tmp_path / f"{level}{suffix}", compression=level)
+        if kind == "xlsx":
+            assert result["compression"] == level
+        with zipfile.ZipFile(tmp_path / f"{level}{suffix}") as archive:
+            sizes[level] = sum(info.compress_size for info in archive.infolist())
+
+    assert sizes["store"] > sizes["fast"] > sizes["max"]
+    assert sizes["fast"] >= sizes["default"] >= sizes["max"]
+
+
+@pytest.mark.parametrize("kind", EXPORTS)
+def test_source_date_epoch_sets_entry_and_core_dates(tmp_path, monkeypatch, kind):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1767225600")  # 2026-01-01T00:00:00Z
+    path = tmp_path / ("dated.xlsx" if kind == "xlsx" else "dated.docx")
+    EXPORTS[kind](path)
+
+    with zipfile.ZipFile(path) as archive:
+        assert {info.date_time for info in archive.infolist()} == {(2026, 1, 1, 0, 0, 0)}
+    assert _core_dates(path) == {"2026-01-01T00:00:00Z"}
+
+
+def test_unknown_compression_leaves_output_untouched(tmp_path):
+    source = tmp_path / "source.xlsx"
+    EXPORTS["xlsx"](source)
+    target = tmp_path / "target.xlsx"
+
+    with pytest.raises(ValueError, match="Unknown compression"):
+        write_package(source, str(target), "ultra")
+    assert not target.exists()
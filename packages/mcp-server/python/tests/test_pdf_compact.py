@@ -0,0 +1,156 @@
+"""Compact PDF font subset cache, against a stub weasyprint.pdf.fonts.Font."""
+
+import sys
+import types
+
+import pytest
+
+from export import pdf_compact
+from export.pdf_compact import subset_cache
+
+FONT_BYTES = b"\x00\x01\x00\x00" + b"glyph data " * 100
+GLYPHS = {3: "A", 4: "B", 17: "設"}
+
+
+def _stub_font_class():
+    class Font:
+        subset_calls = 0
+
+        def __init__(self, content=FONT_BYTES, index=0):
+            self.file_content = content
+            self.index = index
+            self.missing = {}
+
+        def subset(self, to_unicode, hinting):
+            type(self).subset_calls += 1
+            if to_unicode == {0: "broken"}:
+                return  # subsetting failed: the full font stays embedded
+            self.file_content = b"subset:" + bytes(sorted(to_unicode)) + (b":h" if hinting else b"")
+
+    return Font
+
+
+class _StubHTML:
+    """weasyprint.HTML stand-in that writes a fixed PDF body."""
+
+    def __init__(self, string):
+        self.string = string
+
+    def write_pdf(self, target, **options):
+        data = b"%PDF-1.7 " + (b"compact" if options else b"standard")
+        if hasattr(target, "write"):
+            target.write(data)
+        else:
+            with open(target, "wb") as f:
+                f.write(data)
+
+
+def _install_stub(monkeypatch, font_class):
+    fonts = types.ModuleType("weasyprint.pdf.fonts")
+    if font_class is not None:
+        fonts.Font = font_class
+    pdf = types.ModuleType("weasyprint.pdf")
+    pdf.fonts = fonts
+    weasyprint = types.ModuleType("weasyprint")
+    weasyprint.pdf = pdf
+    weasyprint.HTML = _StubHTML
+    for name, module in [("weasyprint", weasyprint), ("weasyprint.pdf", pdf), ("weasyprint.pdf.fonts", fonts)]:
+        monkeypatch.setitem(sys.modules, name, module)
+    monkeypatch.setattr(pdf_compact, "_installed", False)
+    monkeypatch.setattr(pdf_compact, "_SUBSETS", {})
+
+
+@pytest.fixture
+def Font(monkeypatch):
+    font_class = _stub_font_class()
+    _install_stub(monkeypatch, font_class)
+    return font_class
+
+
+def test_repeated_subset_is_served_from_cache(Font, cache_root):
+    with subset_cache() as stats:
+        first = Font()
+        first.subset(GLYPHS, False)
+        second = Font()
+        second.subset(dict(GLYPHS), False)
+
+    assert stats == {"hits": 1, "misses": 1, "enabled": True}
+    assert Font.subset_calls == 1
+    assert second.file_content == first.file_content == b"subset:" + bytes([3, 4, 17])
+    assert len(list((cache_root / "pdf-fonts").glob("*.bin"))) == 1
+
+
+@pytest.mark.parametrize("other", [
+    lambda font: font.subset({**GLYPHS, 20: "計"}, False),  # more glyphs
+    lambda font: font.subset(GLYPHS, True),  # hinting kept
+    lambda font: (setattr(font, "index", 1), font.subset(GLYPHS, False)),  # other face in a collection
+    lambda font: (setattr(font, "file_content", FONT_BYTES + b"v2"), font.subset(GLYPHS, False)),
+])
+def test_key_covers_glyphs_flags_and_font(Font, other):
+    with subset_cache() as stats:
+        Font().subset(GLYPHS, False)
+        other(Font())
+
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+    assert Font.subset_calls == 2
+
+
+def test_subsets_persist_across_processes(Font, monkeypatch):
+    with subset_cache():
+        Font().subset(GLYPHS, False)
+    monkeypatch.setattr(pdf_compact, "_SUBSETS", {})  # as in a new process
+
+    with subset_cache() as stats:
+        font = Font()
+        font.subset(GLYPHS, False)
+
+    assert (stats["hits"], stats["misses"]) == (1, 0)
+    assert font.file_content == b"subset:" + bytes([3, 4, 17])
+    assert Font.subset_calls == 1
+
+
+def test_failed_subset_is_not_cached(Font, cache_root):
+    with subset_cache() as stats:
+        Font().subset({0: "broken"}, False)
+        font = Font()
+        font.subset({0: "broken"}, False)
+
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+    assert font.file_content == FONT_BYTES
+    assert not list((cache_root / "pdf-fonts").glob("*.bin"))
+
+
+def test_cache_is_bypassed_outside_compact_exports(Font):
+    with subset_cache():
+        Font().subset(GLYPHS, False)
+
+    font = Font()
+    font.subset(GLYPHS, False)  # wrapper installed, but no subset_cache() context
+    assert Font.subset_calls == 2
+    assert Font.subset.__wrapped__ is not None
+
+
+def test_missing_subset_hook_disables_cache(monkeypatch):
+    class Font:
+        pass  # a WeasyPrint without Font.subset
+
+    _install_stub(monkeypatch, Font)
+    with subset_cache() as stats:
+        pass
+    assert stats == {"hits": 0, "misses": 0, "enabled": False}
+    assert not hasattr(Font, "subset")
+
+    _install_stub(monkeypatch, None)  # no Font class at all
+    with subset_cache() as stats:
+        pass
+    assert stats["enabled"] is False
+
+
+def test_write_compact_reports_disabled_cache(monkeypatch, tmp_path):
+    _install_stub(monkeypatch, None)
+    output = tmp_path / "out.pdf"
+
+    report = pdf_compact.write_compact("<p>x</p>", str(output), compare=True)
+    assert report["font_subset_cache"] == {"hits": 0, "misses": 0, "disabled": True}
+    assert report["standard_size"] == len(b"%PDF-1.7 standard")
+    assert output.read_bytes() == b"%PDF-1.7 compact"
@@ -0,0 +1,122 @@
+"""export-pdf HTML stage: heading anchors, TOC entries and the cached templates.
+
+Runs without WeasyPrint; only the HTML handed to it is checked.
+"""
+
+from html.parser import HTMLParser
+
+import pytest
+
+from export import pdf_exporter
+from export.pdf_exporter import build_html, md_to_html, template_environment
+
+CONTENT = """---
+version: 2.1
+---
+# 基本設計書
+## 概要
+本文
+## 画面
+### 概要
+画面の概要
+## **非機能** 要件
+##### 詳細メモ
+"""
+
+
+class _Collector(HTMLParser):
+    """Anchored headings (tag, id, text) and TOC links (href, text) in document order."""
+
+    def __init__(self):
+        super().__init__()
+        self.headings, self.links = [], []
+        self._heading = self._link = None
+        self._in_toc = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "div" and attrs.get("class") == "toc":
+            self._in_toc = True
+        elif tag == "a" and self._in_toc:
+            self._link = [attrs["href"], ""]
+        elif tag in ("h1", "h2", "h3", "h4", "h5") and "id" in attrs:
+            self._heading = [tag, attrs["id"], ""]
+
+    def handle_endtag(self, tag):
+        if tag == "div":
+            self._in_toc = False
+        elif tag == "a" and self._link:
+            self.links.append(tuple(self._link))
+            self._link = None
+        elif self._heading and tag == self._heading[0]:
+            self.headings.append(tuple(self._heading))
+            self._heading = None
+
+    def handle_data(self, data):
+        for open_element in (self._link, self._heading):
+            if open_element:
+                open_element[-1] += data
+
+
+@pytest.fixture(autouse=True)
+def fresh_environments():
+    # Environments are cached per process; start each test against its own cache dir
+    template_environment.cache_clear()
+    yield
+    template_environment.cache_clear()
+
+
+def _parse(html):
+    collector = _Collector()
+    collector.feed(html)
+    return collector
+
+
+def test_headings_get_sequential_anchors_including_duplicates():
+    body, meta, headings = md_to_html(CONTENT)
+
+    assert meta == {"version": 2.1}
+    assert [(h["level"], h["anchor"]) for h in headings] == [
+        (1, "sec-1"), (2, "sec-2"), (2, "sec-3"), (3, "sec-4"), (2, "sec-5"),
+    ]
+    assert [h["text"] for h in headings][1:4] == ["概要", "画面", "概要"]
+    assert "<h5>詳細メモ</h5>" in body  # below TOC_MAX_LEVEL: no anchor
+
+
+def test_toc_links_match_heading_anchors():
+    html = build_html(CONTENT, "基本設計書", project_name="販売管理")
+    parsed = _parse(html)
+
+    assert [href for href, _ in parsed.links] == [f"#{anchor}" for _, anchor, _ in parsed.headings]
+    assert [text for _, text in parsed.links] == [text for _, _, text in parsed.headings]
+    assert [text for _, text in parsed.links] == ["基本設計書", "概要", "画面", "概要", "非機能 要件"]
+    assert len({anchor for _, anchor, _ in parsed.headings}) == 5  # duplicate 概要 headings stay distinct
+    assert "<strong>非機能</strong> 要件</a>" in html  # inline markup kept in the TOC entry
+    assert 'style="margin-left:40px"><a href="#sec-4">' in html
+    assert "販売管理" in html and "版数: 2.1" in html
+
+
+def test_environment_is_cached_and_byte_compiled(cache_root):
+    env = template_environment()
+    assert template_environment() is env
+    assert isinstance(env.bytecode_cache, pdf_exporter.jinja2.FileSystemBytecodeCache)
+
+    build_html(CONTENT, "基本設計書")
+    compiled = list((cache_root / "jinja").iterdir())
+    assert len(compiled) == 3  # document, cover and toc templates
+
+    build_html(CONTENT, "基本設計書")
+    assert sorted(compiled) == sorted((cache_root / "jinja").iterdir())
+
+
+def test_custom_template_dir_overrides_one_template(tmp_path):
+    layout = tmp_path / "layout"
+    (layout / "pdf").mkdir(parents=True)
+    (layout / "pdf" / "cover.html.j2").write_text(
+        '<div class="cover custom">{{ cover.title }} / {{ cover.project_name }}</div>', encoding="utf-8",
+    )
+
+    html = build_html(CONTENT, "基本設計書", project_name="販売管理", template_dir=str(layout))
+    assert '<div class="cover custom">基本設計書 / 販売管理</div>' in html
+    assert [href for href, _ in _parse(html).links][:2] == ["#sec-1", "#sec-2"]  # default TOC still used
+    assert template_environment(str(layout)) is not template_environment()
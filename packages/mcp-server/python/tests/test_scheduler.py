@@ -0,0 +1,108 @@
+"""JobScheduler: lane isolation, admission, cancellation and deadlines (thread mode)."""
+
+import asyncio
+import threading
+import time
+
+from jobs.cancellation import checkpoint
+from jobs.scheduler import JobScheduler, LaneConfig
+
+LANES = {
+    "interactive": LaneConfig(workers=1, queue_size=4, default_timeout=5.0),
+    "bulk": LaneConfig(workers=1, queue_size=1, default_timeout=5.0),
+}
+
+
+class Jobs:
+    """run() for the scheduler: "block" loops on checkpoints until released or cancelled."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def run(self, action: str, input_data: dict) -> dict:
+        if action == "block":
+            self.started.set()
+            while not self.release.wait(0.01):
+                checkpoint()
+        return {"action": action, **input_data}
+
+
+async def _until(predicate, timeout: float = 5.0) -> None:
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _scenario(body):
+    jobs = Jobs()
+    done: dict[str, dict] = {}
+
+    async def main():
+        scheduler = JobScheduler(jobs.run, lambda job_id, payload: done.__setitem__(job_id, payload), lanes=LANES)
+        await scheduler.start()
+        try:
+            await body(scheduler, jobs, done)
+        finally:
+            jobs.release.set()
+            await scheduler.close()
+
+    asyncio.run(main())
+    return done
+
+
+def test_interactive_lane_runs_while_bulk_lane_is_busy():
+    async def body(scheduler, jobs, done):
+        scheduler.submit("export", "block", {}, priority="bulk")
+        await _until(jobs.started.is_set)
+        scheduler.submit("diff", "diff", {"n": 1})
+        await _until(lambda: "diff" in done)
+        assert "export" not in done
+
+    done = _scenario(body)
+    assert done["diff"] == {"result": {"action": "diff", "n": 1}}
+    assert "result" in done["export"]
+
+
+def test_full_lane_rejects_immediately_and_cancels_still_apply():
+    async def body(scheduler, jobs, done):
+        assert scheduler.submit("running", "block", {}, priority="bulk")
+        await _until(jobs.started.is_set)
+        assert scheduler.submit("queued", "export-pdf", {}, priority="bulk")
+
+        start = time.monotonic()
+        assert not scheduler.submit("overflow", "export-pdf", {}, priority="bulk")
+        assert time.monotonic() - start < 0.1
+        assert done["overflow"]["code"] == "busy"
+
+        # The reader is not blocked, so cancels for the full lane go through
+        assert scheduler.cancel("queued")
+        assert scheduler.cancel("running")
+        await _until(lambda: "queued" in done and "running" in done)
+
+    done = _scenario(body)
+    assert done["running"]["code"] == "cancelled"
+    assert done["queued"] == {"error": "Job cancelled before start", "code": "cancelled"}
+
+
+def test_deadline_stops_running_job():
+    async def body(scheduler, jobs, done):
+        scheduler.submit("slow", "block", {}, timeout=0.2)
+        await _until(lambda: "slow" in done)
+
+    done = _scenario(body)
+    assert done["slow"]["code"] == "deadline_exceeded"
+
+
+def test_rejects_unknown_lane_and_duplicate_ids():
+    async def body(scheduler, jobs, done):
+        assert not scheduler.submit("a", "diff", {}, priority="urgent")
+        assert scheduler.submit("b", "block", {})
+        await _until(jobs.started.is_set)
+        assert not scheduler.submit("b", "diff", {})
+        assert done["b"]["code"] == "invalid"
+        jobs.release.set()
+
+    done = _scenario(body)
+    assert done["a"]["code"] == "invalid"
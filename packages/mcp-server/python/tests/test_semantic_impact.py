@@ -0,0 +1,65 @@
+"""Semantic impacts: similarity matches that ID references miss."""
+
+import pytest
+
+pytest.importorskip("scipy")
+
+from nlp import semantic_impact
+from nlp.diff_analyzer import analyze, stream_analysis
+
+OLD = "# 要件定義書\n## 売上帳票\nREQ-1: 月次の売上帳票を部門別に集計して出力する。\n"
+NEW = "# 要件定義書\n## 売上帳票\nREQ-2: 月次の売上帳票を部門別・担当者別に集計してPDFで出力する。\n"
+DOWNSTREAM = (
+    "# 基本設計書\n"
+    "## 帳票\nREQ-2 に対応。月次の売上帳票を部門別に集計して出力する。\n"
+    "## 集計バッチ\n月次の売上を部門別に集計して帳票として出力する。\n"
+    "## ログイン\n利用者IDとパスワードで認証する。\n"
+)
+
+
+def _matched_sections(semantic_impacts):
+    return {m["section"] for impact in semantic_impacts for m in impact["matches"]}
+
+
+def test_semantic_impacts_exclude_sections_citing_changed_ids():
+    result = analyze(OLD, NEW, DOWNSTREAM, semantic=True, parts=["impacts", "semantic_impacts"])
+
+    assert [i["section"] for i in result["impacts"]] == ["帳票"]
+    assert _matched_sections(result["semantic_impacts"]) == {"集計バッチ"}
+
+
+def test_streamed_semantic_impacts_match_analyze():
+    records = list(stream_analysis(OLD, NEW, DOWNSTREAM, semantic=True, parts=["semantic_impacts"]))
+    streamed = [r for r in records if r["record"] == "semantic_impact"]
+
+    assert _matched_sections(streamed) == {"集計バッチ"}
+
+
+def test_index_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(semantic_impact, "MAX_CACHED_INDEXES", 3)
+    monkeypatch.setattr(semantic_impact, "_INDEXES", type(semantic_impact._INDEXES)())
+
+    first = semantic_impact.load_index("# 0\n版 0\n", persist=False)
+    for i in range(1, 5):
+        semantic_impact.load_index(f"# {i}\n版 {i}\n", persist=False)
+
+    assert len(semantic_impact._INDEXES) == 3
+    assert semantic_impact.load_index("# 0\n版 0\n", persist=False) is not first
+
+
+@pytest.mark.parametrize("damage", ["truncate", "garbage", "empty"])
+def test_corrupt_persisted_index_is_rebuilt(cache_root, monkeypatch, damage):
+    monkeypatch.setattr(semantic_impact, "_INDEXES", type(semantic_impact._INDEXES)())
+    expected = semantic_impact.load_index(DOWNSTREAM)
+    [path] = (cache_root / "vectors").glob("*.npz")
+
+    data = path.read_bytes()
+    path.write_bytes({"truncate": data[: len(data) // 2], "garbage": b"PK\x03\x04" + b"\0" * 64, "empty": b""}[damage])
+    semantic_impact._INDEXES.clear()
+
+    rebuilt = semantic_impact.load_index(DOWNSTREAM)
+    assert rebuilt.sections == expected.sections
+    assert (rebuilt.matrix != expected.matrix).nnz == 0
+    # The rebuilt index replaced the damaged file, and no temp files are left
+    assert semantic_impact.VectorIndex.load(path) is not None
+    assert [p.name for p in (cache_root / "vectors").iterdir()] == [path.name]
@@ -0,0 +1,64 @@
+"""cli.py serve: jobs that start their own process pools inside governed workers."""
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import PYTHON_ROOT
+
+
+def _serve(requests: list[dict], **env) -> dict:
+    proc = subprocess.run(
+        [sys.executable, str(PYTHON_ROOT / "cli.py"), "serve"],
+        input="".join(json.dumps(r, ensure_ascii=False) + "\n" for r in requests),
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env={**os.environ, **env},  # carries the per-test SEKKEI_CACHE_DIR
+    )
+    assert proc.returncode == 0, proc.stderr
+    responses = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+    return {r["id"]: r for r in responses}
+
+
+def _pairs(n: int) -> list[dict]:
+    return [
+        {"name": f"v{i}", "old": f"# 要件\n## 機能\nREQ-{i:03d}\n", "new": f"# 要件\n## 機能\nREQ-{i + 1:03d}\n"}
+        for i in range(n)
+    ]
+
+
+def test_pool_backed_actions_run_in_governed_workers(tmp_path):
+    tables = "\n\n".join(
+        f"## 表{t}\n\n| ID | 名称 |\n|----|------|\n" + "\n".join(f"| F-{t}{r} | 機能{r} |" for r in range(5))
+        for t in range(4)
+    )
+    responses = _serve([
+        {
+            "id": "batch",
+            "action": "diff-batch",
+            "input": {"pairs": _pairs(4), "downstream": {"機能一覧": "# 一覧\nREQ-002 を参照\n"}, "max_workers": 3},
+        },
+        {
+            "id": "excel",
+            "action": "export-excel",
+            "input": {
+                "content": tables,
+                "doc_type": "functions-list",
+                "output_path": str(tmp_path / "out.xlsx"),
+                "parallel": True,
+                "max_workers": 2,
+            },
+        },
+    ])
+
+    batch = responses["batch"]
+    assert "error" not in batch, batch
+    assert [p["name"] for p in batch["result"]["pairs"]] == ["v0", "v1", "v2", "v3"]
+    assert batch["result"]["impacts"][0]["referenced_ids"] == ["REQ-002"]
+
+    excel = responses["excel"]
+    assert "error" not in excel, excel
+    assert excel["result"]["workers"] == 2
+    assert (tmp_path / "out.xlsx").stat().st_size > 0
@@ -0,0 +1,93 @@
+"""Parsed documents in shared memory: same views as the parsers, same batch diff results."""
+
+import os
+
+import pytest
+
+from export.excel_exporter import parse_markdown
+from nlp.batch_diff import analyze_batch
+from nlp.diff_analyzer import extract_ids, extract_sections
+from table_store.shared_docs import ParsedDocument, SharedDocumentCache, attach, encode_document
+
+DOCUMENT = """---
+doc_type: basic-design
+---
+
+前文 F-001
+
+# 基本設計書
+
+## 画面一覧
+
+| 画面ID | 画面名 | 機能ID |
+|--------|--------|--------|
+| SCR-001 | ログイン | F-001 |
+| SCR-002 | 検索結果(全角|含む) | F-002 |
+
+## テーブル一覧
+
+| テーブルID | 名称 |
+|------------|------|
+| TBL-001 | 会員 |
+
+本文のみの節。REQ-010 と NFR-002 を参照。
+"""
+
+
+def _rows(table):
+    return [list(row) for row in table.rows]
+
+
+def test_parsed_document_matches_the_parsers():
+    doc = ParsedDocument(encode_document(DOCUMENT))
+
+    assert doc.content == DOCUMENT
+    assert doc.sections() == extract_sections(DOCUMENT)
+    assert doc.ids() == extract_ids(DOCUMENT)
+    for i in range(doc.section_count):
+        assert doc.section_ids(i) == extract_ids(doc.section_text(i))
+
+    expected = parse_markdown(DOCUMENT)["tables"]
+    assert doc.table_count == len(expected)
+    for i, table in enumerate(expected):
+        assert doc.table(i).header == table.header
+        assert _rows(doc.table(i)) == _rows(table)
+
+
+def test_caller_parsed_tables_are_reused():
+    tables = parse_markdown(DOCUMENT)["tables"]
+    doc = ParsedDocument(encode_document(DOCUMENT, tables))
+
+    assert [_rows(t) for t in doc.tables()] == [_rows(t) for t in tables]
+
+
+def test_segments_are_published_once_and_unlinked():
+    with SharedDocumentCache() as shared:
+        handle = shared.add(DOCUMENT)
+        assert shared.add(DOCUMENT) == handle
+        assert attach(handle).sections() == extract_sections(DOCUMENT)
+        name = handle[0]
+    if os.path.isdir("/dev/shm"):
+        assert not os.path.exists(f"/dev/shm/{name}")
+
+
+@pytest.mark.parametrize("revision_mode", [False, True])
+def test_parallel_batch_diff_matches_inline(revision_mode):
+    versions = [
+        "# 要件定義書\n## 機能要件\nREQ-001 ログイン\n",
+        "# 要件定義書\n## 機能要件\nREQ-001 ログイン\nREQ-002 検索\n",
+        "# 要件定義書\n## 機能要件\nREQ-002 検索\n## 非機能要件\nNFR-001 応答3秒以内\n",
+        "# 要件定義書\n## 機能要件\nREQ-002 検索(改)\nREQ-003 出力\n## 非機能要件\nNFR-001 応答3秒以内\n",
+        "# 要件定義書\n## 非機能要件\nNFR-001 応答2秒以内\n",
+    ]
+    pairs = [{"name": f"v{i}", "old": old, "new": new} for i, (old, new) in enumerate(zip(versions, versions[1:]))]
+    downstream = {
+        "機能一覧": "# 機能一覧\n## 認証\nREQ-001\n## 検索\nREQ-002\n",
+        "基本設計": "# 基本設計\n## 出力\nREQ-003\n## 性能\nNFR-001\n",
+    }
+
+    inline = analyze_batch(pairs, downstream, revision_mode, max_workers=1)
+    parallel = analyze_batch(pairs, downstream, revision_mode, max_workers=2)
+
+    assert parallel == inline
+    assert inline["changed_ids"] == ["NFR-001", "REQ-001", "REQ-002", "REQ-003"]
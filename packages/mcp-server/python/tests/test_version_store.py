@@ -0,0 +1,67 @@
+"""Version store: commits, checkouts and section-level queries."""
+
+import pytest
+
+from nlp import version_store as vs
+from nlp.version_store import VersionStore
+
+DUPLICATE_HEADINGS = "# A\n## 概要\nAの概要\n# B\n## 概要\nBの概要\n"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VersionStore(str(tmp_path / "store"))
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "前文のみ\n",
+    "# 基本設計書\n\n## 1. 概要\n本書は F-001 を扱う。\n\n## 2. 画面\n| ID | 名称 |\n|----|----|\n| SCR-01 | ログイン |\n",
+    DUPLICATE_HEADINGS,
+    "# A\n## 備考\n1\n## 備考\n2\n## 備考\n3",
+])
+def test_checkout_round_trips_commit(store, content):
+    store.commit("doc", content, date="2026-01-01")
+    assert store.checkout("doc") == content
+
+
+def test_duplicate_headings_are_distinct_sections(store):
+    result = store.commit("doc", DUPLICATE_HEADINGS, date="2026-01-01")
+    assert result["changed_sections"] == ["A", "A > 概要", "B", "B > 概要"]
+
+    edited = DUPLICATE_HEADINGS.replace("Bの概要", "Bの概要(改)")
+    result = store.commit("doc", edited, date="2026-01-02")
+    assert result["changed_sections"] == ["B > 概要"]
+    assert store.checkout("doc", 1) == DUPLICATE_HEADINGS
+    assert store.checkout("doc", 2) == edited
+
+    changes = store.changes_between("doc", 1, 2)
+    assert changes["modified_sections"] == ["B > 概要"]
+    assert [h["change_type"] for h in store.section_history("doc", "A > 概要")] == ["add"]
+
+
+def test_every_version_round_trips_across_snapshots(store):
+    versions = []
+    for i in range(vs.SNAPSHOT_EVERY + 3):
+        chapters = "".join(f"# 第{c}章\n## 概要\n第{c}章 v{i if c == i % 3 else 0}\n" for c in range(3))
+        if i % 4 == 3:
+            chapters += "# 付録\n## 概要\n付録\n"  # added, then dropped again
+        versions.append(chapters)
+        store.commit("doc", chapters, date="2026-01-01")
+
+    for number, content in enumerate(versions, start=1):
+        assert store.checkout("doc", number) == content
+
+
+def test_unchanged_commit_creates_no_version(store):
+    store.commit("doc", DUPLICATE_HEADINGS, date="2026-01-01")
+    result = store.commit("doc", DUPLICATE_HEADINGS, date="2026-01-02")
+    assert result == {"version": 1, "label": "1.0", "created": False}
+
+
+def test_reordered_sections_round_trip(store):
+    store.commit("doc", DUPLICATE_HEADINGS, date="2026-01-01")
+    reordered = "# B\n## 概要\nBの概要\n# A\n## 概要\nAの概要\n"
+    assert store.commit("doc", reordered, date="2026-01-02")["created"]
+    assert store.checkout("doc") == reordered
+    assert store.checkout("doc", 1) == DUPLICATE_HEADINGS
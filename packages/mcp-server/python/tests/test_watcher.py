@@ -0,0 +1,99 @@
+"""DocsWatcher: only real content changes re-run the rules they affect."""
+
+import json
+import os
+
+import pytest
+
+from jobs.watcher import DocsWatcher
+
+REQUIREMENTS = "# 要件定義書\n## 機能要件\nREQ-001 ログイン\n"
+FUNCTIONS = "# 機能一覧\n## 認証\nREQ-001 に対応\n## 検索\nREQ-002 に対応\n"
+
+
+def _write(path, text: str, tick: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    os.utime(path, ns=(tick * 10**9, tick * 10**9))  # distinct mtimes without sleeping
+
+
+@pytest.fixture
+def watched(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    _write(docs / "requirements.md", REQUIREMENTS, 1)
+    _write(docs / "functions-list.md", FUNCTIONS, 1)
+    runs, events = [], []
+    config = {
+        "dir_path": str(docs),
+        "debounce_ms": 0,
+        "exports": [{"source": "functions-list.md", "action": "export-excel",
+                     "output_path": str(tmp_path / "out.xlsx")}],
+        "impacts": [{"upstream": "requirements.md", "downstream": ["functions-list.md"],
+                     "output_path": str(tmp_path / "impacts.json")}],
+    }
+    watcher = DocsWatcher(config, lambda action, data: runs.append((action, data)) or {"ok": True}, events.append)
+    watcher.start()
+    return watcher, docs, runs, events, tmp_path
+
+
+def _settle(watcher) -> None:
+    if watcher.poll_once():
+        watcher.process_pending()
+
+
+def _kinds(events) -> list[str]:
+    return [e["event"] for e in events]
+
+
+def test_touch_without_change_runs_nothing(watched):
+    watcher, docs, runs, events, _ = watched
+    _write(docs / "functions-list.md", FUNCTIONS, 2)
+    _settle(watcher)
+
+    assert runs == []
+    assert _kinds(events) == ["ready"]
+
+
+def test_downstream_edit_reruns_its_export_only(watched):
+    watcher, docs, runs, events, tmp_path = watched
+    edited = FUNCTIONS + "## 出力\nREQ-003 に対応\n"
+    _write(docs / "functions-list.md", edited, 2)
+    _settle(watcher)
+
+    assert [(action, data["content"], data["doc_type"]) for action, data in runs] == [
+        ("export-excel", edited, "functions-list"),
+    ]
+    assert _kinds(events) == ["ready", "changes", "export", "settled"]
+    assert not (tmp_path / "impacts.json").exists()
+
+
+def test_upstream_edit_writes_impacts(watched):
+    watcher, docs, runs, events, tmp_path = watched
+    _write(docs / "requirements.md", REQUIREMENTS + "REQ-002 検索\n", 2)
+    _settle(watcher)
+
+    assert runs == []
+    assert _kinds(events) == ["ready", "changes", "impacts", "settled"]
+    impacts = json.loads((tmp_path / "impacts.json").read_text(encoding="utf-8"))
+    assert impacts["changed_ids"] == ["REQ-002"]
+    assert impacts["impacts"] == [
+        {"document": "functions-list.md", "section": "検索", "referenced_ids": ["REQ-002"]},
+    ]
+
+
+def test_debounce_waits_for_quiet(watched):
+    watcher, docs, _, events, _ = watched
+    watcher.debounce = 3600
+    _write(docs / "requirements.md", REQUIREMENTS + "REQ-002 検索\n", 2)
+
+    assert not watcher.poll_once()
+    watcher.debounce = 0
+    assert watcher.poll_once()
+    watcher.process_pending()
+    assert _kinds(events)[-1] == "settled"
+
+
+def test_rejects_unsupported_export_action(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported export action"):
+        DocsWatcher({"dir_path": str(tmp_path), "exports": [{"source": "a.md", "action": "diff"}]},
+                    lambda *a: {}, lambda e: None)